@@ -8,9 +8,10 @@ from pathlib import Path
 from abc import abstractmethod, ABC, abstractproperty
 
 from driftai.utils import maybe_make_dir, str_to_date, to_camel_case
-from driftai.db import Persistent
+from driftai.db import Persistent, RunCounters
 from driftai.data import SubDataset
 from driftai.run import Run
+from driftai.parameters import ParameterGrid
 from driftai.result_report import ResultReport
 from driftai.exceptions import OptAppInstanceExistsException
 
@@ -68,7 +69,11 @@ class {}Approach(RunnableApproach):
         self.subdataset = subdataset
         self.path = path or str(Path(self.project.path, "approaches"))
         self.script_path = Path(self.path, self.name + ".py")
-        self.runs = []
+        self._runs = []
+        self._runs_data = None
+        self.archive = None
+        self._archive_loaded = False
+        self._run_counters = None
         self.creation_date = str_to_date(creation_date) or datetime.now()
         if creation_date is None and Approach.collection().exists(self.id):
             raise OptAppInstanceExistsException("Approach")
@@ -131,10 +136,62 @@ class {}Approach(RunnableApproach):
             path=str(Path(data["path"]).absolute()),
             creation_date=data["creation_date"])
         
-        a.runs = [Run.load_from_data(r, subdataset=subdataset) for r in data["runs"]] 
+        # Runs are loaded the first time they are accessed
+        a._runs_data = data["runs"]
+        a.archive = data.get("archive")
+        a._run_counters = data.get("run_counters")
         
         return a
 
+    @property
+    def runs(self):
+        """
+        Get the approach runs. Runs of archived approaches are read from its archive file
+
+        Returns
+        -------
+        list of driftai.run.Run
+        """
+        from driftai.db import Collections
+
+        if self.archive is not None and not self._archive_loaded:
+            self._runs_data = Collections.runs(self.id).all()
+            self._archive_loaded = True
+
+        if self._runs_data is not None:
+            self._runs = [Run.load_from_data(r, subdataset=self.subdataset) for r in self._runs_data]
+            self._runs_data = None
+        return self._runs
+
+    @runs.setter
+    def runs(self, runs):
+        self._runs = runs
+        self._runs_data = None
+        self._archive_loaded = self.archive is not None
+
+    def save(self):
+        super().save()
+        self._mark_runs_persisted()
+
+    def update(self):
+        """
+        Updates the approach in driftai db. 
+        Runs of archived approaches which have been accessed are moved back to driftai db
+        """
+        from driftai.db import DatabaseInjector
+
+        super().update()
+        self._mark_runs_persisted()
+        if self.archive is not None and self._archive_loaded:
+            DatabaseInjector.archive().remove(self.archive)
+            self.archive = None
+            self._archive_loaded = False
+
+    def _mark_runs_persisted(self):
+        if self._runs_data is None:
+            for r in self._runs:
+                r.persisted_status = r.status
+
     @property
     def status(self):
         """
@@ -155,9 +212,37 @@ class {}Approach(RunnableApproach):
         """
         total_runs = len(self.runs)
         done_runs = sum([ 1 for r in self.runs if r.done() ])
+        return Approach._summarize_status(total_runs, done_runs)
+
+    @staticmethod
+    def load_status(id_, counts=None):
+        """
+        Get the status of approach runs without loading them from driftai db
+
+        Parameters
+        ----------
+        id_: str
+            Approach unique identifier
+        counts: dict, optional
+            Number of runs by status, as returned by `RunsCollection.count_by_status`.
+            By default the runs of the approach are counted
+
+        Returns
+        -------
+        dict
+            Same dictionary as `Approach.status`
+        """
+        from driftai.db import Collections
+
+        if counts is None:
+            counts = Collections.runs(id_).count_by_status()
+        return Approach._summarize_status(sum(counts.values()), counts.get("finished", 0))
 
-        percent = ("{}").format(int(100 * (done_runs / total_runs)))
-        filledLength = int(40 * done_runs // total_runs)
+    @staticmethod
+    def _summarize_status(total_runs, done_runs):
+        ratio = done_runs / total_runs if total_runs else 0
+        percent = ("{}").format(int(100 * ratio))
+        filledLength = int(40 * ratio)
         bar = "=" * filledLength + '>' + '-' * (40 - filledLength)
 
         return {
@@ -200,16 +285,30 @@ class {}Approach(RunnableApproach):
                 "name": <approach name>,
                 "path": <approach file system location>,
                 "runs": <runs which runnable approach will execute>,
+                "run_counters": <number of runs by status and pending runs>,
+                "archive": <archive file containing the runs of an archived approach>,
                 "creation_date": <approach creation date>
             } 
         """
+        if self.archive is not None and not self._archive_loaded:
+            # Runs stay in the archive file
+            runs = []
+            run_counters = self._run_counters
+            archive = self.archive
+        else:
+            runs = self._runs_data if self._runs_data is not None else [r.get_info() for r in self._runs]
+            run_counters = RunCounters.from_runs(runs).get_info()
+            archive = None
+
         return {
             "id": self.id,
             "project": self.project.id,
             "subdataset": self.subdataset.id,
             "name": self.name,
             "path": self.path,
-            "runs": [r.get_info() for r in self.runs],
+            "runs": runs,
+            "run_counters": run_counters,
+            "archive": archive,
             "creation_date": str(self.creation_date)
         }
 
@@ -226,6 +325,12 @@ class RunnableApproach(ABC):
         print("Loading approach data")
         self.approach = Approach.load(self._get_approach_id_from_class())
     
+    def __getstate__(self):
+        # Runners belong to the process running the approach, workers get the approach without it
+        state = self.__dict__.copy()
+        state["runner"] = None
+        return state
+
     def run(self, resume=False):
         """
         Run the approach
@@ -261,6 +366,78 @@ class RunnableApproach(ABC):
         """
         return []
 
+    @property
+    def search_space(self):
+        """
+        Define how the runs configurations are drawn from the parameters here
+
+        Returns
+        -------
+        ParameterGrid, AbstractSampler or AbstractSearch
+            By default all the combinations of the parameters.
+            Use a sampler to run a fixed budget of configurations instead, for example:
+            ``SobolSampler(self.parameters, n_samples=64)``, or an adaptive search to
+            propose each configuration from the finished ones, for example:
+            ``TPESearch(self.parameters, "accuracy", n_runs=50, parallelism=4)``
+        """
+        return ParameterGrid(self.parameters)
+
+    @property
+    def metrics(self):
+        """
+        Define the metrics computed when each run finishes here
+
+        Metric values are stored with the run results and indexed, so runs can be
+        queried by them. For example: ``Collections.runs(approach_id).top_k("accuracy")``
+
+        Returns
+        -------
+        list of callable
+            Metric functions. For example: ``[accuracy, f1]``
+        """
+        return []
+
+    @property
+    def timeout(self):
+        """
+        Define the wall clock time limit of each run in seconds here.
+        Runs exceeding it are killed and their status set to ``timeout``
+
+        Returns
+        -------
+        float or None
+            None to use the limit of the runner
+        """
+        return None
+
+    @property
+    def cpu_timeout(self):
+        """
+        Define the CPU time limit of each run in seconds here.
+        Runs exceeding it are killed and their status set to ``timeout``
+
+        Returns
+        -------
+        float or None
+            None to use the limit of the runner
+        """
+        return None
+
+    def cost_hint(self, parameters):
+        """
+        Define the relative cost of running some parameters here, for example
+        ``parameters["n_estimators"] * parameters["max_depth"]``
+
+        Runs are executed longest first, by their time predicted from the finished
+        runs. The hint improves the prediction and is used alone until runs finish
+
+        Returns
+        -------
+        float or None
+            Relative cost of the parameters. None if it is unknown
+        """
+        return None
+
     @abstractmethod
     def learn(self, parameters, data):
         """
@@ -1,5 +1,6 @@
 import sys
 from functools import partial
+from datetime import timedelta
 from pathlib import Path
 
 import click
@@ -9,7 +10,8 @@ from driftai.data import Dataset, SubDataset
 from driftai.result_report import ResultReport
 from driftai.result_report.metrics import *
 
-from driftai.run import RunGenerator
+from driftai.run import RunGenerator, Worker, RetryPolicy, ShardRunner, parse_shard, merge_shards, estimate_eta
+from driftai.db import Collections
 from driftai.utils import import_from, to_camel_case
 
 @click.group()
@@ -132,19 +134,31 @@ def status(approach_id):
     if not _is_running_in_project():
         print("You must use driftai CLI inside an driftai project directory")
         return
-    print("Loading approach data...")
-    stat = Approach.load(approach_id).status
+    if not Approach.collection().exists(approach_id):
+        print("Approach with id {} does not exist.".format(approach_id))
+        return
+
+    runs = Collections.runs(approach_id)
+    counts = runs.count_by_status()
+    stat = Approach.load_status(approach_id, counts)
     if not stat["done"]:
         print("Approach {} is still running".format(approach_id))
         print(stat["progress_bar"] + " Done runs: " + str(stat["done_runs"]) + " Total runs: " + str(stat["total_runs"]))
+        if counts.get("failed") or counts.get("timeout"):
+            print("Failed runs: {} Timed out runs: {}".format(counts.get("failed", 0), counts.get("timeout", 0)))
+        # The times of the runs are read from the run index, without loading the runs
+        eta = estimate_eta(runs.run_times())
+        if eta is not None:
+            print("ETA: {}".format(timedelta(seconds=int(eta))))
     else:
-        print("There are no left runs for Approach {approach_id}!".format(approach_id))
+        print("There are no left runs for Approach {}!".format(approach_id))
 
 
 @main.command()
 @click.argument('approach-id')
 @click.option('--resume/--no-resume', default="False", help="Resume the last execution?")
-def run(approach_id, resume):
+@click.option('--shard', default=None, help="Execute only a slice of the runs, for example 2/8. Use merge to store them")
+def run(approach_id, resume, shard):
     if not _is_running_in_project():
         print("You must use driftai CLI inside an driftai project directory")
         return
@@ -158,7 +172,62 @@ def run(approach_id, resume):
     cls_name = to_camel_case(approach_id) + "Approach"
 
     approach_cls = import_from(namespace, cls_name)
-    approach_cls().run(resume=resume)
+    runnable_approach = approach_cls()
+    if shard:
+        try:
+            runnable_approach.runner = ShardRunner(*parse_shard(shard))
+        except ValueError as e:
+            print(e)
+            return
+    runnable_approach.run(resume=resume)
+
+@main.command()
+@click.argument('approach-id')
+def merge(approach_id):
+    """
+    Stores the results of the shards of an approach in driftai db
+    """
+    if not _is_running_in_project():
+        print("You must use driftai CLI inside an driftai project directory")
+        return
+    if not Approach.collection().exists(approach_id):
+        print("Approach with id {} does not exist.".format(approach_id))
+        return
+
+    sys.path.append(Project.load().path)
+
+    namespace = 'approaches.' + approach_id
+    cls_name = to_camel_case(approach_id) + "Approach"
+
+    # The runs of the approach are generated from its search space
+    runnable_approach = import_from(namespace, cls_name)()
+    n_runs = merge_shards(runnable_approach)
+    print("{} runs of approach {} merged".format(n_runs, approach_id))
+
+@main.command()
+@click.option('--lease-time', default=60.0, help="Seconds a run is reserved for the worker without renewing its lease")
+@click.option('--poll-interval', default=1.0, help="Seconds between checks of the queue when it is empty")
+@click.option('--max-idle', type=float, default=None, help="Stop after waiting this number of seconds for new runs")
+@click.option('--timeout', type=float, default=None, help="Wall clock time limit of each run in seconds")
+@click.option('--cpu-timeout', type=float, default=None, help="CPU time limit of each run in seconds")
+@click.option('--retries', default=0, help="Times a failed run is executed again")
+@click.option('--retry-backoff', default=1.0, help="Seconds waited before the first retry, doubled after each one")
+def worker(lease_time, poll_interval, max_idle, timeout, cpu_timeout, retries, retry_backoff):
+    """
+    Executes the runs queued by the approaches running with a CloudRunner
+    """
+    if not _is_running_in_project():
+        print("You must use driftai CLI inside an driftai project directory")
+        return
+
+    sys.path.append(Project.load().path)
+
+    retry = RetryPolicy(max_retries=retries, backoff=retry_backoff) if retries else None
+    w = Worker(lease_time=lease_time, poll_interval=poll_interval, max_idle=max_idle,
+               timeout=timeout, cpu_timeout=cpu_timeout, retry=retry)
+    print("Worker {} waiting for runs...".format(w.worker_id))
+    n_runs = w.work()
+    print("Worker {} executed {} runs".format(w.worker_id, n_runs))
 
 @main.command()
 @click.argument('approach-id')
@@ -179,5 +248,65 @@ def evaluate(approach_id, metric):
         .to_csv(approach_id + "_evaluation.csv", index=False)       
 
 
+@main.command()
+@click.argument('approach-id', required=False)
+def archive(approach_id):
+    """
+    Moves the runs of finished approaches to compressed archive files
+    """
+    if not _is_running_in_project():
+        print("You must use driftai CLI inside an driftai project directory")
+        return
+
+    approach_ids = [approach_id] if approach_id else Approach.collection().list_ids()
+    for approach_id in approach_ids:
+        if not Approach.collection().exists(approach_id):
+            print("Approach with id {} does not exist.".format(approach_id))
+        elif Approach.collection().archive(approach_id):
+            print("Approach {} archived".format(approach_id))
+        else:
+            counts = Collections.runs(approach_id).counters()
+            if not counts.counts:
+                print("Approach {} has no runs. Skipping it".format(approach_id))
+            else:
+                print("Approach {} has {} pending runs. Skipping it".format(approach_id, len(counts.pending)))
+
+
+@main.command()
+@click.argument('approach-id')
+def unarchive(approach_id):
+    """
+    Moves the runs of an archived approach back to driftai db
+    """
+    if not _is_running_in_project():
+        print("You must use driftai CLI inside an driftai project directory")
+        return
+    if not Approach.collection().exists(approach_id):
+        print("Approach with id {} does not exist.".format(approach_id))
+        return
+
+    Approach.collection().unarchive(approach_id)
+    print("Approach {} unarchived".format(approach_id))
+
+
+@main.command()
+def compact():
+    """
+    Folds the pending run changes into driftai db and archives the finished approaches
+    """
+    if not _is_running_in_project():
+        print("You must use driftai CLI inside an driftai project directory")
+        return
+
+    db_size = Path("driftai.db").stat().st_size
+    Approach.collection().compact()
+    for approach_id in Approach.collection().list_ids():
+        if Approach.collection().archive(approach_id):
+            print("Approach {} archived".format(approach_id))
+
+    print("driftai.db size: {} KB -> {} KB".format(
+        db_size // 1024, Path("driftai.db").stat().st_size // 1024))
+
+
 if __name__ == "__main__":
     main()
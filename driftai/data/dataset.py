@@ -403,11 +403,16 @@ class SubDataset(Persistent):
         }
 
 
-    def _get_data(self, subset, train_test):
+    def _get_data(self, subset, train_test, fraction=None):
         index = self.indices["sets"][subset][train_test]
+        if fraction is not None:
+            # Fixed permutation: smaller fractions are subsets of the larger ones
+            n_rows = max(1, int(round(fraction * len(index))))
+            rows = np.random.RandomState(0).permutation(len(index))[:n_rows]
+            index = [ index[i] for i in sorted(rows) ]
         return self.dataset[index]
 
-    def get_train_data(self, subset):
+    def get_train_data(self, subset, fraction=None):
         """
         Get the training data of a subset
 
@@ -415,6 +420,9 @@ class SubDataset(Persistent):
         ----------
         subset: str
             subset identifier
+        fraction: float, optional
+            Fraction of the training rows to get, chosen randomly.
+            Smaller fractions are subsets of the larger ones
 
         Returns
         -------
@@ -427,7 +435,7 @@ class SubDataset(Persistent):
             }
 
         """
-        return self._get_data(subset, "train")
+        return self._get_data(subset, "train", fraction)
 
     def get_test_data(self, subset):
         """
@@ -146,6 +146,8 @@ class FileDatasource(Datasource):
         super().__init__(path)
         self._label = label
         self.first_line_heading = first_line_heading
+        # Content of the file and its modification time, shared by all the reads
+        self._cache = None
 
     def __len__(self):
         if not self.data:
@@ -157,7 +159,7 @@ class FileDatasource(Datasource):
         if self._label:
             return self._label
         else:
-            df = self.get_data()
+            df = self._read()
             self._label = df.columns[-1]
             # If column hasn't got a name, 
             # cast the index (originaly numpy.int64) to python's int
@@ -205,7 +207,7 @@ class FileDatasource(Datasource):
         tuple
             A tuple with: (index, the whole line content, data_type, label)
         """
-        df = self.get_data()
+        df = self._read()
         indices = list(range(df.shape[0]))
         labels = df[self.label].values.tolist()
 
@@ -221,10 +223,18 @@ class FileDatasource(Datasource):
         pandas.DataFrame
             DataFrame wrapping the csv content
         """
-        params = dict()
-        if not self.first_line_heading:
-            params["header"] = None
-        return pd.read_csv(self.get_path(), **params)
+        return self._read().copy()
+
+    def _read(self):
+        # The file is parsed once and read again only if it changes
+        path = self.get_path()
+        modification_time = os.path.getmtime(path)
+        if self._cache is None or self._cache[0] != modification_time:
+            params = dict()
+            if not self.first_line_heading:
+                params["header"] = None
+            self._cache = (modification_time, pd.read_csv(path, **params))
+        return self._cache[1]
     
     def __getitem__(self, indices):
         """
@@ -239,7 +249,7 @@ class FileDatasource(Datasource):
         pd.DataFrame
         """
         # TODO: Lazy loading dataset (No load all file in memory)
-        df = self.get_data().iloc[[i[0] for i in indices]]
+        df = self._read().iloc[[i[0] for i in indices]]
         X = df.drop(self.label, axis=1).values
         y = df[self.label].values
         return dict(X=X, y=y)
@@ -1,2 +1,9 @@
 from .persistent import Persistent
+from .prediction_store import PredictionStore
+from .event_log import RunEventLog
+from .run_counters import RunCounters
+from .archive import ApproachArchive
+from .run_index import RunIndex
+from .run_queue import RunQueue
+from .storage import SnapshotStorage
 from .db import Database, DatabaseInjector, Collections, set_project_path
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from .storage import replaced_file_mode
+
+
+class ApproachArchive(object):
+    """
+    Compressed per-approach files containing the runs of finished approaches
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            Directory where the archive files are stored
+        """
+        self.path = Path(path)
+
+    def write(self, approach_id, runs):
+        """
+        Write the runs of an approach to its archive file
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        runs: list of dict
+            Runs summaries
+
+        Returns
+        -------
+        str
+            Name of the archive file
+        """
+        name = approach_id + ".json.gz"
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(runs, f)
+            os.chmod(tmp_path, replaced_file_mode(Path(self.path, name)))
+            os.replace(tmp_path, str(Path(self.path, name)))
+        except BaseException:
+            if Path(tmp_path).exists():
+                os.remove(tmp_path)
+            raise
+        return name
+
+    def read(self, name):
+        """
+        Read the runs stored in an archive file
+
+        Parameters
+        ----------
+        name: str
+            Name of the archive file
+
+        Returns
+        -------
+        list of dict
+            Runs summaries
+        """
+        with gzip.open(str(Path(self.path, name)), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def remove(self, name):
+        """
+        Remove an archive file
+
+        Parameters
+        ----------
+        name: str
+            Name of the archive file
+        """
+        archive_path = Path(self.path, name)
+        if archive_path.exists():
+            archive_path.unlink()
@@ -1,24 +1,192 @@
+import os
+import threading
 from pathlib import Path
 from abc import ABC, abstractproperty
+from contextlib import contextmanager
 import functools
 
 from tinydb import TinyDB, where
 
 from .persistent import Persistent
+from .prediction_store import PredictionStore
+from .event_log import RunEventLog
+from .lock import ReadWriteLock
+from .run_counters import RunCounters
+from .archive import ApproachArchive
+from .run_index import RunIndex
+from .run_queue import RunQueue
+from .storage import SnapshotStorage
 
 class Database(object):
-    
-    def __init__(self, project_path):
-        self.db = TinyDB(str(Path(project_path, "driftai.db")))
+    """
+    Process and thread safe access to the project database.
+
+    Every operation borrows a TinyDB handle from a small pool. Writes hold a
+    lock shared among threads and processes through an advisory file lock, and
+    atomically replace the database file. Reads do not lock: they always see
+    the complete snapshot written by the last write, so monitoring a project
+    never blocks or slows down its runs.
+    Handles and locks are re-opened when the process is forked.
+    """
+
+    def __init__(self, project_path, pool_size=4):
+        """
+        Parameters
+        ----------
+        project_path: str
+            DriftAI's project path
+        pool_size: int, optional
+            Maximum number of TinyDB handles opened by a process
+        """
+        self.path = Path(project_path, "driftai.db")
+        self.pool_size = pool_size
+        self._pid = None
+        self._check_pid()
+
+    def table(self, name):
+        """
+        Get a table of the database
+
+        Parameters
+        ----------
+        name: str
+            Table name
+
+        Returns
+        -------
+        LockedTable
+        """
+        return LockedTable(self, name)
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the database lock in exclusive mode"""
+        self._check_pid()
+        with self._lock.write():
+            yield
+
+    @contextmanager
+    def reading(self):
+        """Borrow a TinyDB handle to read a snapshot of the database"""
+        self._check_pid()
+        with self._pool.handle() as handle:
+            yield handle
+
+    @contextmanager
+    def writing(self):
+        """Borrow a TinyDB handle holding the database lock in exclusive mode"""
+        self._check_pid()
+        with self._lock.write(), self._pool.handle() as handle:
+            yield handle
+
+    def close(self):
+        """Close all the handles of the current process"""
+        self._pool.close()
+        self._lock.close()
+
+    def _check_pid(self):
+        # Handles and locks inherited from a parent process can not be shared
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = ReadWriteLock(Path(self.path.parent, "driftai.lock"))
+            self._pool = HandlePool(str(self.path), self.pool_size)
+
+    def __getattr__(self, name):
+        """Calls the attribute of the default table"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.table("_default"), name)
+
+
+class HandlePool(object):
+    """
+    Pool of TinyDB handles over the same database file
+    """
+
+    def __init__(self, path, size):
+        """
+        Parameters
+        ----------
+        path: str
+            Database file location
+        size: int
+            Maximum number of opened handles
+        """
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._n_handles = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def handle(self):
+        """Borrow a handle, waiting if all of them are in use"""
+        with self._cond:
+            while not self._idle and self._n_handles >= self.size:
+                self._cond.wait()
+            if self._idle:
+                handle = self._idle.pop()
+            else:
+                handle = TinyDB(self.path, storage=SnapshotStorage)
+                self._n_handles += 1
+        try:
+            yield handle
+        finally:
+            with self._cond:
+                self._idle.append(handle)
+                self._cond.notify()
+
+    def close(self):
+        """Close the idle handles"""
+        with self._cond:
+            for handle in self._idle:
+                handle.close()
+            self._n_handles -= len(self._idle)
+            self._idle = []
+
+
+class LockedTable(object):
+    """
+    Proxy of a tinydb.Table whose write operations hold the database lock
+    """
+
+    _WRITE_METHODS = {
+        "insert", "insert_multiple", "update", "update_multiple",
+        "upsert", "remove", "truncate"
+    }
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
 
     def __getattr__(self, name):
-        return getattr(self.db, name)
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def locked(*args, **kwargs):
+            ctx = self.db.writing() if name in self._WRITE_METHODS else self.db.reading()
+            with ctx as handle:
+                return getattr(self._table(handle), name)(*args, **kwargs)
+        return locked
+
+    def __len__(self):
+        with self.db.reading() as handle:
+            return len(self._table(handle))
+
+    def _table(self, handle):
+        # Other handles and processes may have changed the table: a new table instance
+        # has neither cached queries nor a cached next document id
+        return handle.table_class(handle.storage, self.name, cache_size=0)
+
+    def __iter__(self):
+        return iter(self.all())
 
 
 class BaseCollection(ABC):
 
     def __init__(self, **kwargs):
-        self.collection = kwargs["db"].table(self.collection_name)
+        self.db = kwargs["db"]
+        self.collection = self.db.table(self.collection_name)
 
     def get(self, id_):
         """
@@ -48,6 +216,38 @@ class BaseCollection(ABC):
         """
         return [ r["id"] for r in self.collection.all() ]
 
+    def project(self, *fields):
+        """
+        Fetch selected fields of all records without loading them as persistent instances
+
+        Parameters
+        ----------
+        fields: str
+            Field names. Nested fields are separated by dots, for example: ``run_parameters.C``
+
+        Returns
+        -------
+        list of tuple
+            One tuple per record containing the values of the fields
+        """
+        return project_records(self.collection.all(), fields)
+
+    def count_by(self, field):
+        """
+        Count the records grouped by the value of a field
+
+        Parameters
+        ----------
+        field: str
+            Field name. Nested fields are separated by dots
+
+        Returns
+        -------
+        dict
+            Number of records for each value of the field
+        """
+        return count_records(self.collection.all(), field)
+
     @abstractproperty
     def collection_name(self):
         pass
@@ -115,6 +315,100 @@ class ApproachCollection(BaseCollection):
         from driftai import Approach
         return Approach
 
+    def get(self, id_):
+        data = self.collection.get(where("id") == id_)
+        if not data:
+            return None
+        data["runs"] = DatabaseInjector.event_log().merge(id_, data["runs"])
+        return self.persistent.load_from_data(data)
+
+    def save(self, instance):
+        if not isinstance(instance, Persistent):
+            raise TypeError("instance must be of Persistent type")
+
+        info = instance.get_info()
+        self.collection.insert(info)
+        self._reindex_runs(info)
+
+    def update(self, instance):
+        if not isinstance(instance, Persistent):
+            raise TypeError("instance must be of Persistent type")
+
+        # The approach document supersedes the pending run events. Other writers,
+        # such as compactions or run claims, can not interleave with the rewrite
+        with self.db.exclusive():
+            self.compact()
+            info = instance.get_info()
+            self.collection.update(info, where("id") == instance.id)
+            self._reindex_runs(info)
+
+    def _reindex_runs(self, info):
+        # Runs of archived approaches remain indexed
+        if not info.get("archive"):
+            DatabaseInjector.run_index().reindex(info["id"], info["runs"])
+
+    def compact(self):
+        """
+        Fold the pending run events into the approaches documents
+        """
+        with self.db.exclusive():
+            DatabaseInjector.event_log().compact(self.collection, DatabaseInjector.archive())
+
+    def archive(self, id_):
+        """
+        Move the runs of a finished approach to a compressed archive file.
+        The approach keeps its run counters and its runs are loaded from the archive when accessed
+
+        Parameters
+        ----------
+        id_: str
+            Approach unique identifier
+
+        Returns
+        -------
+        bool
+            True if the approach is archived, False if it has pending runs or no runs at all
+        """
+        with self.db.exclusive():
+            DatabaseInjector.event_log().compact(self.collection, DatabaseInjector.archive())
+
+            data = self.collection.get(where("id") == id_)
+            if data is None:
+                return False
+            if data.get("archive"):
+                return True
+
+            counters = RunCounters.from_approach_data(data)
+            if not data["runs"] or counters.pending:
+                return False
+
+            name = DatabaseInjector.archive().write(id_, data["runs"])
+            self.collection.update({
+                "runs": [],
+                "archive": name,
+                "run_counters": counters.get_info()
+            }, where("id") == id_)
+        return True
+
+    def unarchive(self, id_):
+        """
+        Move the runs of an archived approach back to driftai db
+
+        Parameters
+        ----------
+        id_: str
+            Approach unique identifier
+        """
+        with self.db.exclusive():
+            data = self.collection.get(where("id") == id_)
+            name = data.get("archive") if data else None
+            if not name:
+                return
+
+            runs = DatabaseInjector.archive().read(name)
+            self.collection.update({"runs": runs, "archive": None}, where("id") == id_)
+            DatabaseInjector.archive().remove(name)
+
 class DatasetCollection(BaseCollection):
 
     @property
@@ -154,46 +448,310 @@ class RunsCollection(BaseCollection):
         return Run
 
     def get(self, id_):
-        approach = self.collection.get(where("id") == self.approach_id)
-        possible_result =  list(filter(lambda r: r["id"] == id_, approach["runs"]))
+        possible_result =  list(filter(lambda r: r["id"] == id_, self.all()))
         return self.persistent.load_from_data(possible_result[0]) if possible_result else None
 
+    def all(self):
+        """
+        Get the runs of the approach as stored in driftai db, with the pending changes applied
+
+        Returns
+        -------
+        list of dict
+        """
+        approach = self.collection.get(where("id") == self.approach_id)
+        if not approach:
+            return []
+
+        return DatabaseInjector.event_log().merge(self.approach_id, self._stored_runs(approach))
+
+    def _stored_runs(self, approach):
+        if approach.get("archive"):
+            return DatabaseInjector.archive().read(approach["archive"])
+        return approach["runs"]
+
+    def list_ids(self):
+        return [ r["id"] for r in self.all() ]
+
+    def project(self, *fields):
+        return project_records(self.all(), fields)
+
+    def count_by(self, field):
+        return count_records(self.all(), field)
+
+    def counters(self):
+        """
+        Get the run counters of the approach, with the pending changes applied
+
+        Returns
+        -------
+        driftai.db.RunCounters
+        """
+        approach = self.collection.get(where("id") == self.approach_id)
+        if not approach:
+            return RunCounters()
+        return self._counters(approach, DatabaseInjector.event_log().events(self.approach_id))
+
+    def _counters(self, approach, events):
+        counters = RunCounters.from_approach_data(approach)
+        if events:
+            # Transitions start from the current status of the runs, as when compacting the events
+            changed = set(e["run"]["id"] for e in events)
+            statuses = dict((r["id"], r["status"]) for r in self._stored_runs(approach) if r["id"] in changed)
+            for e in events:
+                counters.apply_event(e, statuses)
+        return counters
+
+    def count_by_status(self):
+        """
+        Count the runs of the approach grouped by status
+
+        Returns
+        -------
+        dict
+            Number of runs for each status
+        """
+        return self.counters().counts
+
+    def pending_ids(self):
+        """
+        List the ids of the pending runs in execution order
+
+        Returns
+        -------
+        list of str
+        """
+        return list(self.counters().pending)
+
+    def get_pending(self):
+        """
+        Load only the pending runs of the approach, in execution order.
+        Only the runs in the pending runs queue are read
+
+        Returns
+        -------
+        list of driftai.run.Run
+        """
+        from driftai.data import SubDataset
+
+        approach = self.collection.get(where("id") == self.approach_id)
+        if not approach:
+            return []
+        events = DatabaseInjector.event_log().events(self.approach_id)
+        pending = self._counters(approach, events).pending
+        if not pending:
+            return []
+
+        runs_data = dict((r["id"], r) for r in self._stored_runs(approach) if r["id"] in pending)
+        for e in events:
+            if e["run"]["id"] in pending:
+                runs_data[e["run"]["id"]] = e["run"]
+        runs_data = [ runs_data[id_] for id_ in pending if id_ in runs_data ]
+
+        subdataset = SubDataset.collection().get(runs_data[0]["subdataset"])
+        return [ self.persistent.load_from_data(r, subdataset=subdataset) for r in runs_data ]
+
     def save(self, instance):
         from driftai.run import Run
         if not isinstance(instance, Run):
             raise TypeError("instance must be of Run type")
 
-        self.collection.update(append_to("runs", instance.get_info()), where("id") == self.approach_id)
+        info = instance.get_info()
+        self.collection.update(append_runs([info]), where("id") == self.approach_id)
+        DatabaseInjector.run_index().index(self.approach_id, [info])
+        instance.persisted_status = info["status"]
+
+    def save_many(self, instances):
+        """
+        Store a batch of new runs in a single transaction.
+        Runs whose id is already stored are skipped
+
+        Parameters
+        ----------
+        instances: list of driftai.run.Run
+            Runs to be stored
+
+        Returns
+        -------
+        list of driftai.run.Run
+            Runs which have been stored
+        """
+        from driftai.run import Run
+        if not all(isinstance(r, Run) for r in instances):
+            raise TypeError("instances must be of Run type")
+
+        with self.db.exclusive():
+            existing = set(self.list_ids())
+            new_runs = []
+            for r in instances:
+                if r.id not in existing:
+                    existing.add(r.id)
+                    new_runs.append(r)
+
+            infos = [ r.get_info() for r in new_runs ]
+            if infos:
+                self.collection.update(append_runs(infos), where("id") == self.approach_id)
+
+        DatabaseInjector.run_index().index(self.approach_id, infos)
+        for r, info in zip(new_runs, infos):
+            r.persisted_status = info["status"]
+        return new_runs
+
+    def exists(self, id_):
+        return id_ in self.list_ids()
 
     def update(self, instance):
         from driftai.run import Run
         if not isinstance(instance, Run):
             raise TypeError("instance must be of Run type")
-        
-        self.collection.update(update_collection_item("runs", instance.get_info()), where("id") == self.approach_id)
 
+        # Run changes are appended to the event log instead of rewriting the database
+        info = instance.get_info()
+        DatabaseInjector.event_log().append(self.approach_id, "update", info, 
+                                            previous_status=instance.persisted_status)
+        DatabaseInjector.run_index().index(self.approach_id, [info])
+        instance.persisted_status = info["status"]
 
-    
-def append_to(collection, item):
-    """Appends a new item to a list inside a document"""
-    def transform(doc):
-        doc[collection].append(item)
-        
-    return transform
+    def states(self, ids):
+        """
+        Get the status and lease of runs of the approach, using the run index
+
+        Parameters
+        ----------
+        ids: list of str
+            Run ids
+
+        Returns
+        -------
+        dict
+            ``(status, lease)`` of the stored runs by run id
+        """
+        return self.index().states(self.approach_id, ids)
+
+    def run_times(self):
+        """
+        Get the status, parameters, finish date and time of the runs of the
+        approach, using the run index. Enough to estimate the time left, see `estimate_eta`
+
+        Returns
+        -------
+        list of dict
+        """
+        return self.index().run_times(self.approach_id)
 
+    def where(self, **parameters):
+        """
+        Get the ids of the runs whose parameters have the specified values, using the run index
 
-def update_collection_item(collection, item):
+        Parameters
+        ----------
+        parameters: dict
+            Parameter names and values. For example: ``max_depth=5``
+
+        Returns
+        -------
+        list of str
+            Run ids
+        """
+        return self.index().where(self.approach_id, **parameters)
+
+    def top_k(self, metric, k=1, ascending=False):
+        """
+        Get the configurations with the best mean value of a stored metric over the
+        subdataset sets, using the run index
+
+        Parameters
+        ----------
+        metric: str
+            Metric name. For example: ``accuracy``
+        k: int, optional
+            Number of configurations
+        ascending: bool, optional
+            If True lower values are better (for example errors)
+
+        Returns
+        -------
+        list of tuple
+            ``(run_parameters, budget, mean metric value)`` of the best configurations, best first
+        """
+        return self.index().top_k(self.approach_id, metric, k, ascending)
+
+    def has_configuration(self, run_parameters, status="finished"):
+        """
+        Check if a configuration of parameters has already been run, using the run index
+
+        Parameters
+        ----------
+        run_parameters: dict
+            Parameters of the run
+        status: str, optional
+            Status of the runs. If None, runs with any status are considered
+
+        Returns
+        -------
+        bool
+        """
+        return self.index().has_configuration(self.approach_id, run_parameters, status)
+
+    def index(self):
+        """
+        Get the run index, indexing the runs of the approach if they are not indexed yet
+
+        Returns
+        -------
+        driftai.db.RunIndex
+        """
+        run_index = DatabaseInjector.run_index()
+        if not run_index.is_indexed(self.approach_id):
+            run_index.reindex(self.approach_id, self.all())
+        return run_index
+
+
+
+def get_field(record, field):
+    """Get a field of a record. Nested fields are separated by dots"""
+    value = record
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def project_records(records, fields):
+    """Extract the values of the fields of each record as a tuple"""
+    return [ tuple(get_field(r, f) for f in fields) for r in records ]
+
+
+def count_records(records, field):
+    """Count the records grouped by the value of a field"""
+    counts = {}
+    for r in records:
+        value = get_field(r, field)
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+    
+def append_runs(items):
+    """Appends new runs to an approach document updating its run counters"""
     def transform(doc):
-        items = doc[collection] 
-        for i in range(len(items)):
-            if items[i]["id"] == item["id"]:
-                items[i] = item
-                return
+        counters = RunCounters.from_approach_data(doc)
+        doc["runs"].extend(items)
+        for item in items:
+            counters.change(item["id"], None, item["status"])
+        doc["run_counters"] = counters.get_info()
+
     return transform
 
+
 # TODO: Global config
 _global_config = {
     'db': None,
+    'prediction_store': None,
+    'event_log': None,
+    'archive': None,
+    'run_index': None,
+    'run_queue': None,
     'project_path': '.'
 }
 
@@ -205,13 +763,74 @@ class DatabaseInjector(object):
         if not db:
             _global_config['db'] = Database(_global_config.get('project_path'))
         return  _global_config['db']
+
+    @staticmethod
+    def project_path():
+        """
+        Path of the project driftai is working on, see `set_project_path`
+        """
+        return _global_config.get('project_path')
+
+    @staticmethod
+    def prediction_store():
+        store = _global_config.get('prediction_store')
+        if not store:
+            _global_config['prediction_store'] = PredictionStore(
+                Path(_global_config.get('project_path'), "project_files", "predictions"))
+        return _global_config['prediction_store']
     
+    @staticmethod
+    def event_log():
+        log = _global_config.get('event_log')
+        if not log:
+            _global_config['event_log'] = RunEventLog(
+                Path(_global_config.get('project_path'), "project_files", "events"))
+        return _global_config['event_log']
+
+    @staticmethod
+    def archive():
+        archive = _global_config.get('archive')
+        if not archive:
+            _global_config['archive'] = ApproachArchive(
+                Path(_global_config.get('project_path'), "project_files", "archive"))
+        return _global_config['archive']
+
+    @staticmethod
+    def run_index():
+        run_index = _global_config.get('run_index')
+        if not run_index:
+            _global_config['run_index'] = RunIndex(
+                Path(_global_config.get('project_path'), "project_files", "run_index.sqlite"))
+        return _global_config['run_index']
+
+    @staticmethod
+    def run_queue():
+        run_queue = _global_config.get('run_queue')
+        if not run_queue:
+            _global_config['run_queue'] = RunQueue(
+                Path(_global_config.get('project_path'), "project_files", "run_queue.sqlite"))
+        return _global_config['run_queue']
+
     @staticmethod
     def reset(): 
         db = _global_config.get('db')
         if db:
             db.close()
             _global_config['db'] = None
+        _global_config['prediction_store'] = None
+        _global_config['archive'] = None
+        run_index = _global_config.get('run_index')
+        if run_index:
+            run_index.close()
+            _global_config['run_index'] = None
+        run_queue = _global_config.get('run_queue')
+        if run_queue:
+            run_queue.close()
+            _global_config['run_queue'] = None
+        log = _global_config.get('event_log')
+        if log:
+            log.close()
+            _global_config['event_log'] = None
     
 class Collections(object):
 
@@ -238,4 +857,21 @@ def set_project_path(path):
     path: str
         DriftAI's project path
     """
+    log = _global_config.get('event_log')
+    if log:
+        log.close()
+        _global_config['event_log'] = None
+
+    run_index = _global_config.get('run_index')
+    if run_index:
+        run_index.close()
+        _global_config['run_index'] = None
+
+    run_queue = _global_config.get('run_queue')
+    if run_queue:
+        run_queue.close()
+        _global_config['run_queue'] = None
+
     _global_config['project_path'] = path
+    _global_config['prediction_store'] = None
+    _global_config['archive'] = None
@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import socket
+import atexit
+import threading
+from pathlib import Path
+
+from tinydb import where
+
+from .lock import lock_file, unlock_file
+from .run_counters import RunCounters
+
+
+class RunEventLog(object):
+    """
+    Append-only log of run changes.
+
+    Every process appends its events to its own JSONL segment, so any number of
+    workers can record run changes without rewriting the database.
+    Events are buffered and written (and fsynced) in batches.
+    `RunEventLog.compact` folds the segments into the approaches table.
+
+    Events are ordered by a Lamport clock instead of their timestamps, which
+    depend on the clock of each host: a process always records its changes
+    after every event it has read, so an update of a run made after reading
+    the changes of other processes is applied after them.
+    """
+
+    SEGMENT_SUFFIX = ".jsonl"
+    COMPACTING_SUFFIX = ".compacting"
+
+    def __init__(self, path, batch_size=32):
+        """
+        Parameters
+        ----------
+        path: str
+            Directory containing the log segments
+        batch_size: int, optional
+            Number of events buffered before writing them to disk
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._buffer = []
+        self._seq = 0
+        # Lamport clock: greater than the clock of every event read or appended
+        self._clock = 0
+        self._pid = os.getpid()
+        # Threads of the process, such as lease heartbeats, share the buffer
+        self._lock = threading.RLock()
+        atexit.register(self.close)
+
+    @property
+    def segment_path(self):
+        """Segment where the current process appends its events"""
+        name = "{}-{}{}".format(socket.gethostname(), os.getpid(), self.SEGMENT_SUFFIX)
+        return Path(self.path, name)
+
+    def append(self, approach_id, op, run_info, previous_status=None):
+        """
+        Record a run change
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach containing the run
+        op: str
+            Kind of change: ``save`` for new runs, ``update`` for existing ones
+        run_info: dict
+            Run summary as returned by `Run.get_info`
+        previous_status: str, optional
+            Status of the run before the change
+        """
+        self._check_pid()
+        with self._lock:
+            self._clock += 1
+            self._buffer.append({
+                "approach_id": approach_id,
+                "op": op,
+                "run": run_info,
+                "from": previous_status,
+                "clock": self._clock,
+                "ts": time.time(),
+                "seq": self._seq
+            })
+            self._seq += 1
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the buffered events to the segment of the current process
+        """
+        self._check_pid()
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+            if not buffer:
+                return
+
+            try:
+                self.path.mkdir(exist_ok=True)
+                lines = "".join(json.dumps(e) + "\n" for e in buffer)
+                while not _append_to_segment(self.segment_path, lines):
+                    # The segment was taken by a compaction before locking it, retry on a new one
+                    pass
+            except BaseException:
+                # The events are written by the next flush
+                self._buffer = buffer + self._buffer
+                raise
+
+    def close(self):
+        """
+        Flush the buffered events if the project still exists
+        """
+        if self.path.parent.is_dir():
+            self.flush()
+
+    def events(self, approach_id=None):
+        """
+        Get the events which have not been compacted yet, in the order they happened
+
+        Parameters
+        ----------
+        approach_id: str, optional
+            If set only the events of this approach are returned
+
+        Returns
+        -------
+        list of dict
+        """
+        self._check_pid()
+        events = []
+        for segment in self._segments(self.SEGMENT_SUFFIX, self.COMPACTING_SUFFIX):
+            events.extend(_read_segment(segment))
+        with self._lock:
+            events.extend(self._buffer)
+            self._observe(events)
+
+        if approach_id is not None:
+            events = [e for e in events if e["approach_id"] == approach_id]
+        return sorted(events, key=_event_order)
+
+    def merge(self, approach_id, runs):
+        """
+        Apply the pending events of an approach to its stored runs
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach identifier
+        runs: list of dict
+            Runs stored in the database
+
+        Returns
+        -------
+        list of dict
+            Runs with the pending changes applied
+        """
+        events = self.events(approach_id)
+        if events:
+            apply_run_events(runs, events)
+        return runs
+
+    def compact(self, table, archive=None):
+        """
+        Fold the log into the approaches table and remove the folded segments
+
+        Parameters
+        ----------
+        table: tinydb.Table
+            Table containing the approaches
+        archive: ApproachArchive, optional
+            Archive of the archived approaches, whose run changes are folded into their archive file
+        """
+        self.flush()
+
+        # Renamed segments are not appended anymore, writers open a new segment
+        for segment in self._segments(self.SEGMENT_SUFFIX):
+            try:
+                os.replace(str(segment), str(segment) + self.COMPACTING_SUFFIX)
+            except FileNotFoundError:
+                pass
+
+        segments = self._segments(self.COMPACTING_SUFFIX)
+        events = []
+        for segment in segments:
+            # Wait for writers which opened the segment before it was renamed
+            events.extend(_read_segment(segment, lock=True))
+        self._observe(events)
+        events.sort(key=_event_order)
+
+        by_approach = {}
+        for e in events:
+            by_approach.setdefault(e["approach_id"], []).append(e)
+
+        for approach_id, approach_events in by_approach.items():
+            table.update(_fold_events(approach_events, archive), where("id") == approach_id)
+
+        for segment in segments:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _segments(self, *suffixes):
+        if not self.path.is_dir():
+            return []
+        return sorted(p for p in self.path.iterdir() if p.name.endswith(suffixes))
+
+    def _observe(self, events):
+        # Changes recorded from now on happen after the events read
+        self._clock = max([self._clock] + [ e.get("clock", 0) for e in events ])
+
+    def _check_pid(self):
+        # Events buffered by a parent process belong to the parent
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._buffer = []
+            # The lock may have been held by another thread of the parent
+            self._lock = threading.RLock()
+
+
+def _event_order(event):
+    # Concurrent events, with the same clock, are ordered by their timestamp.
+    # Events recorded before the clock existed have clock 0
+    return (event.get("clock", 0), event["ts"], event["seq"])
+
+
+def apply_run_events(runs, events, counters=None):
+    """
+    Apply run events, in order, to a list of runs
+
+    Parameters
+    ----------
+    runs: list of dict
+        Runs to be modified in place
+    events: list of dict
+        Events as recorded by `RunEventLog.append`
+    counters: RunCounters, optional
+        Counters to be updated with the status changes
+    """
+    positions = {r["id"]: i for i, r in enumerate(runs)}
+    for e in events:
+        run = e["run"]
+        i = positions.get(run["id"])
+        if e["op"] == "save" and i is None:
+            positions[run["id"]] = len(runs)
+            runs.append(run)
+            old_status = None
+        elif e["op"] == "update" and i is not None:
+            old_status = runs[i]["status"]
+            runs[i] = run
+        else:
+            continue
+
+        if counters is not None:
+            counters.change(run["id"], old_status, run["status"])
+
+
+def _fold_events(events, archive=None):
+    def transform(doc):
+        counters = RunCounters.from_approach_data(doc)
+        if doc.get("archive") and archive is not None:
+            # Runs of archived approaches are only stored in their archive file
+            runs = archive.read(doc["archive"])
+            apply_run_events(runs, events, counters)
+            doc["archive"] = archive.write(doc["id"], runs)
+        else:
+            apply_run_events(doc["runs"], events, counters)
+        doc["run_counters"] = counters.get_info()
+    return transform
+
+
+def _append_to_segment(segment, lines):
+    with segment.open("a") as f:
+        lock_file(f)
+        try:
+            # Segment may have been renamed while waiting for the lock
+            if not segment.exists() or os.fstat(f.fileno()).st_ino != segment.stat().st_ino:
+                return False
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            unlock_file(f)
+    return True
+
+
+def _read_segment(segment, lock=False):
+    events = []
+    try:
+        with segment.open() as f:
+            if lock:
+                lock_file(f, shared=True)
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # Last line may be incomplete while its writer is appending
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
@@ -0,0 +1,127 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+def lock_file(f, shared=False):
+    """
+    Acquire an advisory lock over an open file, blocking until it is available
+
+    Parameters
+    ----------
+    f: file object
+        Opened file
+    shared: bool, optional
+        If True a shared (read) lock is acquired, otherwise an exclusive one.
+        Platforms without shared locks always acquire an exclusive lock
+    """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(f):
+    """
+    Release the advisory lock acquired with `lock_file`
+
+    Parameters
+    ----------
+    f: file object
+        Opened file
+    """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ReadWriteLock(object):
+    """
+    Readers-writer lock shared by threads and processes.
+
+    Threads of the same process are coordinated with a condition variable and
+    processes with an advisory lock over `path`. The writer thread may re-enter
+    the lock, either for reading or writing.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            Lock file location
+        """
+        self.path = Path(path)
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._file = None
+
+    @contextmanager
+    def read(self):
+        """Hold the lock in shared mode"""
+        if self._writer == threading.get_ident():
+            with self.write():
+                yield
+            return
+
+        with self._cond:
+            while self._writer is not None:
+                self._cond.wait()
+            if self._readers == 0:
+                lock_file(self._open(), shared=True)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    unlock_file(self._file)
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock in exclusive mode"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                while self._writer is not None or self._readers > 0:
+                    self._cond.wait()
+                self._writer = me
+                lock_file(self._open())
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    unlock_file(self._file)
+                    self._writer = None
+                    self._cond.notify_all()
+
+    def close(self):
+        """Close the lock file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(str(self.path), "a+")
+        return self._file
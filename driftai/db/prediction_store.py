@@ -0,0 +1,152 @@
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .storage import replaced_file_mode
+
+
+class PredictionStore(object):
+    """
+    Content-addressed store for run predictions.
+
+    Predictions are written as ``.npy`` blobs named after the hash of their content,
+    so identical predictions are stored only once and the database only keeps the key.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            Directory where the prediction blobs are stored
+        """
+        self.path = Path(path)
+
+    def put(self, predictions):
+        """
+        Store an array of predictions
+
+        Parameters
+        ----------
+        predictions: list, np.array, pandas.Series
+            Labels predicted by an approach
+
+        Raises
+        ------
+        TypeError
+            If predictions cannot be represented as a typed array
+
+        Returns
+        -------
+        str
+            Key of the stored predictions
+        """
+        array = compact_array(predictions)
+        key = self._get_key(array)
+        blob_path = self._blob_path(key)
+
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Write to a temporary file and rename it, so concurrent writers
+            # never expose a half written blob
+            fd, tmp_path = tempfile.mkstemp(dir=str(blob_path.parent), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, array, allow_pickle=False)
+                os.chmod(tmp_path, replaced_file_mode(blob_path))
+                os.replace(tmp_path, str(blob_path))
+            except BaseException:
+                if Path(tmp_path).exists():
+                    os.remove(tmp_path)
+                raise
+        return key
+
+    def get(self, key, mmap=True):
+        """
+        Load stored predictions
+
+        Parameters
+        ----------
+        key: str
+            Key returned by `PredictionStore.put`
+        mmap: bool, optional
+            If True the blob is memory mapped instead of read into memory
+
+        Returns
+        -------
+        np.array
+        """
+        return np.load(str(self._blob_path(key)),
+                       mmap_mode="r" if mmap else None,
+                       allow_pickle=False)
+
+    def exists(self, key):
+        """
+        Checks if predictions with an specific key are stored
+
+        Parameters
+        ----------
+        key: str
+            Predictions key
+
+        Returns
+        -------
+        bool
+        """
+        return self._blob_path(key).exists()
+
+    def _blob_path(self, key):
+        # Shard blobs by the first characters of the key to keep directories small
+        return Path(self.path, key[:2], key + ".npy")
+
+    def _get_key(self, array):
+        h = hashlib.md5()
+        h.update(array.dtype.str.encode("utf-8"))
+        h.update(str(array.shape).encode("utf-8"))
+        h.update(np.ascontiguousarray(array).tobytes())
+        return h.hexdigest()
+
+
+def compact_array(values):
+    """
+    Converts values to the narrowest array type that represents them without loss
+
+    Parameters
+    ----------
+    values: list, np.array, pandas.Series
+        Values to be converted
+
+    Raises
+    ------
+    TypeError
+        If values cannot be represented as a typed array
+
+    Returns
+    -------
+    np.array
+    """
+    array = np.asarray(values)
+
+    if array.dtype == object:
+        raise TypeError("predictions of type object can not be stored as typed arrays")
+
+    if array.dtype.kind in "iu" and array.size > 0:
+        dtype = np.result_type(np.min_scalar_type(array.min()),
+                               np.min_scalar_type(array.max()))
+        return array.astype(dtype)
+
+    if array.dtype.kind == "f":
+        for dtype in (np.float16, np.float32):
+            if np.dtype(dtype).itemsize >= array.dtype.itemsize:
+                break
+            with np.errstate(over="ignore"):
+                narrowed = array.astype(dtype)
+            restored = narrowed.astype(array.dtype)
+            if np.all((restored == array) | (np.isnan(restored) & np.isnan(array))):
+                return narrowed
+
+    return array
@@ -0,0 +1,131 @@
+PENDING_STATUSES = ("waiting", "running")
+
+
+class RunCounters(object):
+    """
+    Number of runs of an approach by status and queue of its pending runs.
+
+    Counters are stored inside the approach document and changed on every run
+    state change, so they never require scanning the runs.
+    """
+
+    def __init__(self, counts=None, pending=None):
+        """
+        Parameters
+        ----------
+        counts: dict, optional
+            Number of runs for each status
+        pending: list of str, optional
+            Ids of the pending runs in execution order
+        """
+        self.counts = dict(counts or {})
+        # Dict keeps the insertion order and removes runs in constant time
+        self.pending = dict.fromkeys(pending or [])
+
+    @classmethod
+    def from_runs(cls, runs):
+        """
+        Compute the counters of a list of runs
+
+        Parameters
+        ----------
+        runs: list of dict
+            Runs summaries
+
+        Returns
+        -------
+        RunCounters
+        """
+        counters = cls()
+        for r in runs:
+            counters.change(r["id"], None, r["status"])
+        return counters
+
+    @classmethod
+    def from_approach_data(cls, data):
+        """
+        Get the counters stored in an approach document
+
+        Counters are computed from the runs if the document does not contain them
+
+        Parameters
+        ----------
+        data: dict
+            Approach document
+
+        Returns
+        -------
+        RunCounters
+        """
+        if data.get("run_counters") is None:
+            return cls.from_runs(data["runs"])
+        return cls(**data["run_counters"])
+
+    def change(self, run_id, old_status, new_status):
+        """
+        Register a run status change
+
+        Parameters
+        ----------
+        run_id: str
+            Run unique identifier
+        old_status: str
+            Status before the change. None for new runs
+        new_status: str
+            Status after the change
+        """
+        if old_status == new_status:
+            return
+
+        if old_status is not None:
+            self.counts[old_status] = self.counts.get(old_status, 0) - 1
+            if self.counts[old_status] <= 0:
+                del self.counts[old_status]
+        self.counts[new_status] = self.counts.get(new_status, 0) + 1
+
+        if new_status in PENDING_STATUSES:
+            self.pending[run_id] = None
+        else:
+            self.pending.pop(run_id, None)
+
+    def apply_event(self, event, statuses):
+        """
+        Register the status change recorded by a run event
+
+        The previous status is the current one of the run, not the status seen by
+        the process recording the event, so the counters are the same as the
+        ones computed when the events are compacted, see `apply_run_events`
+
+        Parameters
+        ----------
+        event: dict
+            Event as recorded by `RunEventLog.append`
+        statuses: dict
+            Current status of the runs changed by the events, by run id.
+            Updated with the new status of the run
+        """
+        run = event["run"]
+        if (event["op"] == "save") == (run["id"] in statuses):
+            # Saves of existing runs and updates of unknown runs are ignored
+            return
+        self.change(run["id"], statuses.get(run["id"]), run["status"])
+        statuses[run["id"]] = run["status"]
+
+    def get_info(self):
+        """
+        Get the counters summary
+
+        Returns
+        -------
+        dict
+            Dict containing the counters::
+
+            {
+                "counts": <number of runs for each status>,
+                "pending": <ids of pending runs>
+            }
+        """
+        return {
+            "counts": self.counts,
+            "pending": list(self.pending)
+        }
@@ -0,0 +1,356 @@
+import os
+import json
+import sqlite3
+import hashlib
+import numbers
+import threading
+from pathlib import Path
+
+# Increased when the schema changes, older index files are rebuilt
+_SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_approaches (
+    approach_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS runs (
+    approach_id TEXT,
+    run_id TEXT,
+    subdataset_set TEXT,
+    config_hash TEXT,
+    budget REAL,
+    run_parameters TEXT,
+    status TEXT,
+    lease TEXT,
+    time REAL,
+    finish_date TEXT,
+    PRIMARY KEY (approach_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (approach_id, config_hash);
+CREATE TABLE IF NOT EXISTS run_parameters (
+    approach_id TEXT,
+    run_id TEXT,
+    name TEXT,
+    type TEXT,
+    value,
+    PRIMARY KEY (approach_id, run_id, name)
+);
+CREATE INDEX IF NOT EXISTS run_parameters_value ON run_parameters (approach_id, name, type, value);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    approach_id TEXT,
+    run_id TEXT,
+    name TEXT,
+    value REAL,
+    PRIMARY KEY (approach_id, run_id, name)
+);
+CREATE INDEX IF NOT EXISTS run_metrics_value ON run_metrics (approach_id, name, value);
+"""
+
+
+class RunIndex(object):
+    """
+    Secondary indexes over the runs stored in driftai db.
+
+    Runs are indexed in a SQLite file by their parameters, their configuration and
+    their metric values, so runs can be queried without loading them.
+    The index is derived data and is rebuilt from driftai db when an approach is missing.
+
+    The index uses the default rollback journal: SQLite does not support WAL
+    mode on network filesystems. Projects shared through NFS need working
+    POSIX locks (``lockd``), otherwise concurrent writers may corrupt the file.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            SQLite file location
+        """
+        self.path = Path(path)
+        self._local = threading.local()
+        # Connections of every thread, closed by `close`
+        self._conns = []
+        self._conns_lock = threading.Lock()
+
+    def is_indexed(self, approach_id):
+        """
+        Check if the runs of an approach are indexed
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+
+        Returns
+        -------
+        bool
+        """
+        row = self._conn().execute(
+            "SELECT 1 FROM indexed_approaches WHERE approach_id = ?", (approach_id,)).fetchone()
+        return row is not None
+
+    def reindex(self, approach_id, runs):
+        """
+        Replace the indexed runs of an approach
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        runs: list of dict
+            Runs summaries as returned by `Run.get_info`
+        """
+        conn = self._conn()
+        with conn:
+            for table in ("runs", "run_parameters", "run_metrics"):
+                conn.execute("DELETE FROM {} WHERE approach_id = ?".format(table), (approach_id,))
+            self._insert(conn, approach_id, runs)
+            conn.execute("INSERT OR IGNORE INTO indexed_approaches VALUES (?)", (approach_id,))
+
+    def index(self, approach_id, runs):
+        """
+        Add or update runs of an approach
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        runs: list of dict
+            Runs summaries as returned by `Run.get_info`
+        """
+        conn = self._conn()
+        with conn:
+            self._insert(conn, approach_id, runs)
+
+    def where(self, approach_id, **parameters):
+        """
+        Get the runs whose parameters have the specified values
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        parameters: dict
+            Parameter names and values. For example: ``max_depth=5``
+
+        Returns
+        -------
+        list of str
+            Run ids
+        """
+        if not parameters:
+            rows = self._conn().execute(
+                "SELECT run_id FROM runs WHERE approach_id = ?", (approach_id,))
+            return [r[0] for r in rows]
+
+        # NULL is not equal to anything, IS also matches null values
+        conditions = " OR ".join(["(name = ? AND type = ? AND value IS ?)"] * len(parameters))
+        args = [approach_id]
+        for name, value in parameters.items():
+            args.append(name)
+            args.extend(_to_sql_value(value))
+        args.append(len(parameters))
+
+        rows = self._conn().execute(
+            "SELECT run_id FROM run_parameters WHERE approach_id = ? AND ({}) "
+            "GROUP BY run_id HAVING COUNT(*) = ?".format(conditions), args)
+        return [r[0] for r in rows]
+
+    def states(self, approach_id, run_ids):
+        """
+        Get the status and lease of runs
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        run_ids: list of str
+            Run ids
+
+        Returns
+        -------
+        dict
+            ``(status, lease)`` of the indexed runs by run id
+        """
+        run_ids = list(run_ids)
+        states = {}
+        # SQLite limits the number of variables of a statement
+        for i in range(0, len(run_ids), 500):
+            chunk = run_ids[i:i + 500]
+            rows = self._conn().execute(
+                "SELECT run_id, status, lease FROM runs WHERE approach_id = ? AND run_id IN ({})".format(
+                    ", ".join("?" * len(chunk))), [approach_id] + chunk)
+            for run_id, status, lease in rows:
+                states[run_id] = (status, json.loads(lease) if lease else None)
+        return states
+
+    def run_times(self, approach_id):
+        """
+        Get the fields of the runs needed to estimate the time left, see `estimate_eta`
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+
+        Returns
+        -------
+        list of dict
+            Runs summaries with their ``status``, ``run_parameters``, ``budget``,
+            ``finish_date`` and the ``time`` of their ``results``
+        """
+        rows = self._conn().execute(
+            "SELECT status, run_parameters, budget, finish_date, time FROM runs WHERE approach_id = ?",
+            (approach_id,))
+        return [ {"status": status, "run_parameters": json.loads(parameters), "budget": budget,
+                  "finish_date": finish_date, "results": {"time": time}}
+                 for status, parameters, budget, finish_date, time in rows ]
+
+    def top_k(self, approach_id, metric, k=1, ascending=False, n_sets=None):
+        """
+        Get the configurations with the best mean value of a metric over the
+        subdataset sets. Configurations which have not finished on every set are skipped
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        metric: str
+            Metric name. For example: ``accuracy``
+        k: int, optional
+            Number of configurations
+        ascending: bool, optional
+            If True lower values are better (for example errors)
+        n_sets: int, optional
+            Number of subdataset sets. By default the number of sets of the indexed runs
+
+        Returns
+        -------
+        list of tuple
+            ``(run_parameters, budget, mean metric value)`` of the best configurations, best first
+        """
+        if n_sets is None:
+            n_sets = self._conn().execute(
+                "SELECT COUNT(DISTINCT subdataset_set) FROM runs WHERE approach_id = ?", (approach_id,)).fetchone()[0]
+        rows = self._conn().execute(
+            "SELECT MIN(r.run_parameters), r.budget, AVG(m.value) AS mean FROM runs r "
+            "JOIN run_metrics m ON m.approach_id = r.approach_id AND m.run_id = r.run_id "
+            "WHERE r.approach_id = ? AND m.name = ? AND r.status = 'finished' "
+            "GROUP BY r.config_hash, r.budget HAVING COUNT(DISTINCT r.subdataset_set) = ? "
+            "ORDER BY mean {} LIMIT ?".format("ASC" if ascending else "DESC"),
+            (approach_id, metric, n_sets, k))
+        return [ (json.loads(parameters), budget, mean) for parameters, budget, mean in rows ]
+
+    def has_configuration(self, approach_id, run_parameters, status="finished"):
+        """
+        Check if a configuration of parameters has already been run
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        run_parameters: dict
+            Parameters of the run
+        status: str, optional
+            Status of the runs. If None, runs with any status are considered
+
+        Returns
+        -------
+        bool
+        """
+        query = "SELECT 1 FROM runs WHERE approach_id = ? AND config_hash = ?"
+        args = [approach_id, config_hash(run_parameters)]
+        if status is not None:
+            query += " AND status = ?"
+            args.append(status)
+        return self._conn().execute(query, args).fetchone() is not None
+
+    def close(self):
+        """Close the connections of every thread of the current process"""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for pid, conn in conns:
+            # Connections inherited from a parent process belong to the parent
+            if pid == os.getpid():
+                conn.close()
+        self._local = threading.local()
+
+    def _insert(self, conn, approach_id, runs):
+        for table in ("run_parameters", "run_metrics"):
+            conn.executemany(
+                "DELETE FROM {} WHERE approach_id = ? AND run_id = ?".format(table),
+                [(approach_id, r["id"]) for r in runs])
+        conn.executemany(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(approach_id, r["id"], r["subdataset_set"], config_hash(r["run_parameters"]), r.get("budget"),
+              json.dumps(r["run_parameters"], sort_keys=True, default=str), r["status"],
+              json.dumps(r["lease"]) if r.get("lease") else None, (r.get("results") or {}).get("time"),
+              r.get("finish_date"))
+             for r in runs])
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_parameters VALUES (?, ?, ?, ?, ?)",
+            [(approach_id, r["id"], name) + _to_sql_value(value)
+             for r in runs for name, value in r["run_parameters"].items()])
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_metrics VALUES (?, ?, ?, ?)",
+            [(approach_id, r["id"], name, value)
+             for r in runs for name, value in _get_metrics(r).items()
+             if isinstance(value, numbers.Real)])
+
+    def _conn(self):
+        # SQLite connections can not be shared by threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Closed from the thread calling `close`
+            conn = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+            # Indexes created in WAL mode are converted back
+            conn.execute("PRAGMA journal_mode=DELETE")
+            with conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                    # Index of an older version, its approaches are indexed again
+                    for table in ("indexed_approaches", "runs", "run_parameters", "run_metrics"):
+                        conn.execute("DROP TABLE IF EXISTS {}".format(table))
+                    conn.execute("PRAGMA user_version = {}".format(_SCHEMA_VERSION))
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._conns_lock:
+                self._conns.append((os.getpid(), conn))
+        return conn
+
+
+def config_hash(run_parameters):
+    """
+    Hash identifying a configuration of parameters
+
+    Parameters
+    ----------
+    run_parameters: dict
+        Parameters of a run
+
+    Returns
+    -------
+    str
+    """
+    pars = json.dumps(run_parameters, sort_keys=True, default=str)
+    return hashlib.md5(pars.encode('utf-8')).hexdigest()
+
+
+def _get_metrics(run):
+    results = run.get("results") or {}
+    return results.get("metrics") or {}
+
+
+def _to_sql_value(value):
+    # Type and value of a parameter. Booleans are not numbers: True and 1 are different values
+    if isinstance(value, bool):
+        return ("bool", int(value))
+    if value is None:
+        return ("null", None)
+    if isinstance(value, str):
+        return ("str", value)
+    if isinstance(value, numbers.Real):
+        return ("number", value)
+    return ("json", json.dumps(value, sort_keys=True, default=str))
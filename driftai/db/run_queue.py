@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    approach_id TEXT,
+    run_id TEXT,
+    module TEXT,
+    name TEXT,
+    subdataset_set TEXT,
+    run_parameters TEXT,
+    budget REAL,
+    status TEXT,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (approach_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, seq);
+CREATE INDEX IF NOT EXISTS tasks_approach ON tasks (approach_id, status);
+"""
+
+
+class RunQueue(object):
+    """
+    Durable queue of runs shared by a coordinator and any number of workers.
+
+    The queue is a SQLite file in the project directory, so workers in other
+    machines only need a shared filesystem. The coordinator puts runs, workers
+    lease them, execute them and report their results, which the coordinator
+    collects and stores in driftai db. Leases expire: runs leased by a worker
+    which stops renewing them are leased again by other workers.
+
+    Tasks go through the statuses ``queued``, ``leased``, ``done``, ``failed``
+    or ``timeout`` and ``collected`` once the coordinator has stored their result.
+
+    The queue uses the rollback journal: SQLite does not support WAL mode on
+    network filesystems, its shared memory index is local to each machine.
+    Leases rely on SQLite file locks, so NFS shares need working POSIX locks
+    (``lockd``, not mounted with ``nolock``), otherwise two workers may lease
+    the same run or corrupt the file.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            SQLite file location
+        """
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def put(self, approach_id, module, name, runs):
+        """
+        Queue runs of an approach. Runs already queued and not collected are skipped
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        module: str
+            Module of the runnable approach class
+        name: str
+            Name of the runnable approach class
+        runs: list of Run
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE approach_id = ? AND status = 'collected'", (approach_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (approach_id, run_id, module, name, subdataset_set, "
+                "run_parameters, budget, status) VALUES (?, ?, ?, ?, ?, ?, ?, 'queued')",
+                [ (approach_id, r.id, module, name, r.subdataset_set, json.dumps(r.run_parameters), r.budget)
+                  for r in runs ])
+
+    def lease(self, worker, lease_time):
+        """
+        Take the oldest queued run, or a run whose lease has expired
+
+        Parameters
+        ----------
+        worker: str
+            Worker unique identifier
+        lease_time: float
+            Seconds the run is reserved for the worker, see `renew`
+
+        Returns
+        -------
+        dict or None
+            Task with the keys ``approach_id``, ``run_id``, ``module``, ``name``,
+            ``subdataset_set``, ``run_parameters`` and ``budget``. None if the queue is empty
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT seq, approach_id, run_id, module, name, subdataset_set, run_parameters, budget "
+                "FROM tasks WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY seq LIMIT 1", (now,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ? WHERE seq = ?",
+                             (worker, now + lease_time, row[0]))
+
+        if row is None:
+            return None
+        keys = ["approach_id", "run_id", "module", "name", "subdataset_set", "run_parameters", "budget"]
+        task = dict(zip(keys, row[1:]))
+        task["run_parameters"] = json.loads(task["run_parameters"])
+        return task
+
+    def renew(self, approach_id, run_id, worker, lease_time):
+        """
+        Extend the lease of a run
+
+        Returns
+        -------
+        bool
+            False if the run is not leased by the worker anymore
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE approach_id = ? AND run_id = ? "
+                "AND status = 'leased' AND worker = ?", (time.time() + lease_time, approach_id, run_id, worker))
+        return cursor.rowcount > 0
+
+    def complete(self, approach_id, run_id, result):
+        """
+        Report the result of a run
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        run_id: str
+            Run unique identifier
+        result: dict
+            Result summary as returned by `Result.get_info`
+        """
+        self._finish(approach_id, run_id, "done", result=json.dumps(result))
+
+    def fail(self, approach_id, run_id, error):
+        """
+        Report that a run has raised an exception
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        run_id: str
+            Run unique identifier
+        error: str
+            Description of the error
+        """
+        self._finish(approach_id, run_id, "failed", error=error)
+
+    def time_out(self, approach_id, run_id, error):
+        """
+        Report that a run has been killed for exceeding its time limit
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        run_id: str
+            Run unique identifier
+        error: str
+            Description of the exceeded limit
+        """
+        self._finish(approach_id, run_id, "timeout", error=error)
+
+    def collect(self, approach_id):
+        """
+        Get the reported runs of an approach which have not been collected yet
+        and mark them as collected
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+
+        Returns
+        -------
+        list of dict
+            Tasks with the keys ``run_id``, ``status``, ``result`` and ``error``
+        """
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT seq, run_id, status, result, error FROM tasks "
+                "WHERE approach_id = ? AND status IN ('done', 'failed', 'timeout') ORDER BY seq",
+                (approach_id,)).fetchall()
+            conn.executemany("UPDATE tasks SET status = 'collected' WHERE seq = ?", [ (r[0],) for r in rows ])
+        return [ {"run_id": run_id, "status": status,
+                  "result": json.loads(result) if result else None, "error": error}
+                 for _, run_id, status, result, error in rows ]
+
+    def clear(self, approach_id):
+        """
+        Remove all the runs of an approach from the queue
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE approach_id = ?", (approach_id,))
+
+    def count_by_status(self, approach_id=None):
+        """
+        Count the runs in the queue by status
+
+        Parameters
+        ----------
+        approach_id: str, optional
+            Approach unique identifier. By default all the runs are counted
+
+        Returns
+        -------
+        dict
+            Number of runs by status
+        """
+        query, args = "SELECT status, COUNT(*) FROM tasks", ()
+        if approach_id is not None:
+            query, args = query + " WHERE approach_id = ?", (approach_id,)
+        return dict(self._conn().execute(query + " GROUP BY status", args).fetchall())
+
+    def count_leased(self, approach_id):
+        """
+        Count the runs of an approach being executed, leased by a worker
+        which keeps renewing its lease
+
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+
+        Returns
+        -------
+        int
+        """
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM tasks WHERE approach_id = ? AND status = 'leased' AND lease_expires >= ?",
+            (approach_id, time.time())).fetchone()[0]
+
+    def close(self):
+        """
+        Close the connection of the calling thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def _finish(self, approach_id, run_id, status, result=None, error=None):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, lease_expires = NULL "
+                "WHERE approach_id = ? AND run_id = ? AND status IN ('queued', 'leased')",
+                (status, result, error, approach_id, run_id))
+
+    @contextmanager
+    def _transaction(self):
+        # The write lock is taken before reading, so two workers never lease the same run
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _conn(self):
+        # SQLite connections can not be shared by threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            # Queues created in WAL mode are converted back
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,83 @@
+import os
+import json
+import tempfile
+from pathlib import Path
+
+from tinydb.storages import Storage
+
+# os.umask is the only way to read the umask and it sets a new one, so it is
+# read once on import instead of racing with the threads creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class SnapshotStorage(Storage):
+    """
+    TinyDB storage writing every new version of the database to a temporary
+    file which atomically replaces the previous one.
+
+    Each write creates a new generation of the database file, so readers always
+    open a complete snapshot and never need to lock it: a reader keeps reading
+    the generation it opened even if a writer replaces it meanwhile.
+    """
+
+    def __init__(self, path, **kwargs):
+        """
+        Parameters
+        ----------
+        path: str
+            Database file location
+        kwargs: dict
+            Arguments passed to `json.dump`
+        """
+        super().__init__()
+        self.path = Path(path)
+        self.kwargs = kwargs
+        # Create the database file as TinyDB does, failing if its directory does not exist
+        open(str(self.path), "a").close()
+
+    def read(self):
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        # Empty databases are initialized by TinyDB
+        return json.loads(content) if content else None
+
+    def write(self, data):
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, **self.kwargs)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, replaced_file_mode(self.path))
+            os.replace(tmp_path, str(self.path))
+        except BaseException:
+            if Path(tmp_path).exists():
+                os.remove(tmp_path)
+            raise
+
+    def close(self):
+        pass
+
+
+def replaced_file_mode(path):
+    """
+    Permissions of a file written to a temporary file and renamed to `path`.
+    Temporary files are only readable by their owner, so they get the mode of
+    the file they replace, or the mode of a new file when there is none
+
+    Parameters
+    ----------
+    path: str or Path
+
+    Returns
+    -------
+    int
+    """
+    try:
+        return os.stat(str(path)).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
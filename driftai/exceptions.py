@@ -95,3 +95,19 @@ class OptAppInstanceExistsException(Exception):
 class OptAppInvalidStructureException(Exception):
     def __init___(self):
         Exception.__init__(self, "Invalid instance database structure")
+
+
+class OptAppRunTimeoutException(Exception):
+    def __init__(self, limit, seconds):
+        Exception.__init__(
+            self, "Run exceeded its {} time limit of {} seconds".format(limit, seconds))
+        self.limit = limit
+        self.seconds = seconds
+
+
+class OptAppRunnerStalledException(Exception):
+    def __init__(self, seconds, n_runs):
+        Exception.__init__(
+            self, "No worker has executed runs for {} seconds, {} runs left".format(seconds, n_runs))
+        self.seconds = seconds
+        self.n_runs = n_runs
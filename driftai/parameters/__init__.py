@@ -1,7 +1,11 @@
-from .parameters import CategoricalParameter, IntParameter, FloatParameter, BoolParameter
+from .parameters import CategoricalParameter, IntParameter, FloatParameter, BoolParameter, \
+                        UniformParameter, LogUniformParameter
 from .parameter_grid import ParameterGrid
+from .samplers import RandomSampler, LatinHypercubeSampler, SobolSampler
 
 __all__ = [ 
     "CategoricalParameter", "IntParameter", "FloatParameter", "BoolParameter",
-    "ParameterGrid"
+    "UniformParameter", "LogUniformParameter",
+    "ParameterGrid",
+    "RandomSampler", "LatinHypercubeSampler", "SobolSampler"
 ]
\ No newline at end of file
@@ -3,6 +3,16 @@ import itertools
 class ParameterGrid(object):
     """
     Responsible of generating the parameter grid.
+
+    The grid is lazy: combinations are never materialized, the i-th combination
+    is decoded from its index. It can be used as a sequence of dicts::
+
+        grid = ParameterGrid(parameters)
+        len(grid)   # Number of combinations
+        grid[10]    # {"tol": 0.5, "C": 1.0}
+        grid[:5]    # First 5 combinations
+
+    Combinations follow the order of `itertools.product`: the last parameter varies fastest.
     """
 
     def __init__(self, parameters):
@@ -13,6 +23,8 @@ class ParameterGrid(object):
         """
         self.parameters = parameters
         self.parameter_vector = self._generate_parvect()
+        self._keys = list(self.parameter_vector.keys())
+        self._vectors = list(self.parameter_vector.values())
 
     def _generate_parvect(self):
         """
@@ -27,7 +39,7 @@ class ParameterGrid(object):
     def generate_combs(self):
         """
         Generate all possible combinations with parameters specified at the constructor
-        
+
         Returns
         -------
         tuple(list(string), list(any))
@@ -52,3 +64,59 @@ class ParameterGrid(object):
             Number of possible values of the parameter named <param>
         """
         return len(self.parameter_vector[param])
+
+    def extend(self, parameters):
+        """
+        Create a grid with more parameters
+
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+
+        Returns
+        -------
+        ParameterGrid
+        """
+        return ParameterGrid(self.parameters + parameters)
+
+    def __len__(self):
+        n_combs = 1
+        for vector in self._vectors:
+            n_combs *= len(vector)
+        return n_combs
+
+    def __getitem__(self, index):
+        """
+        Get a combination or a list of combinations
+
+        Parameters
+        ----------
+        index: int or slice
+            Position of the combination in the grid
+
+        Returns
+        -------
+        dict or list of dict
+            Parameter values of the combination by parameter name
+        """
+        n_combs = len(self)
+        if isinstance(index, slice):
+            return [ self._decode(i) for i in range(*index.indices(n_combs)) ]
+
+        if index < 0:
+            index += n_combs
+        if not 0 <= index < n_combs:
+            raise IndexError("parameter grid index out of range")
+        return self._decode(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def _decode(self, index):
+        # Mixed radix decoding, each parameter is a digit whose base is its number of values
+        values = [None] * len(self._vectors)
+        for i in reversed(range(len(self._vectors))):
+            index, digit = divmod(index, len(self._vectors[i]))
+            values[i] = self._vectors[i][digit]
+        return dict(zip(self._keys, values))
@@ -20,6 +20,42 @@ class AbstractParameter(ABC):
         """
         pass
 
+    def from_unit(self, u):
+        """
+        Map a point of the unit interval to a value of the parameter.
+        Used by the samplers, which draw points from the unit hypercube
+
+        Parameters
+        ----------
+        u: float
+            Value in [0, 1)
+
+        Returns
+        -------
+        any
+            Parameter value. By default one of the possible values, all of them equally likely
+        """
+        values = self.generate_vector()
+        return values[min(int(u * len(values)), len(values) - 1)]
+
+    def to_unit(self, value):
+        """
+        Map a value of the parameter to the unit interval, inverse of `from_unit`.
+        Used by the adaptive searches to model the configurations
+
+        Parameters
+        ----------
+        value: any
+            Parameter value
+
+        Returns
+        -------
+        float
+            Value in [0, 1). By default the center of the value's interval
+        """
+        values = self.generate_vector()
+        return (values.index(value) + 0.5) / len(values)
+
 class IntParameter(AbstractParameter):
     """
     Represents an Integer parameter
@@ -107,4 +143,82 @@ class BoolParameter(AbstractParameter):
         """
         Return the 2 only possible values for bool
         """
-        return [True, False]
\ No newline at end of file
+        return [True, False]
+
+class UniformParameter(AbstractParameter):
+    """
+    Represents a parameter uniformly distributed in an interval
+    """
+    def __init__(self, name, low, high, integer=False, partitions=10):
+        """
+        Parameters
+        ----------
+        name: str
+            Parameter name
+        low: float
+            Start of interval
+        high: float
+            End of interval
+        integer: bool, optional
+            If True values are rounded to integers
+        partitions: int, optional
+            Number of values used when the parameter is part of a `ParameterGrid`
+        """
+        super().__init__(name)
+        self.low = low
+        self.high = high
+        self.integer = integer
+        self.partitions = partitions
+
+    def generate_vector(self):
+        """
+        Return evenly spaced numbers over the interval
+        """
+        return self._values(np.linspace(0, 1, self.partitions))
+
+    def from_unit(self, u):
+        return self._values(np.array([u]))[0]
+
+    def to_unit(self, value):
+        return (value - self.low) / (self.high - self.low)
+
+    def _values(self, u):
+        values = self.low + u * (self.high - self.low)
+        return self._cast(values)
+
+    def _cast(self, values):
+        if self.integer:
+            return np.round(values).astype(int).tolist()
+        return values.astype(float).tolist()
+
+class LogUniformParameter(UniformParameter):
+    """
+    Represents a parameter whose logarithm is uniformly distributed in an interval.
+    Suited for scale parameters such as learning rates or regularization strengths
+    """
+    def __init__(self, name, low, high, integer=False, partitions=10):
+        """
+        Parameters
+        ----------
+        name: str
+            Parameter name
+        low: float
+            Start of interval, greater than 0
+        high: float
+            End of interval
+        integer: bool, optional
+            If True values are rounded to integers
+        partitions: int, optional
+            Number of values used when the parameter is part of a `ParameterGrid`
+        """
+        if low <= 0 or high <= 0:
+            raise ValueError("LogUniformParameter interval must be positive")
+        super().__init__(name, low, high, integer, partitions)
+
+    def _values(self, u):
+        log_low, log_high = np.log(self.low), np.log(self.high)
+        return self._cast(np.exp(log_low + u * (log_high - log_low)))
+
+    def to_unit(self, value):
+        log_low, log_high = np.log(self.low), np.log(self.high)
+        return float((np.log(value) - log_low) / (log_high - log_low))
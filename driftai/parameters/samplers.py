@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class AbstractSampler(ABC):
+    """
+    Search space drawing a fixed number of configurations from the parameters.
+
+    Each configuration is a point of the unit hypercube, with one dimension per
+    parameter, mapped to parameter values with `AbstractParameter.from_unit`.
+    As `ParameterGrid`, samplers are sequences of dicts::
+
+        sampler = SobolSampler(parameters, n_samples=64, seed=0)
+        len(sampler)    # 64
+        sampler[10]     # {"tol": 0.013, "C": 2.4}
+    """
+
+    def __init__(self, parameters, n_samples, seed=None):
+        """
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+        n_samples: int
+            Number of configurations, the run budget of the search
+        seed: int, optional
+            Seed of the random generator. Samples are reproducible if it is set
+        """
+        self.parameters = parameters
+        self.n_samples = n_samples
+        self.seed = seed
+        self._points = None
+
+    @abstractmethod
+    def generate_points(self, random_state):
+        """
+        Draw the configurations as points of the unit hypercube
+
+        Parameters
+        ----------
+        random_state: np.random.RandomState
+
+        Returns
+        -------
+        np.array of shape (n_samples, n_parameters)
+            Points with coordinates in [0, 1)
+        """
+        pass
+
+    @property
+    def points(self):
+        """Configurations as points of the unit hypercube"""
+        if self._points is None:
+            self._points = self.generate_points(np.random.RandomState(self.seed))
+        return self._points
+
+    def extend(self, parameters):
+        """
+        Create the same sampler with more parameters
+
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+
+        Returns
+        -------
+        AbstractSampler
+        """
+        return self.__class__(self.parameters + parameters, self.n_samples, self.seed)
+
+    def __len__(self):
+        return self.n_samples
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ self._decode(i) for i in range(*index.indices(len(self))) ]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sampler index out of range")
+        return self._decode(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def _decode(self, index):
+        point = self.points[index]
+        return dict([(param.name, param.from_unit(u)) for param, u in zip(self.parameters, point)])
+
+
+class RandomSampler(AbstractSampler):
+    """
+    Draws independent and uniformly distributed configurations
+    """
+
+    def generate_points(self, random_state):
+        return random_state.random_sample((self.n_samples, len(self.parameters)))
+
+
+class LatinHypercubeSampler(AbstractSampler):
+    """
+    Draws configurations with a Latin hypercube design: the range of every
+    parameter is split in `n_samples` strata and each stratum is sampled once
+    """
+
+    def generate_points(self, random_state):
+        n, d = self.n_samples, len(self.parameters)
+        strata = np.stack([random_state.permutation(n) for _ in range(d)], axis=1) if d else np.zeros((n, 0))
+        return (strata + random_state.random_sample((n, d))) / n
+
+
+class SobolSampler(AbstractSampler):
+    """
+    Draws configurations from a scrambled Sobol sequence.
+
+    Sobol sequences are low discrepancy: their points fill the space more evenly
+    than random ones. Balance properties are best when `n_samples` is a power of 2.
+    Scrambling (random linear matrix scrambling and digital shift) keeps these
+    properties while making the points random. Up to 21 parameters are supported
+    """
+
+    def generate_points(self, random_state):
+        d = len(self.parameters)
+        if d > len(_SOBOL_DIRECTIONS) + 1:
+            raise ValueError("SobolSampler supports up to {} parameters".format(len(_SOBOL_DIRECTIONS) + 1))
+
+        directions = [ _scramble(v, random_state) for v in _direction_numbers(d) ]
+        shifts = [ int(random_state.randint(0, 2 ** 16)) << 16 | int(random_state.randint(0, 2 ** 16))
+                   for _ in range(d) ]
+
+        points = np.zeros((self.n_samples, d))
+        x = [0] * d
+        for i in range(self.n_samples):
+            for j in range(d):
+                points[i, j] = (x[j] ^ shifts[j]) / 2.0 ** _SOBOL_BITS
+            # Gray code order: next point flips the direction of the lowest zero bit of i
+            c = _lowest_zero_bit(i)
+            x = [ x[j] ^ directions[j][c] for j in range(d) ]
+        return points
+
+
+_SOBOL_BITS = 32
+
+# Primitive polynomials (degree, coefficients) and initial direction numbers
+# of dimensions 2 to 21, from Joe and Kuo (new-joe-kuo-6.21201)
+_SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+
+
+def _direction_numbers(d):
+    # Direction numbers of the first d dimensions, as 32 bits integers
+    directions = []
+    for j in range(d):
+        if j == 0:
+            v = [ 1 << (_SOBOL_BITS - k) for k in range(1, _SOBOL_BITS + 1) ]
+        else:
+            s, a, m = _SOBOL_DIRECTIONS[j - 1]
+            v = [ m[k - 1] << (_SOBOL_BITS - k) for k in range(1, s + 1) ]
+            for k in range(s, _SOBOL_BITS):
+                value = v[k - s] ^ (v[k - s] >> s)
+                for i in range(1, s):
+                    value ^= ((a >> (s - 1 - i)) & 1) * v[k - i]
+                v.append(value)
+        directions.append(v)
+    return directions
+
+
+def _scramble(v, random_state):
+    # Multiplies the generator matrix by a random lower triangular matrix with unit diagonal
+    rows = []
+    for p in range(_SOBOL_BITS):
+        bit = 1 << (_SOBOL_BITS - 1 - p)
+        above = int(random_state.randint(0, 2 ** 16)) << 16 | int(random_state.randint(0, 2 ** 16))
+        rows.append(bit | (above & ~(2 * bit - 1) & (2 ** _SOBOL_BITS - 1)))
+
+    scrambled = []
+    for value in v:
+        new_value = 0
+        for p, row in enumerate(rows):
+            if bin(value & row).count("1") & 1:
+                new_value |= 1 << (_SOBOL_BITS - 1 - p)
+        scrambled.append(new_value)
+    return scrambled
+
+
+def _lowest_zero_bit(i):
+    c = 0
+    while i & 1:
+        i >>= 1
+        c += 1
+    return c
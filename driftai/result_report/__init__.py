@@ -6,5 +6,5 @@ __all__ = ["Result", "ResultReport",
             "recall", "precision", "f1", "accuracy", 
             "mae", "mse", "rmse",
             "multiclass_recall", "multiclass_precision", "multiclass_f1",
-            "str_to_metric_fn"]
+            "compute_metrics", "str_to_metric_fn"]
             
\ No newline at end of file
@@ -264,6 +264,34 @@ def rmse(y_true, y_pred):
     """
     return sqrt(skmetrics.mean_squared_error(y_true, y_pred))
 
+def compute_metrics(metrics, y_true, y_pred):
+    """
+    Compute a list of metrics, converting their values to serializable types
+
+    Parameters
+    ----------
+    metrics: list of callable
+        Metric functions. For example: ``[accuracy, f1]``
+    y_true: array-like of shape = (n_samples) or (n_samples, n_outputs)
+        True labels comming from the evaluation set
+    y_pred: array-like of shape = (n_samples) or (n_samples, n_outputs)
+        Labels predicted by your model
+
+    Returns
+    -------
+    dict
+        Metric values by metric function name
+    """
+    values = {}
+    for metric in metrics:
+        value = metric(y_true, y_pred)
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        values[metric.__name__] = value
+    return values
+
 str_to_metric_fn = {
     'recall': recall,
     'precision': precision,
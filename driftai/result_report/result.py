@@ -1,13 +1,17 @@
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
 from driftai.utils import str_to_date
 
 class Result(object):
     """
     Object responsible of containing the results obtained by an specific run
     """
-    def __init__(self, time, result=None, date=datetime.now()):
+    def __init__(self, time, result=None, date=datetime.now(), predictions=None, metrics=None,
+                 load_time=None, learn_time=None, inference_time=None, cpu_time=None,
+                 peak_rss=None, peak_memory=None):
         """
         Parameters
         ----------
@@ -19,10 +23,87 @@ class Result(object):
             This Run that has generated the results
         date: datetime, str, optional
             Creation date. Should not be set manually
+        predictions: str, optional
+            Key of the predictions inside the project's prediction store.
+            If set, `result` is loaded lazily from the store
+        metrics: dict, optional
+            Metric values computed when the run finished, by metric name
+        load_time: float, optional
+            Seconds spent reading the train and test data
+        learn_time: float, optional
+            Seconds spent in `RunnableApproach.learn`
+        inference_time: float, optional
+            Seconds spent in `RunnableApproach.inference`
+        cpu_time: float, optional
+            CPU seconds used by the run. None for runs executed in a thread
+            before Python 3.7, which can not measure the CPU time of a thread
+        peak_rss: int, optional
+            Peak resident memory in bytes of the process executing the run.
+            Only measured for runs executed alone in a child process, that is,
+            runs with time limits. None for runs sharing their process with
+            other runs, as the peak covers the whole life of the process
+        peak_memory: int, optional
+            Peak memory in bytes allocated by the run, traced with `tracemalloc`.
+            None if it was not tracing or before Python 3.9
         """
         self.date = str_to_date(date)
         self.time = time
-        self.result = result
+        self.predictions = predictions
+        self.metrics = metrics or {}
+        self.load_time = load_time
+        self.learn_time = learn_time
+        self.inference_time = inference_time
+        self.cpu_time = cpu_time
+        self.peak_rss = peak_rss
+        self.peak_memory = peak_memory
+        self._result = result
+
+    def store_predictions(self):
+        """
+        Moves the inline predictions to the project's prediction store.
+        For example, predictions computed in a machine without access to the project
+
+        Predictions that can not be represented as a typed array are kept inline
+
+        Returns
+        -------
+        driftai.Result
+            The result itself
+        """
+        from driftai.db import DatabaseInjector
+
+        if self.predictions is not None or self._result is None:
+            return self
+        try:
+            self.predictions = DatabaseInjector.prediction_store().put(self._result)
+        except TypeError:
+            # Convert predictions to python list in order to serialize them
+            if isinstance(self._result, np.ndarray):
+                self._result = self._result.tolist()
+            return self
+        # Loaded lazily from the store
+        self._result = None
+        return self
+
+    @property
+    def result(self):
+        """
+        Get the predicted labels
+
+        Returns
+        -------
+        list or np.array
+            Predictions stored in the prediction store are memory mapped
+        """
+        if self._result is None and self.predictions is not None:
+            from driftai.db import DatabaseInjector
+            self._result = DatabaseInjector.prediction_store().get(self.predictions)
+        return self._result
+
+    @result.setter
+    def result(self, result):
+        self._result = result
+        self.predictions = None
 
     def get_info(self):
         """
@@ -36,11 +117,27 @@ class Result(object):
             {
                 "date": <creation_date>,
                 "time": timem
-                "result": dict containing the metrics and its value
+                "result": predictions if they are not in the prediction store,
+                "predictions": key of the predictions inside the prediction store,
+                "metrics": metric values by metric name,
+                "load_time": seconds reading the data,
+                "learn_time": seconds learning the model,
+                "inference_time": seconds predicting,
+                "cpu_time": CPU seconds,
+                "peak_rss": peak resident memory in bytes,
+                "peak_memory": peak memory allocated in bytes
             }
         """
         return {
             "date": str(self.date),
             "time": self.time,
-            "result": self.result
-        }
\ No newline at end of file
+            "result": self._result if self.predictions is None else None,
+            "predictions": self.predictions,
+            "metrics": self.metrics,
+            "load_time": self.load_time,
+            "learn_time": self.learn_time,
+            "inference_time": self.inference_time,
+            "cpu_time": self.cpu_time,
+            "peak_rss": self.peak_rss,
+            "peak_memory": self.peak_memory
+        }
@@ -7,6 +7,9 @@ import pandas as pd
 from driftai.data import SubDataset
 from .metrics import recall, precision, f1
 
+# Times and memory usage of the runs, as stored by `Result`
+MEASURES = ["time", "load_time", "learn_time", "inference_time", "cpu_time", "peak_rss", "peak_memory"]
+
 class ResultReport(object):
 
     def __init__(self, approach, metrics):
@@ -29,11 +32,15 @@ class ResultReport(object):
         subdataset = self.approach.subdataset
 
         for run in self.approach.runs:
+            if run.results is None:
+                # Failed, timed out or pending runs
+                continue
             eval_results.append({
                 **run.run_parameters,
                 "subdataset_set": run.subdataset_set,
                 "y_true": subdataset.get_test_labels(run.subdataset_set),
-                "y_pred": run.results.result
+                "y_pred": run.results.result,
+                **dict((m, getattr(run.results, m)) for m in MEASURES)
             })
         return eval_results
 
@@ -50,10 +57,12 @@ class ResultReport(object):
 
     def as_dataframe(self):
         """
-        Return the evaluations as pandas DataFrame
+        Return the evaluations as pandas DataFrame, with a column for each
+        measure of the runs, see `MEASURES`
 
         Returns
         -------
         pandas.DataFrame
         """
+        # Predictions loaded from the prediction store stay memory mapped
         return pd.DataFrame(self.evaluation)
@@ -1,10 +1,17 @@
-from .runner import SingleRunner, DaskRunner, CloudRunner
-from .run_manage import RunPool, RunGenerator, ParameterGrid
+from .runner import SingleRunner, PoolRunner, ProcessPoolRunner, ThreadPoolRunner, DaskRunner, CloudRunner
+from .run_manage import RunPool, RunGenerator, LazyRuns, ParameterGrid
 from .runs import Run
-from .decorators import single_run
+from .scheduler import CostModel, estimate_eta
+from .retry import RetryPolicy
+from .worker import Worker
+from .shards import ShardRunner, parse_shard, merge_shards
+from .search import Trial, AbstractSearch, ModelBasedSearch, GPSearch, TPESearch, Hyperband, SuccessiveHalving, FoldRacing, GridRefinement
+from .decorators import single_run, process_pool_run, thread_pool_run, dask_run, cloud_run
 __all__ = [ 
-    "SingleRunner", "DaskRunner", "CloudRunner",
-    "RunPool", "RunGenerator", "ParameterGrid",
-    "Run",
-    "single_run"
+    "SingleRunner", "PoolRunner", "ProcessPoolRunner", "ThreadPoolRunner", "DaskRunner", "CloudRunner",
+    "RunPool", "RunGenerator", "LazyRuns", "ParameterGrid",
+    "Run", "CostModel", "estimate_eta", "RetryPolicy", "Worker", "ShardRunner", "parse_shard", "merge_shards",
+    "Trial", "AbstractSearch", "ModelBasedSearch", "GPSearch", "TPESearch",
+    "Hyperband", "SuccessiveHalving", "FoldRacing", "GridRefinement",
+    "single_run", "process_pool_run", "thread_pool_run", "dask_run", "cloud_run"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 import functools
-from .runner import SingleRunner
+from .runner import SingleRunner, ProcessPoolRunner, ThreadPoolRunner, DaskRunner, CloudRunner
 
 def single_run(cls):
     """
@@ -8,4 +8,91 @@ def single_run(cls):
     @functools.wraps(cls)
     def wrapper_single_run(*args, **kwargs):
         return cls(runner=SingleRunner(), **kwargs)
-    return wrapper_single_run
\ No newline at end of file
+    return wrapper_single_run
+
+def process_pool_run(n_jobs=None, max_tasks_per_worker=None, timeout=None, cpu_timeout=None, retry=None):
+    """
+    Injects a ProcessPoolRunner to a RunnableApproach class
+
+    Parameters
+    ----------
+    n_jobs: int, optional
+        Number of worker processes. By default the number of CPUs
+    max_tasks_per_worker: int, optional
+        Number of runs executed by a worker before it is replaced by a new one
+    timeout: float, optional
+        Wall clock time limit of each run in seconds
+    cpu_timeout: float, optional
+        CPU time limit of each run in seconds
+    retry: RetryPolicy, optional
+        Policy executing again the runs failing with transient errors
+    """
+    def decorator(cls):
+        @functools.wraps(cls)
+        def wrapper_process_pool_run(*args, **kwargs):
+            return cls(runner=ProcessPoolRunner(n_jobs, max_tasks_per_worker, timeout, cpu_timeout, retry), **kwargs)
+        return wrapper_process_pool_run
+    return decorator
+
+def thread_pool_run(n_jobs=None, timeout=None, cpu_timeout=None, retry=None):
+    """
+    Injects a ThreadPoolRunner to a RunnableApproach class
+
+    Parameters
+    ----------
+    n_jobs: int, optional
+        Number of threads. By default the number of CPUs
+    timeout: float, optional
+        Wall clock time limit of each run in seconds
+    cpu_timeout: float, optional
+        CPU time limit of each run in seconds
+    retry: RetryPolicy, optional
+        Policy executing again the runs failing with transient errors
+    """
+    def decorator(cls):
+        @functools.wraps(cls)
+        def wrapper_thread_pool_run(*args, **kwargs):
+            return cls(runner=ThreadPoolRunner(n_jobs, timeout, cpu_timeout, retry), **kwargs)
+        return wrapper_thread_pool_run
+    return decorator
+
+def dask_run(address=None, n_workers=None, retry=None, **cluster_kwargs):
+    """
+    Injects a DaskRunner to a RunnableApproach class
+
+    Parameters
+    ----------
+    address: str, optional
+        Address of the scheduler of the cluster. By default a local cluster is started
+    n_workers: int, optional
+        Number of workers of the local cluster
+    retry: RetryPolicy, optional
+        Policy executing again the runs failing with transient errors
+    cluster_kwargs: dict
+        Arguments passed to `LocalCluster`
+    """
+    def decorator(cls):
+        @functools.wraps(cls)
+        def wrapper_dask_run(*args, **kwargs):
+            return cls(runner=DaskRunner(address, n_workers, retry, **cluster_kwargs), **kwargs)
+        return wrapper_dask_run
+    return decorator
+
+def cloud_run(poll_interval=1.0, stall_timeout=600):
+    """
+    Injects a CloudRunner to a RunnableApproach class. Start ``driftai worker``
+    processes to execute the runs
+
+    Parameters
+    ----------
+    poll_interval: float, optional
+        Seconds between checks of the results reported by the workers
+    stall_timeout: float, optional
+        Seconds waited without any run executed by a worker. None to wait forever
+    """
+    def decorator(cls):
+        @functools.wraps(cls)
+        def wrapper_cloud_run(*args, **kwargs):
+            return cls(runner=CloudRunner(poll_interval, stall_timeout), **kwargs)
+        return wrapper_cloud_run
+    return decorator
@@ -0,0 +1,92 @@
+import time
+
+from driftai.exceptions import OptAppRunTimeoutException
+
+
+class RetryPolicy(object):
+    """
+    Executes runs again when they fail with a transient error, such as a lost
+    connection to a remote data source, waiting longer before each new attempt.
+
+    Runs failing with other errors, or exceeding their time limits, are not retried.
+    """
+
+    def __init__(self, max_retries=3, backoff=1.0, factor=2.0, max_backoff=60.0, errors=(ConnectionError, TimeoutError, OSError)):
+        """
+        Parameters
+        ----------
+        max_retries: int, optional
+            Number of times a failed run is executed again
+        backoff: float, optional
+            Seconds waited before the first retry
+        factor: float, optional
+            Multiplier of the waiting time after each retry
+        max_backoff: float, optional
+            Maximum seconds waited before a retry
+        errors: tuple of type, optional
+            Exception classes considered transient. By default connection, timeout
+            and other operating system errors
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+        self.errors = tuple(errors)
+
+    def delay(self, retry):
+        """
+        Seconds waited before a retry
+
+        Parameters
+        ----------
+        retry: int
+            Number of the retry, starting at 0
+
+        Returns
+        -------
+        float
+        """
+        return min(self.backoff * self.factor ** retry, self.max_backoff)
+
+    def should_retry(self, error, retry):
+        """
+        Whether a run failing with an error is executed again
+
+        Parameters
+        ----------
+        error: Exception
+            Error raised by the run
+        retry: int
+            Number of retries already done
+
+        Returns
+        -------
+        bool
+        """
+        return retry < self.max_retries and isinstance(error, self.errors) \
+            and not isinstance(error, OptAppRunTimeoutException)
+
+    def call(self, func, *args):
+        """
+        Call a function, again after a delay while it fails with a transient error
+
+        Parameters
+        ----------
+        func: callable
+        args: tuple
+            Arguments of `func`
+
+        Returns
+        -------
+        any
+            Value returned by `func`
+        """
+        retry = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception as e:
+                if not self.should_retry(e, retry):
+                    raise
+            time.sleep(self.delay(retry))
+            retry += 1
@@ -6,7 +6,9 @@ from datetime import datetime
 import numpy as np
 
 from .runs import Run
+from .search import AbstractSearch
 from driftai.parameters import ParameterGrid
+from driftai.exceptions import OptAppInstanceExistsException
 
 class RunGenerator(object):
     """
@@ -41,25 +43,40 @@ class RunGenerator(object):
         list(Run)
 
         """
-        def get_subdataset_indices_as_parameter(subdataset):
-            ind = list(subdataset.indices["sets"].keys())
-            return ind
-
         approach = runnable.approach
-
-        par_grid = ParameterGrid(runnable.parameters + extra_parameters)
-        par_combs = par_grid.generate_combs()
-
-        runs = []
-        for par_comb in par_combs[1]:
-            pars = dict(zip(par_combs[0], par_comb))
-            sets = get_subdataset_indices_as_parameter(approach.subdataset)
-            for s in sets:
-                run = Run(subdataset=approach.subdataset, subdataset_set=s, 
-                            run_parameters=pars, approach_id=approach.id)
-                runs.append(run)
+        runs = RunGenerator.lazy_runs(runnable, extra_parameters)
+
+        # Existing runs are fetched once instead of checking each new run
+        existing_ids = set(Run.collection(approach.id).list_ids())
+        # Samplers may draw the same configuration twice
+        runs = list(dict((run.id, run) for run in runs).values())
+        if any(run.id in existing_ids for run in runs):
+            raise OptAppInstanceExistsException("Run")
         return runs
 
+    @staticmethod
+    def lazy_runs(runnable, extra_parameters=[]):
+        """
+        Given a runnable approach get its runs as a lazy sequence.
+        Runs are created on demand from their index and they are not checked against the stored ones
+
+        Parameters
+        ----------
+        runnable: RunnableApproach
+
+        Returns
+        -------
+        LazyRuns
+        """
+        approach = runnable.approach
+        search_space = runnable.search_space
+        if isinstance(search_space, AbstractSearch):
+            raise TypeError("Runs of adaptive searches are generated while running the approach")
+        if extra_parameters:
+            search_space = search_space.extend(extra_parameters)
+        sets = list(approach.subdataset.indices["sets"].keys())
+        return LazyRuns(approach.id, approach.subdataset, search_space, sets)
+
     def add_parameters(self, param):
         """
         Adds an extra hyperparameter to run generator
@@ -71,22 +88,74 @@ class RunGenerator(object):
         self.extra_parameters.append(param)
 
 
+class LazyRuns(object):
+    """
+    Sequence of the runs of a search space, created on demand.
+
+    Each configuration of the search space is run on every subdataset set, the
+    run at ``index`` uses the configuration ``index // len(sets)``.
+    """
+    def __init__(self, approach_id, subdataset, search_space, sets):
+        """
+        Parameters
+        ----------
+        approach_id: str
+            Approach unique identifier
+        subdataset: SubDataset
+            Subdataset used by the runs
+        search_space: ParameterGrid or AbstractSampler
+            Parameter configurations
+        sets: list of str
+            Subdataset sets
+        """
+        self.approach_id = approach_id
+        self.subdataset = subdataset
+        self.search_space = search_space
+        self.sets = sets
+
+    def __len__(self):
+        return len(self.search_space) * len(self.sets)
+
+    def __getitem__(self, index):
+        n_runs = len(self)
+        if isinstance(index, slice):
+            return [ self._create_run(i) for i in range(*index.indices(n_runs)) ]
+
+        if index < 0:
+            index += n_runs
+        if not 0 <= index < n_runs:
+            raise IndexError("run index out of range")
+        return self._create_run(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._create_run(i)
+
+    def _create_run(self, index):
+        comb, set_ = divmod(index, len(self.sets))
+        return Run(subdataset=self.subdataset, subdataset_set=self.sets[set_],
+                   run_parameters=self.search_space[comb], approach_id=self.approach_id,
+                   check_exists=False)
+
+
 class RunPool(object):
     """
     Pool to simplify runs iteration
     """
-    def __init__(self, runs, resume=False):
+    def __init__(self, runs, resume=False, cost_model=None):
         """
         Parameters
         ----------
         runs: list(Run)
             All runs to be executed
         resume: bool
-            If True RunPool will only iterate through pendent|waiting runs,
-            otherwise all runs will be iterated
+            If True RunPool will only iterate through the waiting runs and the
+            running ones whose lease has expired, otherwise all runs will be iterated
+        cost_model: CostModel, optional
+            If set, runs are iterated longest first, by their predicted time
         """
         self.iter = 0
-        self.runs = runs
+        self.runs = cost_model.longest_first(runs) if cost_model else runs
         self.resume = resume
 
     def iteruns(self):
@@ -96,13 +165,12 @@ class RunPool(object):
         Returns
         -------
         Run
-            The next run with status equal to `waiting`
+            The next run with status equal to `waiting`, or `running` if its lease has expired
         """
         while self.has_next():
 
-            if not self.resume or \
-                self.runs[self.iter].status == "waiting" or \
-                self.runs[self.iter].status == "running":
+            # Running runs with a live lease belong to another runner
+            if not self.resume or self.runs[self.iter].reclaimable():
                 yield self.runs[self.iter]
                 self.iter += 1
             else:
@@ -1,14 +1,144 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+import multiprocessing
+from multiprocessing.connection import wait
+from multiprocessing.pool import ThreadPool, RemoteTraceback
+import os
+import itertools
+import math
+import pickle
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
 import warnings
 
-from .run_manage import RunPool, RunGenerator
-from driftai.result_report import Result
-from driftai.utils import print_progress_bar
-
 import numpy as np
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, CPU time limits can not be enforced
+    resource = None
+
+from .run_manage import RunPool, RunGenerator
+from .runs import Run
+from .search import AbstractSearch
+from .scheduler import CostModel
+from driftai.db.run_index import config_hash
+from driftai.result_report import Result, compute_metrics
+from driftai.db import Collections, DatabaseInjector, set_project_path
+from driftai.utils import print_progress_bar, import_from
+from driftai.exceptions import OptAppRunTimeoutException, OptAppRunnerStalledException
 
 class AbstractRunner(ABC):
+    # Wall clock and CPU time limits of each run in seconds, None for no limit.
+    # Approaches can set their own limits, see `RunnableApproach.timeout`
+    timeout = None
+    cpu_timeout = None
+    # Policy executing again the runs failing with transient errors, see `RetryPolicy`
+    retry = None
+    # Seconds a running run is reserved for the runner without a heartbeat.
+    # Other runners resuming the approach only execute the runs whose lease has expired
+    lease_time = 300
+    # Number of generated runs stored at once, see `SingleRunner._load_runs`
+    save_batch_size = 10000
+
+    @property
+    def owner(self):
+        """
+        Unique identifier of the runner, stored in the lease of its running runs
+        """
+        if getattr(self, "_owner", None) is None:
+            self._owner = "{}-{}-{}".format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        return self._owner
+
+    def lease(self, runs):
+        """
+        Mark runs as running, leased by the runner until `lease_time` seconds
+        from now. Leasing running runs again renews their lease
+
+        Parameters
+        ----------
+        runs: iterable of Run
+        """
+        now = time.time()
+        for run in runs:
+            run.status = "running"
+            run.lease = {"owner": self.owner, "heartbeat": now, "expires": now + self.lease_time}
+            run.update()
+        # Other runners must see the heartbeats before the leases expire
+        DatabaseInjector.event_log().flush()
+
+    def claim(self, runs):
+        """
+        Lease the runs which can still be executed, see `Run.reclaimable`.
+        The stored status and lease of the runs are read again holding the
+        database lock, so runners resuming an approach at the same time never
+        claim the same run
+
+        Parameters
+        ----------
+        runs: iterable of Run
+
+        Returns
+        -------
+        list of Run
+            Runs leased by the runner. The other ones are executed by another runner
+        """
+        runs = list(runs)
+        if not runs:
+            return []
+
+        with DatabaseInjector.db().exclusive():
+            # Only the claimed runs are looked up in the run index, kept up to date by every update
+            states = {}
+            for approach_id in set(r.approach_id for r in runs):
+                states.update(Collections.runs(approach_id).states([ r.id for r in runs
+                                                                     if r.approach_id == approach_id ]))
+            now = time.time()
+            claimed = []
+            for run in runs:
+                if run.id not in states:
+                    continue
+                run.status, run.lease = states[run.id]
+                run.persisted_status = run.status
+                if run.reclaimable(now):
+                    claimed.append(run)
+            # The leases are flushed before releasing the lock
+            self.lease(claimed)
+        return claimed
+
+    @contextmanager
+    def heartbeat(self, runs):
+        """
+        Renew the lease of runs from a background thread while they execute
+
+        Parameters
+        ----------
+        runs: list of Run
+            Runs leased by the runner. They must not be updated by other
+            threads until the context exits
+        """
+        stop = threading.Event()
+        def renew():
+            while not stop.wait(self.lease_time / 3):
+                self.lease(runs)
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
     @abstractmethod
     def run(self, approach, resume=False):
         """
@@ -16,11 +146,200 @@ class AbstractRunner(ABC):
         """
         pass
 
+    def limits(self, runnable_approach):
+        """
+        Get the time limits of the runs of an approach
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+
+        Returns
+        -------
+        tuple
+            ``(timeout, cpu_timeout)`` in seconds. The limits of the approach,
+            or the ones of the runner if the approach does not set them
+
+        Raises
+        ------
+        ValueError
+            If a CPU time limit is set in a platform which can not enforce it
+        """
+        timeout = runnable_approach.timeout
+        cpu_timeout = runnable_approach.cpu_timeout
+        return check_limits(timeout if timeout is not None else self.timeout,
+                            cpu_timeout if cpu_timeout is not None else self.cpu_timeout)
+
+    def evaluate(self, runnable_approach, run):
+        """
+        Fits and evaluates the approach with the data and parameters of a run.
+        If the approach has time limits the run is executed in a child process,
+        killed when it exceeds them. Failed attempts are retried following `retry`
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+        run: Run
+
+        Raises
+        ------
+        OptAppRunTimeoutException
+            If the run exceeds a time limit
+        Exception
+            Any error raised by the approach in its last attempt
+
+        Returns
+        -------
+        Result
+        """
+        timeout, cpu_timeout = self.limits(runnable_approach)
+        if timeout is None and cpu_timeout is None:
+            return _retrying(self.retry, evaluate_run, runnable_approach, run)
+        return _retrying(self.retry, _evaluate_limited, runnable_approach, run.subdataset_set,
+                         run.run_parameters, run.budget, timeout, cpu_timeout)
+
+    def execute_run(self, runnable_approach, run):
+        """
+        Fits and evaluates the approach with the data and parameters of a run,
+        storing its results. If the run raises an error its status is set to
+        ``failed`` and the traceback is stored in `Run.error`
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+        run: Run
+
+        Returns
+        -------
+        bool
+            False if the run has not been executed, because another runner claimed it
+        """
+        if not self.claim([run]):
+            return False
+
+        # Set the results and store them
+        try:
+            with self.heartbeat([run]):
+                result = self.evaluate(runnable_approach, run)
+            run.results = result
+        except OptAppRunTimeoutException:
+            run.status = "timeout"
+        except Exception as e:
+            run.status = "failed"
+            run.error = _format_error(e)
+        run.update()
+        return True
+
+    def execute_runs(self, runnable_approach, runs, on_finish=None):
+        """
+        Executes a batch of runs, one after another
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+        runs: iterable of Run
+        on_finish: callable, optional
+            Called with each run when it finishes
+        """
+        for run in runs:
+            if self.execute_run(runnable_approach, run) and on_finish:
+                on_finish(run)
+
+    def run_search(self, runnable_approach, search, resume=False):
+        """
+        Runs an approach driving an adaptive search: configurations are proposed,
+        run on every subdataset set and their metric values told to the search,
+        in batches of `search.parallelism` configurations
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+        search: AbstractSearch
+        resume: bool
+            If True the finished runs are told to the search and the pending ones executed
+        """
+        approach = runnable_approach.approach
+        runs_collection = Collections.runs(approach.id)
+        metric_names = [ m.__name__ for m in runnable_approach.metrics ]
+        if search.metric not in metric_names:
+            raise ValueError("Search metric {} is not one of the approach metrics".format(search.metric))
+
+        sets = list(approach.subdataset.indices["sets"].keys())
+        search.start(sets)
+        n_runs = search.n_runs * len(sets)
+        progress = {"done": 0}
+        def on_finish(run):
+            progress["done"] += 1
+            print_progress_bar(min(progress["done"], n_runs), n_runs)
+
+        if not resume:
+            print("Removing previous runs...")
+            approach.runs.clear()
+            approach.update()
+        else:
+            print("Resuming runs...")
+            # Running runs with a live lease are executed by another runner
+            self.execute_runs(runnable_approach, [ r for r in runs_collection.get_pending() if r.reclaimable() ],
+                              on_finish)
+            for configuration, budget, value in _configuration_values(runs_collection.all(), search.metric, len(sets)):
+                search.tell(configuration, value, budget)
+                progress["done"] += len(sets)
+
+        print("Running...")
+        while True:
+            trials = []
+            while len(trials) < search.parallelism:
+                trial = search.ask()
+                if trial is None:
+                    break
+                trials.append(trial)
+            if not trials:
+                break
+
+            trial_runs = [ [ Run(subdataset=approach.subdataset, subdataset_set=s, run_parameters=t.configuration,
+                                 approach_id=approach.id, check_exists=False, budget=t.budget)
+                             for s in (t.sets or sets) ]
+                           for t in trials ]
+            self.execute_runs(runnable_approach,
+                              runs_collection.save_many([ r for runs in trial_runs for r in runs ]), on_finish)
+
+            stored = dict((r["id"], r) for r in runs_collection.all())
+            for t, runs in zip(trials, trial_runs):
+                value = _mean_metric([ stored.get(r.id) for r in runs ], search.metric)
+                search.tell(t.configuration, value, t.budget)
+
+        if progress["done"] < n_runs:
+            # Some runs have been skipped by the search, end the progress bar line
+            print()
+
+        # Fold the run changes into the database
+        Collections.approaches().compact()
+        best = search.best()
+        if best:
+            print("Best configuration: {} ({}: {})".format(best[0], search.metric, best[1]))
+
 class SingleRunner(AbstractRunner):
     """
     Runs an approach in a single machine
     """
 
+    def __init__(self, timeout=None, cpu_timeout=None, retry=None):
+        """
+        Parameters
+        ----------
+        timeout: float, optional
+            Wall clock time limit of each run in seconds. Runs exceeding it are
+            killed and their status set to ``timeout``
+        cpu_timeout: float, optional
+            CPU time limit of each run in seconds
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors. By
+            default failed runs are not retried and their status set to ``failed``
+        """
+        self.timeout = timeout
+        self.cpu_timeout = cpu_timeout
+        self.retry = retry
+
     def _load_runs(self, runnable_approach, resume):
         if not resume:
             # Remove old runs
@@ -29,75 +348,798 @@ class SingleRunner(AbstractRunner):
             runnable_approach.approach.update()
             
             print("Generating runs...")
-            runs = RunGenerator.from_runnable_approach(runnable_approach)
-            runnable_approach.approach.runs = runs
+            # Runs are created on demand and stored in batches, so large
+            # search spaces are never held in memory at once
+            runs = RunGenerator.lazy_runs(runnable_approach)
+            runs_collection = Collections.runs(runnable_approach.approach.id)
 
             print("Saving new runs...")
-            runnable_approach.approach.update()
+            duplicates = set()
+            for start in range(0, len(runs), self.save_batch_size):
+                batch = runs[start:start + self.save_batch_size]
+                saved = set(id(r) for r in runs_collection.save_many(batch))
+                # Samplers may draw the same configuration twice, it is run once
+                duplicates.update(start + i for i, r in enumerate(batch) if id(r) not in saved)
+            if duplicates:
+                runs = [ r for i, r in enumerate(runs) if i not in duplicates ]
         else: 
             print("Resuming runs...")
             print("Reading runs...")
-            runs = runnable_approach.approach.runs
+            # Only pending runs are loaded, using the approach's pending runs queue
+            runs = Collections.runs(runnable_approach.approach.id).get_pending()
         return runs
 
     def run(self, runnable_approach, resume=False):
+        # Limits which can not be enforced fail before executing any run
+        self.limits(runnable_approach)
+
+        search_space = runnable_approach.search_space
+        if isinstance(search_space, AbstractSearch):
+            self.run_search(runnable_approach, search_space, resume)
+            return
+
+        # Fit the cost model before the previous runs are removed
+        cost_model = CostModel(runnable_approach.cost_hint).fit(
+            Collections.runs(runnable_approach.approach.id).all())
+
         # Generate or load the runs
         runs = self._load_runs(runnable_approach, resume)
 
-        if len(runs) == 0:
+        # Count finished and left runs
+        counts = Collections.runs(runnable_approach.approach.id).count_by_status()
+        n_runs = sum(counts.values())
+        n_done_runs = counts.get("finished", 0)
+        n_left_runs = n_runs - n_done_runs
+
+        if n_runs == 0:
             print("Cannot load runs. Did you generated them?")
             return
 
-        # Count finished and left runs
-        n_done_runs = len([r for r in runs if r.status == "finished"])
-        n_left_runs = len(runs) - n_done_runs
-
         # If resume is True and there aren't runs to run warn the user
         if resume and n_left_runs == 0:
             warnings.warn("All runs are finished. Regenerate the runs or run with resume=False")
             return
 
         print("Running...")
-        print_progress_bar(n_done_runs, len(runs))
-        
-        # Execute the runs
-        for run in RunPool(runs, resume).iteruns():
-            run.status = "running"
-            run.update()
-
-            # Get the data which will be using to train and validate
-            train_data = run.get_train_data()
-            test_data = run.get_test_data()
-            parameters = run.run_parameters
-            
-            # Fit and inference
-            model = runnable_approach.learn(train_data, parameters)
-            predictions = runnable_approach.inference(model, test_data)
-            
-            # Convert predictions to python list in order to serialize them
-            if isinstance(predictions, np.ndarray):
-                predictions = predictions.tolist()   
+        print_progress_bar(n_done_runs, n_runs)
+        progress = {"done": n_done_runs}
+        def on_finish(run):
+            # Update the progress bar
+            progress["done"] += 1
+            print_progress_bar(progress["done"], n_runs)
 
-            # Set the results and store them
-            run.results = Result(None, result=predictions)
-            run.update()
+        # Execute the runs, longest first so parallel runners do not end waiting for a long one
+        self.execute_runs(runnable_approach, RunPool(runs, resume, cost_model).iteruns(), on_finish)
 
-            # Update the progress bar
-            n_done_runs += 1
-            print_progress_bar(n_done_runs, len(runs))
+        # Fold the run changes into the database
+        Collections.approaches().compact()
 
-class DaskRunner(AbstractRunner):
+class PoolRunner(SingleRunner):
     """
-    Runs an approach in a single machine using dask parallelization
+    Runs an approach executing several runs at the same time in a pool of workers.
+
+    Workers only compute the results of the runs: results stream back to the
+    runner, which stores them as they arrive, so the database has a single writer.
+    Subclasses define the pool with `_start_pool`, `_submit` and `_stop_pool`.
     """
-    def run(self, approach, resume=False):
-        # TODO: See test/resources/my_run_dask.py
+
+    def __init__(self, n_jobs=None, timeout=None, cpu_timeout=None, retry=None):
+        """
+        Parameters
+        ----------
+        n_jobs: int, optional
+            Number of workers. By default the number of CPUs
+        timeout: float, optional
+            Wall clock time limit of each run in seconds
+        cpu_timeout: float, optional
+            CPU time limit of each run in seconds
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors
+        """
+        super().__init__(timeout, cpu_timeout, retry)
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self._pool = None
+
+    @abstractmethod
+    def _start_pool(self, runnable_approach):
+        """
+        Create the pool of workers
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+
+        Returns
+        -------
+        any
+            The pool
+        """
+        pass
+
+    @abstractmethod
+    def _submit(self, pool, runnable_approach, run, callback):
+        """
+        Compute the results of a run in a worker of the pool
+
+        Parameters
+        ----------
+        pool: any
+            Pool created by `_start_pool`
+        runnable_approach: RunnableApproach
+        run: Run
+        callback: callable
+            Called, from any thread, with the result of the run and None,
+            or None and the exception raised by the run after its retries
+        """
         pass
 
-class CloudRunner(AbstractRunner):
+    def _stop_pool(self, pool):
+        pool.close()
+        pool.join()
+
+    def _n_slots(self, pool):
+        """
+        Number of runs the pool executes at the same time
+
+        Parameters
+        ----------
+        pool: any
+            Pool created by `_start_pool`
+
+        Returns
+        -------
+        int
+        """
+        return self.n_jobs
+
+    def run(self, runnable_approach, resume=False):
+        if self._enforces_limits(runnable_approach):
+            # Runs are executed in their own processes, see `_execute_limited_runs`
+            super().run(runnable_approach, resume)
+            return
+
+        # The same pool executes all the batches of the approach runs
+        self._pool = self._start_pool(runnable_approach)
+        try:
+            super().run(runnable_approach, resume)
+        finally:
+            pool, self._pool = self._pool, None
+            self._stop_pool(pool)
+
+    def execute_runs(self, runnable_approach, runs, on_finish=None):
+        if self._enforces_limits(runnable_approach):
+            self._execute_limited_runs(runnable_approach, iter(runs), on_finish)
+            return
+
+        pool = self._pool or self._start_pool(runnable_approach)
+        try:
+            self._execute_runs(pool, runnable_approach, iter(runs), on_finish)
+        finally:
+            if pool is not self._pool:
+                self._stop_pool(pool)
+
+    def _execute_runs(self, pool, runnable_approach, runs, on_finish):
+        done = queue.Queue()
+        in_flight = {}
+        n_slots = self._n_slots(pool)
+
+        def submit():
+            # Runs are claimed in batches, each one reading the stored runs once
+            while len(in_flight) <= n_slots:
+                batch = list(itertools.islice(runs, n_slots))
+                if not batch:
+                    return
+                for run in self.claim(batch):
+                    in_flight[run.id] = run
+                    self._submit(pool, runnable_approach, run,
+                                 lambda result, error, id_=run.id: done.put((id_, result, error)))
+
+        # Keep every worker busy without marking all the runs as running at once
+        submit()
+        renew_at = time.monotonic() + self.lease_time / 3
+        while in_flight:
+            try:
+                id_, result, error = done.get(timeout=max(0, renew_at - time.monotonic()))
+            except queue.Empty:
+                pass
+            else:
+                run = in_flight.pop(id_)
+                if isinstance(error, OptAppRunTimeoutException):
+                    # The run has been killed, its worker executes the next one
+                    run.status = "timeout"
+                elif error is not None:
+                    run.status = "failed"
+                    run.error = _format_error(error)
+                else:
+                    run.results = result
+                run.update()
+                if on_finish:
+                    on_finish(run)
+                submit()
+
+            if in_flight and time.monotonic() >= renew_at:
+                # Heartbeat of the runs in execution
+                self.lease(in_flight.values())
+                renew_at = time.monotonic() + self.lease_time / 3
+
+    def _enforces_limits(self, runnable_approach):
+        """
+        Whether the runs of an approach are executed in child processes killed
+        when they exceed their time limits, instead of in the pool
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+
+        Returns
+        -------
+        bool
+        """
+        return any(l is not None for l in self.limits(runnable_approach))
+
+    def _execute_limited_runs(self, runnable_approach, runs, on_finish):
+        # Up to n_jobs runs execute at the same time, each one in its own child process.
+        # Children are started and waited for by this thread alone: forking from a
+        # thread of a pool may deadlock the child on the locks held by other threads
+        timeout, cpu_timeout = self.limits(runnable_approach)
+        executing = {}
+        # Runs waiting to be retried, with the time of their next attempt
+        delayed = []
+
+        def start(run, retries):
+            process = _LimitedProcess(runnable_approach, run.subdataset_set, run.run_parameters, run.budget,
+                                      timeout, cpu_timeout)
+            executing[run.id] = (run, process, retries)
+
+        renew_at = time.monotonic() + self.lease_time / 3
+        exhausted = False
+        while True:
+            now = time.monotonic()
+            for item in [ d for d in delayed if d[0] <= now ]:
+                delayed.remove(item)
+                start(item[1], item[2])
+            while not exhausted and len(executing) + len(delayed) < self.n_jobs:
+                run = next(runs, None)
+                if run is None:
+                    exhausted = True
+                    break
+                for run in self.claim([run]):
+                    start(run, 0)
+            if not executing and not delayed:
+                break
+
+            wake_at = min([ renew_at ] + [ d[0] for d in delayed ] +
+                          [ p.deadline for _, p, _ in executing.values() if p.deadline is not None ])
+            if executing:
+                wait([ p.receiver for _, p, _ in executing.values() ], max(0, wake_at - time.monotonic()))
+            else:
+                time.sleep(max(0, wake_at - time.monotonic()))
+
+            for id_, (run, process, retries) in list(executing.items()):
+                if not process.done():
+                    continue
+                del executing[id_]
+                try:
+                    run.results = process.result().store_predictions()
+                except OptAppRunTimeoutException:
+                    run.status = "timeout"
+                except Exception as e:
+                    if self.retry is not None and self.retry.should_retry(e, retries):
+                        delayed.append((time.monotonic() + self.retry.delay(retries), run, retries + 1))
+                        continue
+                    run.status = "failed"
+                    run.error = _format_error(e)
+                run.update()
+                if on_finish:
+                    on_finish(run)
+
+            if time.monotonic() >= renew_at:
+                # Heartbeat of the runs in execution
+                self.lease([ r for r, _, _ in executing.values() ] + [ d[1] for d in delayed ])
+                renew_at = time.monotonic() + self.lease_time / 3
+
+class ProcessPoolRunner(PoolRunner):
     """
-    Runs an approach in a single machine using dask parallelization
+    Runs an approach in a single machine executing the runs in worker processes.
+
+    Each worker imports the approach once, when it starts. Suited for learners
+    which hold the GIL, throughput scales with the number of cores.
     """
-    def run(self, approach, resume=False):
-        # TODO: See test/resources/my_run_dask.py
-        pass
\ No newline at end of file
+
+    def __init__(self, n_jobs=None, max_tasks_per_worker=None, timeout=None, cpu_timeout=None, retry=None):
+        """
+        Parameters
+        ----------
+        n_jobs: int, optional
+            Number of worker processes. By default the number of CPUs
+        max_tasks_per_worker: int, optional
+            Number of runs executed by a worker before it is replaced by a new
+            one, which bounds the memory leaked by the approach. By default workers
+            live as long as the pool
+        timeout: float, optional
+            Wall clock time limit of each run in seconds
+        cpu_timeout: float, optional
+            CPU time limit of each run in seconds
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors
+        """
+        super().__init__(n_jobs, timeout, cpu_timeout, retry)
+        self.max_tasks_per_worker = max_tasks_per_worker
+
+    def _start_pool(self, runnable_approach):
+        approach_cls = type(runnable_approach)
+        return multiprocessing.Pool(self.n_jobs, initializer=_init_worker,
+                                    initargs=(DatabaseInjector.project_path(), list(sys.path),
+                                              approach_cls.__module__, approach_cls.__name__),
+                                    maxtasksperchild=self.max_tasks_per_worker)
+
+    def _submit(self, pool, runnable_approach, run, callback):
+        # Runs are retried by the worker executing them
+        pool.apply_async(_retrying, (self.retry, _evaluate_in_worker, run.subdataset_set, run.run_parameters,
+                                     run.budget),
+                         callback=lambda result: callback(result, None),
+                         error_callback=lambda error: callback(None, error))
+
+class ThreadPoolRunner(PoolRunner):
+    """
+    Runs an approach in a single machine executing the runs in threads.
+
+    All the threads share the approach and its loaded dataset. Suited for
+    learners which release the GIL, such as NumPy, BLAS or most of scikit-learn
+    estimators, as runs are neither pickled nor copied to other processes.
+    """
+
+    def _start_pool(self, runnable_approach):
+        return ThreadPool(self.n_jobs)
+
+    def _submit(self, pool, runnable_approach, run, callback):
+        # Threads can not be killed, runs with time limits are executed in child processes instead
+        pool.apply_async(_retrying, (self.retry, _evaluate_threaded, runnable_approach, run.subdataset_set,
+                                     run.run_parameters, run.budget),
+                         callback=lambda result: callback(result, None),
+                         error_callback=lambda error: callback(None, error))
+
+class DaskRunner(PoolRunner):
+    """
+    Runs an approach on a Dask cluster, in a single machine or distributed.
+
+    The approach, with its loaded dataset, is scattered once to every worker and
+    shared by all the runs, which are submitted as futures. Workers return the
+    predictions with the results, so they do not need access to the project
+    directory, and the runner stores them as each run completes. Requires
+    ``dask[distributed]``.
+    """
+
+    def __init__(self, address=None, n_workers=None, retry=None, **cluster_kwargs):
+        """
+        Parameters
+        ----------
+        address: str, optional
+            Address of the scheduler of the cluster. By default a `LocalCluster`
+            is started and closed with the runner
+        n_workers: int, optional
+            Number of workers of the local cluster
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors
+        cluster_kwargs: dict
+            Arguments passed to `LocalCluster`
+        """
+        super().__init__(n_workers, retry=retry)
+        self.address = address
+        self.n_workers = n_workers
+        self.cluster_kwargs = cluster_kwargs
+
+    def _start_pool(self, runnable_approach):
+        from dask.distributed import Client, LocalCluster
+
+        if any(l is not None for l in self.limits(runnable_approach)):
+            warnings.warn("DaskRunner does not enforce time limits, use the timeouts of the Dask cluster")
+
+        cluster = None
+        if self.address:
+            client = Client(self.address)
+        else:
+            cluster = LocalCluster(n_workers=self.n_workers, **self.cluster_kwargs)
+            client = Client(cluster)
+        # Keep as many runs in flight as threads in the cluster
+        n_slots = sum(client.nthreads().values()) or self.n_jobs
+
+        # Load the dataset before scattering the approach, so it is sent once with it
+        runnable_approach.approach.subdataset.dataset.get_data()
+        shared_approach = client.scatter(runnable_approach, broadcast=True)
+        return client, cluster, shared_approach, n_slots
+
+    def _submit(self, pool, runnable_approach, run, callback):
+        client, _, shared_approach, _ = pool
+        future = client.submit(_retrying, self.retry, _evaluate_remote, shared_approach, run.subdataset_set,
+                               run.run_parameters, run.budget, pure=False)
+
+        def done(future):
+            if future.status != "finished":
+                callback(None, future.exception())
+                return
+            try:
+                result = future.result().store_predictions()
+            except Exception as e:
+                callback(None, e)
+            else:
+                callback(result, None)
+        future.add_done_callback(done)
+
+    def _n_slots(self, pool):
+        return pool[3]
+
+    def _enforces_limits(self, runnable_approach):
+        # Runs execute in the cluster, see the warning of `_start_pool`
+        return False
+
+    def _stop_pool(self, pool):
+        client, cluster, _, _ = pool
+        client.close()
+        if cluster is not None:
+            cluster.close()
+
+class CloudRunner(SingleRunner):
+    """
+    Runs an approach in any number of machines sharing the project directory.
+
+    The runner is the coordinator: it puts the runs in the project's `RunQueue`
+    and stores their results as workers report them. Start the workers with
+    ``driftai worker`` in the project directory of each machine. Workers import
+    the runnable approach class from its module, so it must be importable from
+    the project directory, as the approaches created with ``driftai generate``.
+
+    Runs of workers which stop renewing their lease are executed again by other
+    workers. If no worker executes runs for `stall_timeout` seconds the runner
+    stops waiting: the runs left stay queued and are stored by resuming the approach.
+    """
+
+    def __init__(self, poll_interval=1.0, stall_timeout=600):
+        """
+        Parameters
+        ----------
+        poll_interval: float, optional
+            Seconds between checks of the results reported by the workers
+        stall_timeout: float, optional
+            Seconds waited without any run reported nor leased by a live worker
+            before raising `OptAppRunnerStalledException`. None to wait forever
+        """
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+
+    def run(self, runnable_approach, resume=False):
+        if not resume:
+            DatabaseInjector.run_queue().clear(runnable_approach.approach.id)
+        super().run(runnable_approach, resume)
+
+    def execute_runs(self, runnable_approach, runs, on_finish=None):
+        approach_id = runnable_approach.approach.id
+        approach_cls = type(runnable_approach)
+        run_queue = DatabaseInjector.run_queue()
+
+        runs = OrderedDict((r.id, r) for r in runs)
+        run_queue.put(approach_id, approach_cls.__module__, approach_cls.__name__, list(runs.values()))
+        progress_at = time.monotonic()
+        while runs:
+            reported = run_queue.collect(approach_id)
+            if reported or run_queue.count_leased(approach_id):
+                progress_at = time.monotonic()
+            elif self.stall_timeout is not None and time.monotonic() - progress_at > self.stall_timeout:
+                raise OptAppRunnerStalledException(self.stall_timeout, len(runs))
+            if not reported:
+                time.sleep(self.poll_interval)
+            for task in reported:
+                run = runs.pop(task["run_id"], None)
+                if run is None:
+                    # Reported by a worker of a previous execution
+                    continue
+                if task["status"] == "failed":
+                    run.status = "failed"
+                    run.error = task["error"]
+                elif task["status"] == "timeout":
+                    run.status = "timeout"
+                else:
+                    run.results = Result(**task["result"])
+                run.update()
+                if on_finish:
+                    on_finish(run)
+
+
+def evaluate_run(runnable_approach, run, cpu_clock=time.process_time, store_predictions=True, measure_rss=False):
+    """
+    Fits and evaluates the approach with the data and parameters of a run,
+    without storing anything in the database
+
+    The time spent loading the data, learning and predicting and the CPU time
+    are measured. The peak memory allocated by the run is measured too if
+    `tracemalloc` is tracing, for example with the ``PYTHONTRACEMALLOC=1``
+    environment variable, in Python 3.9 or later
+
+    Parameters
+    ----------
+    runnable_approach: RunnableApproach
+    run: Run
+    cpu_clock: callable, optional
+        Clock measuring the CPU time of the run. By default the CPU time of the process.
+        If None the CPU time is not measured
+    store_predictions: bool, optional
+        If False the predictions are kept inline in the result instead of being
+        stored in the project's prediction store, see `Result.store_predictions`
+    measure_rss: bool, optional
+        If True the peak resident memory of the process is measured. Only set it
+        when the process executes no other run, as the peak covers its whole life
+
+    Returns
+    -------
+    Result
+        Predictions, metric values and measures of the run
+    """
+    started = time.perf_counter()
+    cpu_started = cpu_clock() if cpu_clock is not None else None
+    # Without reset_peak (Python < 3.9) the traced peak covers the previous runs
+    tracing = tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak")
+    if tracing:
+        tracemalloc.reset_peak()
+        traced = tracemalloc.get_traced_memory()[0]
+
+    # Get the data which will be using to train and validate
+    train_data = run.get_train_data()
+    test_data = run.get_test_data()
+    parameters = run.run_parameters
+    loaded = time.perf_counter()
+
+    # Fit and inference
+    model = runnable_approach.learn(train_data, parameters)
+    learned = time.perf_counter()
+    predictions = runnable_approach.inference(model, test_data)
+    inferred = time.perf_counter()
+    cpu_time = cpu_clock() - cpu_started if cpu_clock is not None else None
+    peak_memory = tracemalloc.get_traced_memory()[1] - traced if tracing else None
+
+    # Compute the approach metrics
+    metrics = None
+    if runnable_approach.metrics:
+        metrics = compute_metrics(runnable_approach.metrics,
+                                  run.subdataset.get_test_labels(run.subdataset_set),
+                                  predictions)
+    result = Result(time.perf_counter() - started, result=predictions, date=datetime.now(), metrics=metrics,
+                    load_time=loaded - started, learn_time=learned - loaded,
+                    inference_time=inferred - learned, cpu_time=cpu_time,
+                    peak_rss=_peak_rss() if measure_rss else None, peak_memory=peak_memory)
+    return result.store_predictions() if store_predictions else result
+
+def _peak_rss():
+    if resource is None:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Runnable approach loaded by each worker process
+_worker = {}
+
+def _init_worker(project_path, path, module, name):
+    for p in path:
+        if p not in sys.path:
+            sys.path.append(p)
+    set_project_path(project_path)
+    _worker["approach"] = load_runnable_approach(module, name)
+
+def load_runnable_approach(module, name):
+    """
+    Import and instantiate a runnable approach class
+
+    Parameters
+    ----------
+    module: str
+        Module of the class. For example: approaches.random_forest
+    name: str
+        Name of the class. For example: RandomForestApproach
+
+    Returns
+    -------
+    RunnableApproach
+    """
+    approach_cls = import_from(module, name)
+    if isinstance(approach_cls, type):
+        from .decorators import single_run
+        approach_cls = single_run(approach_cls)
+    # Classes decorated with a runner decorator are functions creating the instance
+    return approach_cls()
+
+def _evaluate_in_worker(subdataset_set, run_parameters, budget):
+    return _evaluate_shared(_worker["approach"], subdataset_set, run_parameters, budget)
+
+def _evaluate_shared(runnable_approach, subdataset_set, run_parameters, budget, cpu_clock=time.process_time):
+    # Runs read the data of the approach's subdataset, loaded once
+    approach = runnable_approach.approach
+    run = Run(approach_id=approach.id, subdataset=approach.subdataset, subdataset_set=subdataset_set,
+              run_parameters=run_parameters, check_exists=False, budget=budget)
+    return evaluate_run(runnable_approach, run, cpu_clock)
+
+# CPU time of the calling thread, None before Python 3.7
+_thread_clock = getattr(time, "thread_time", None)
+
+def _evaluate_threaded(runnable_approach, subdataset_set, run_parameters, budget):
+    # Other runs execute in the same process, only the CPU time of the run's thread is measured
+    return _evaluate_shared(runnable_approach, subdataset_set, run_parameters, budget, _thread_clock)
+
+def _evaluate_remote(runnable_approach, subdataset_set, run_parameters, budget):
+    # Remote workers may not share the project directory, the predictions are
+    # returned inline and the runner stores them
+    approach = runnable_approach.approach
+    run = Run(approach_id=approach.id, subdataset=approach.subdataset, subdataset_set=subdataset_set,
+              run_parameters=run_parameters, check_exists=False, budget=budget)
+    return evaluate_run(runnable_approach, run, _thread_clock, store_predictions=False)
+
+def _evaluate_limited(runnable_approach, subdataset_set, run_parameters, budget, timeout=None, cpu_timeout=None):
+    return _LimitedProcess(runnable_approach, subdataset_set, run_parameters, budget,
+                           timeout, cpu_timeout).result().store_predictions()
+
+class _LimitedProcess(object):
+    """
+    Run evaluated in a child process, killed when it exceeds its time limits
+    """
+    def __init__(self, runnable_approach, subdataset_set, run_parameters, budget, timeout=None, cpu_timeout=None):
+        self.timeout = timeout
+        self.cpu_timeout = cpu_timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        context = _limited_context()
+        self.receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_limited_child, daemon=True,
+                                       args=(sender, runnable_approach, subdataset_set, run_parameters,
+                                             budget, cpu_timeout))
+        self.process.start()
+        sender.close()
+
+    def done(self):
+        """Whether the run has finished, failed or exceeded its wall clock time limit"""
+        return self.receiver.poll() or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def result(self):
+        """
+        Wait for the result of the run
+
+        Raises
+        ------
+        OptAppRunTimeoutException
+            If the run exceeds a time limit
+        Exception
+            Any error raised by the approach, caused by its traceback in the child process
+
+        Returns
+        -------
+        Result
+            Result with the predictions inline, see `Result.store_predictions`
+        """
+        try:
+            remaining = None if self.deadline is None else max(0, self.deadline - time.monotonic())
+            if not self.receiver.poll(remaining):
+                raise OptAppRunTimeoutException("wall clock", self.timeout)
+            try:
+                status, payload = self.receiver.recv()
+            except EOFError:
+                self.process.join()
+                if self.cpu_timeout is not None and self.process.exitcode in (-signal.SIGXCPU, -signal.SIGKILL):
+                    raise OptAppRunTimeoutException("CPU", self.cpu_timeout)
+                raise RuntimeError("Run process died with exit code {}".format(self.process.exitcode))
+        finally:
+            self.receiver.close()
+            if self.process.is_alive():
+                # Process.kill is new in Python 3.7
+                getattr(self.process, "kill", self.process.terminate)()
+            self.process.join()
+
+        if status == "error":
+            error, tb = payload
+            raise (error or RuntimeError("Run failed")) from RemoteTraceback(tb)
+        return payload
+
+def _limited_context():
+    # Forked children inherit the loaded approach. Forking while other threads hold
+    # locks may deadlock the child, so only the main thread forks. Spawned children
+    # receive the approach pickled
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.current_thread() is threading.main_thread():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def _limited_child(sender, runnable_approach, subdataset_set, run_parameters, budget, cpu_timeout):
+    if cpu_timeout is not None:
+        seconds = int(math.ceil(cpu_timeout))
+        # The process receives SIGXCPU at the soft limit and SIGKILL at the hard one
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+    try:
+        # The parent stores the predictions, the child does not write to the project
+        approach = runnable_approach.approach
+        run = Run(approach_id=approach.id, subdataset=approach.subdataset, subdataset_set=subdataset_set,
+                  run_parameters=run_parameters, check_exists=False, budget=budget)
+        # The child executes the run alone, its peak resident memory is the one of the run
+        message = ("ok", evaluate_run(runnable_approach, run, store_predictions=False, measure_rss=True))
+    except Exception as e:
+        # The error is raised again in the parent, with the traceback of the child
+        message = ("error", (e if _is_picklable(e) else None, traceback.format_exc()))
+    sender.send(message)
+    sender.close()
+
+def check_limits(timeout, cpu_timeout):
+    """
+    Check that the time limits of the runs can be enforced in this platform
+
+    Parameters
+    ----------
+    timeout: float or None
+        Wall clock time limit in seconds
+    cpu_timeout: float or None
+        CPU time limit in seconds
+
+    Raises
+    ------
+    ValueError
+        If a CPU time limit is set and the platform has no ``resource`` module, as Windows
+
+    Returns
+    -------
+    tuple
+        ``(timeout, cpu_timeout)``
+    """
+    if cpu_timeout is not None and resource is None:
+        raise ValueError("CPU time limits need the resource module, which is not available in this platform. "
+                         "Use a wall clock time limit instead")
+    return timeout, cpu_timeout
+
+def _is_picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+def _retrying(retry, func, *args):
+    if retry is None:
+        return func(*args)
+    return retry.call(func, *args)
+
+def _format_error(error):
+    # Errors of other processes carry their original traceback as their cause
+    if isinstance(error.__cause__, RemoteTraceback):
+        # Process pools quote the traceback
+        return error.__cause__.tb.strip('\n"') + "\n"
+    return "".join(traceback.format_exception(type(error), error, error.__traceback__))
+
+def _mean_metric(runs, metric):
+    """
+    Mean metric value of some runs. None if any of them has not finished
+    """
+    values = []
+    for r in runs:
+        if r is None or r["status"] != "finished" or not r["results"]:
+            return None
+        value = (r["results"].get("metrics") or {}).get(metric)
+        if value is None:
+            return None
+        values.append(value)
+    return float(np.mean(values)) if values else None
+
+def _configuration_values(runs, metric, n_sets):
+    """
+    Mean metric value of each configuration and budget whose runs have finished in all the subdataset sets.
+    The value is None if all its runs have ended but some of them have failed or timed out
+    """
+    by_configuration = {}
+    for r in runs:
+        if r["status"] == "finished" and r["results"]:
+            value = (r["results"].get("metrics") or {}).get(metric)
+        elif r["status"] in ("failed", "timeout"):
+            value = None
+        else:
+            continue
+        key = (config_hash(r["run_parameters"]), r.get("budget"))
+        by_configuration.setdefault(key, (r["run_parameters"], r.get("budget"), []))[2].append(value)
+
+    return [ (configuration, budget, None if None in values else float(np.mean(values)))
+             for configuration, budget, values in by_configuration.values() if len(values) == n_sets ]
@@ -1,3 +1,4 @@
+import time
 import warnings
 from datetime import datetime
 import hashlib
@@ -17,7 +18,8 @@ from driftai.exceptions import OptAppRunFileDoesNotExistException, \
 class Run(Persistent):
     def __init__(self, approach_id, subdataset, subdataset_set, run_parameters, 
                     creation_date=None, submitted_date=None, finish_date=None, 
-                    results=None, status="waiting", id=None):
+                    results=None, status="waiting", id=None, check_exists=True, budget=None, error=None,
+                    lease=None):
 
         self.approach_id = approach_id
         self.subdataset = subdataset
@@ -28,8 +30,17 @@ class Run(Persistent):
         self.sumbission_date = submitted_date
         self.finish_date = finish_date
         self.subdataset_set = subdataset_set
+        # Fraction of the training rows used by the run. None uses all of them
+        self.budget = budget
+        # Traceback of the error raised by a failed run
+        self.error = error
+        # Lease of a running run: owner id, last heartbeat and expiration timestamps
+        self.lease = lease
+        # Status stored in driftai db. None until the run is saved
+        self.persisted_status = status if creation_date is not None else None
         self._id = id or self._get_id()
-        if creation_date is None and Run.collection(self.approach_id).exists(self.id):
+        # Bulk creation checks the existing runs at once, see `RunGenerator`
+        if check_exists and creation_date is None and Run.collection(self.approach_id).exists(self.id):
             raise OptAppInstanceExistsException("Run")
 
 
@@ -82,6 +93,8 @@ class Run(Persistent):
             return dict_contents.intersection(list(params.keys())) == dict_contents
         
         if check_run_file_structure(data):
+            # Do not modify the stored data, which may be cached
+            data = dict(data)
             data["subdataset"] = kwargs.get('subdataset') or SubDataset.collection().get(data["subdataset"])
             data["results"] = Result(**data["results"]) if data["results"] else None
             return cls(**data)
@@ -90,6 +103,8 @@ class Run(Persistent):
 
     def _get_id(self):
         pars = str(self.run_parameters)
+        if self.budget is not None:
+            pars += str(self.budget)
         pars_hash = hashlib.md5(pars.encode('utf-8')).hexdigest()
         return "{}_{}_{}".format(self.approach_id, self.subdataset_set, pars_hash)
 
@@ -107,7 +122,7 @@ class Run(Persistent):
                 "y": list
             }
         """
-        return self.subdataset.get_train_data(subset=self.subdataset_set)
+        return self.subdataset.get_train_data(subset=self.subdataset_set, fraction=self.budget)
 
     def get_test_data(self):
         """
@@ -170,7 +185,10 @@ class Run(Persistent):
                 "creation_date": <run creationd date>,
                 "submitted_date": <when run starts>,
                 "finish_date": <when run finishes>,
-                "subdataset_set": <subdataset set>
+                "subdataset_set": <subdataset set>,
+                "budget": <fraction of the training rows>,
+                "error": <traceback of the error of a failed run>,
+                "lease": <owner, heartbeat and expires of the run lease>
             }
         """
         return {
@@ -183,7 +201,10 @@ class Run(Persistent):
             "creation_date": str(self.creation_date),
             "submitted_date": str(self.sumbission_date),
             "finish_date": str(self.finish_date),
-            "subdataset_set": self.subdataset_set
+            "subdataset_set": self.subdataset_set,
+            "budget": self.budget,
+            "error": self.error,
+            "lease": self.lease
         }
 
     def save(self):
@@ -196,6 +217,40 @@ class Run(Persistent):
     def load(cls, approach_id, id_):
         return cls.collection(approach_id).get(id_)
 
+    def lease_expired(self, now=None):
+        """
+        Has the owner of a running run stopped renewing its lease?
+        Runs marked as running before leases existed have always expired
+
+        Parameters
+        ----------
+        now: float, optional
+            Timestamp to compare with the lease expiration. By default the current time
+
+        Returns
+        -------
+        boolean
+        """
+        if self.lease is None:
+            return True
+        return (now if now is not None else time.time()) > self.lease["expires"]
+
+    def reclaimable(self, now=None):
+        """
+        Can the run be executed? True for waiting runs and running runs whose
+        runner has died, detected by their expired lease
+
+        Parameters
+        ----------
+        now: float, optional
+            Timestamp to compare with the lease expiration. By default the current time
+
+        Returns
+        -------
+        boolean
+        """
+        return self.status == "waiting" or (self.status == "running" and self.lease_expired(now))
+
     def done(self):
         """
         Is the comuptation done?
@@ -0,0 +1,204 @@
+import math
+import numbers
+from datetime import datetime
+
+import numpy as np
+
+from driftai.utils import str_to_date
+from driftai.db.run_counters import PENDING_STATUSES
+
+
+class CostModel(object):
+    """
+    Predicts the execution time of runs from their parameters.
+
+    The model is a ridge regression of the logarithm of the time of the finished
+    runs over their parameters: numeric parameters by their logarithm, the rest
+    one-hot encoded, and the budget of the run. A cost hint, such as
+    `RunnableApproach.cost_hint`, is used as one more feature and alone while
+    there are not enough finished runs.
+    """
+
+    MIN_RUNS = 3
+
+    def __init__(self, cost_hint=None, alpha=1.0):
+        """
+        Parameters
+        ----------
+        cost_hint: callable, optional
+            Function returning the relative cost of some run parameters, or None if it is unknown
+        alpha: float, optional
+            Regularization strength of the regression
+        """
+        self.cost_hint = cost_hint
+        self.alpha = alpha
+        self._features = None
+        self._weights = None
+
+    @property
+    def fitted(self):
+        return self._weights is not None
+
+    def fit(self, runs):
+        """
+        Fit the model to the times of the finished runs
+
+        Parameters
+        ----------
+        runs: list of dict
+            Runs summaries as returned by `Run.get_info`
+
+        Returns
+        -------
+        CostModel
+            The model itself
+        """
+        samples = [ (r["run_parameters"], r.get("budget"), _get_time(r)) for r in runs ]
+        samples = [ s for s in samples if s[2] ]
+        if len(samples) < self.MIN_RUNS:
+            self._features, self._weights = None, None
+            return self
+
+        self._features = _feature_names([ s[0] for s in samples ])
+        X = np.array([ self._encode(parameters, budget) for parameters, budget, _ in samples ])
+        y = np.log([ s[2] for s in samples ])
+
+        # Ridge regression, the intercept is not regularized
+        X_mean, y_mean = X.mean(axis=0), y.mean()
+        Xc = X - X_mean
+        w = np.linalg.solve(Xc.T.dot(Xc) + self.alpha * np.eye(X.shape[1]), Xc.T.dot(y - y_mean))
+        self._weights = (y_mean - X_mean.dot(w), w)
+        return self
+
+    def predict(self, run_parameters, budget=None):
+        """
+        Predict the time of a run
+
+        Parameters
+        ----------
+        run_parameters: dict
+            Parameters of the run
+        budget: float, optional
+            Budget of the run
+
+        Returns
+        -------
+        float or None
+            Seconds. If the model is not fitted, the cost hint. None if it is unknown
+        """
+        if self.fitted:
+            intercept, w = self._weights
+            return float(np.exp(intercept + np.dot(self._encode(run_parameters, budget), w)))
+        return self._hint(run_parameters)
+
+    def longest_first(self, runs):
+        """
+        Sort runs by their predicted time, longest first. Runs keep their order
+        if their time can not be predicted
+
+        Parameters
+        ----------
+        runs: sequence of Run
+
+        Returns
+        -------
+        list of Run
+            Sorted runs. `runs` itself if the model neither is fitted nor has a
+            cost hint, so lazy sequences are not materialized
+        """
+        if not self.fitted and self.cost_hint is None:
+            return runs
+        runs = list(runs)
+        costs = [ self.predict(r.run_parameters, r.budget) for r in runs ]
+        if any(c is None for c in costs):
+            return runs
+        order = sorted(range(len(runs)), key=lambda i: -costs[i])
+        return [ runs[i] for i in order ]
+
+    def _hint(self, run_parameters):
+        if self.cost_hint is None:
+            return None
+        return self.cost_hint(run_parameters)
+
+    def _encode(self, run_parameters, budget):
+        x = []
+        for name, value in self._features:
+            parameter = run_parameters.get(name)
+            if name is None:
+                x.append(math.log(budget or 1.0))
+            elif value is None:
+                x.append(math.log1p(abs(parameter)) if _is_number(parameter) else 0.0)
+            else:
+                x.append(1.0 if str(parameter) == value else 0.0)
+        hint = self._hint(run_parameters)
+        x.append(math.log(hint) if hint else 0.0)
+        return x
+
+
+def estimate_eta(runs, cost_model=None):
+    """
+    Estimate the seconds left to finish the runs of an approach
+
+    The predicted times of the runs left are divided by the number of runs
+    executed at the same time, measured from the times and finish dates of the
+    finished runs.
+
+    Parameters
+    ----------
+    runs: list of dict
+        Runs summaries as returned by `Run.get_info`
+    cost_model: CostModel, optional
+        Model predicting the time of the runs. By default it is fitted to `runs`
+
+    Returns
+    -------
+    float or None
+        Seconds left. None if there are not enough finished runs
+    """
+    cost_model = cost_model or CostModel().fit(runs)
+    # Failed and timed out runs are not executed again
+    left = [ r for r in runs if r["status"] in PENDING_STATUSES ]
+    if not left:
+        return 0.0
+
+    costs = [ cost_model.predict(r["run_parameters"], r.get("budget")) for r in left ]
+    if any(c is None for c in costs):
+        return None
+
+    # Runs executed at the same time: busy time over elapsed time
+    finished = [ (str_to_date(r["finish_date"]), _get_time(r)) for r in runs if r["status"] == "finished" ]
+    finished = [ (d, t) for d, t in finished if isinstance(d, datetime) and t ]
+    concurrency = 1.0
+    if len(finished) > 1:
+        start = min(d.timestamp() - t for d, t in finished)
+        end = max(d.timestamp() for d, _ in finished)
+        if end > start:
+            concurrency = max(1.0, sum(t for _, t in finished) / (end - start))
+    return sum(costs) / concurrency
+
+
+def _get_time(run):
+    if run.get("status") != "finished" or not run.get("results"):
+        return None
+    return run["results"].get("time")
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _feature_names(parameters_list):
+    numeric, categories = set(), set()
+    for parameters in parameters_list:
+        for name, value in parameters.items():
+            if _is_number(value):
+                numeric.add(name)
+            else:
+                categories.add((name, str(value)))
+
+    # Numeric parameters are (name, None), categorical ones (name, value)
+    features = [ (name, None) for name in sorted(numeric) ]
+    features += [ (name, value) for name, value in sorted(categories) if name not in numeric ]
+    # Budget of the run
+    features.append((None, None))
+    return features
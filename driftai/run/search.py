@@ -0,0 +1,741 @@
+import warnings
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+import numpy as np
+
+from driftai.db.run_index import config_hash
+from driftai.parameters import ParameterGrid, CategoricalParameter, LogUniformParameter
+
+Trial = namedtuple("Trial", ["configuration", "budget", "sets"])
+Trial.__new__.__defaults__ = (None, None)
+Trial.__doc__ = """
+Configuration proposed by a search: its parameters, the budget it runs with
+(fraction of the training rows, None to use all of them) and the subdataset
+sets it runs on (None to run on all of them)
+"""
+
+
+class AbstractSearch(ABC):
+    """
+    Adaptive search space: proposes the next runs from the metric values of the
+    finished ones, following an ask/tell protocol::
+
+        trial = search.ask()
+        ...  # Run the trial
+        search.tell(trial.configuration, value, trial.budget)
+
+    Return a search from `RunnableApproach.search_space` and the runner drives it:
+    every trial is run on its subdataset sets and its value is the mean of the
+    `metric` over them. Up to `parallelism` trials are pending at the same time.
+    They run in parallel only if the runner does, with SingleRunner `parallelism`
+    is only the number of trials asked before telling their values.
+    """
+
+    def __init__(self, metric, n_runs, minimize=False, parallelism=1, seed=None):
+        """
+        Parameters
+        ----------
+        metric: str
+            Name of the metric to optimize. It must be one of the approach metrics
+        n_runs: int
+            Number of configurations, the run budget of the search
+        minimize: bool, optional
+            If True lower metric values are better (for example errors)
+        parallelism: int, optional
+            Number of configurations asked at the same time. Pool runners run
+            them in parallel, SingleRunner runs them one after another
+        seed: int, optional
+            Seed of the random generator
+        """
+        self.metric = metric
+        self.n_runs = n_runs
+        self.minimize = minimize
+        self.parallelism = parallelism
+        self.random_state = np.random.RandomState(seed)
+        # Finished configurations and their objective values, lower is better
+        self._history = []
+
+    def start(self, sets):
+        """
+        Called by the runner before asking the first trial
+
+        Parameters
+        ----------
+        sets: list of str
+            Subdataset sets of the approach
+        """
+        pass
+
+    @abstractmethod
+    def ask(self):
+        """
+        Get the next trial to run
+
+        Returns
+        -------
+        Trial or None
+            None if the search has finished or no trial can be proposed until
+            the pending ones finish
+        """
+        pass
+
+    @abstractmethod
+    def tell(self, configuration, value, budget=None):
+        """
+        Register the metric value of a finished trial
+
+        Parameters
+        ----------
+        configuration: dict
+            Parameter values by parameter name
+        value: float
+            Metric value of the trial. None if its runs have not finished
+        budget: float, optional
+            Budget the trial has run with
+        """
+        pass
+
+    def best(self):
+        """
+        Get the best finished configuration
+
+        Returns
+        -------
+        tuple
+            ``(configuration, metric value)``, None if no configuration has finished
+        """
+        if not self._history:
+            return None
+        configuration, objective = min(self._history, key=lambda h: h[1])
+        return configuration, objective if self.minimize else -objective
+
+    def _objective(self, value):
+        return value if self.minimize else -value
+
+
+class ModelBasedSearch(AbstractSearch):
+    """
+    Search proposing each configuration with a model of the finished ones.
+    Pending configurations are taken into account when proposing new ones so
+    concurrent configurations do not explore the same region twice.
+    """
+
+    # Attempts to propose a configuration which has not been proposed before
+    MAX_TRIES = 20
+
+    def __init__(self, parameters, metric, n_runs, minimize=False, parallelism=1,
+                 n_initial=10, seed=None):
+        """
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+        metric: str
+            Name of the metric to optimize. It must be one of the approach metrics
+        n_runs: int
+            Number of configurations, the run budget of the search
+        minimize: bool, optional
+            If True lower metric values are better (for example errors)
+        parallelism: int, optional
+            Number of configurations asked at the same time. Pool runners run
+            them in parallel, SingleRunner runs them one after another
+        n_initial: int, optional
+            Number of random configurations drawn before using the model
+        seed: int, optional
+            Seed of the random generator
+        """
+        super().__init__(metric, n_runs, minimize, parallelism, seed)
+        self.parameters = parameters
+        self.n_initial = n_initial
+        self._points = []
+        self._pending = {}
+        self._seen = set()
+
+    @abstractmethod
+    def propose(self, points, values, pending):
+        """
+        Propose the next configuration as a point of the unit hypercube
+
+        Parameters
+        ----------
+        points: np.array of shape (n_finished, n_parameters)
+            Finished configurations
+        values: np.array of shape (n_finished)
+            Objective of the finished configurations, lower is better
+        pending: np.array of shape (n_pending, n_parameters)
+            Configurations which are running
+
+        Returns
+        -------
+        np.array of shape (n_parameters)
+        """
+        pass
+
+    @property
+    def n_configurations(self):
+        """Number of finished and pending configurations"""
+        return len(self._history) + len(self._pending)
+
+    def ask(self):
+        if self.n_configurations >= self.n_runs:
+            return None
+
+        for attempt in range(self.MAX_TRIES):
+            # Random configurations are drawn as well when the model keeps proposing known ones
+            if self.n_configurations < self.n_initial or len(self._history) < 2 \
+                    or attempt >= self.MAX_TRIES // 2:
+                point = self.random_state.random_sample(len(self.parameters))
+            else:
+                values = np.array([ h[1] for h in self._history ])
+                pending = np.array(list(self._pending.values())).reshape(-1, len(self.parameters))
+                point = self.propose(np.array(self._points), values, pending)
+
+            configuration = self._to_configuration(point)
+            key = config_hash(configuration)
+            if key not in self._seen:
+                self._seen.add(key)
+                self._pending[key] = self._to_point(configuration)
+                return Trial(configuration)
+
+        if not self._pending:
+            # Nothing left to wait for, the search ends before its run budget
+            warnings.warn("Search space exhausted: no new configuration found in {} attempts after {} "
+                          "configurations, fewer than n_runs={}".format(self.MAX_TRIES, len(self._history),
+                                                                        self.n_runs))
+        return None
+
+    def tell(self, configuration, value, budget=None):
+        key = config_hash(configuration)
+        point = self._pending.pop(key, None)
+        self._seen.add(key)
+        if value is None:
+            return
+
+        if point is None:
+            point = self._to_point(configuration)
+        self._points.append(point)
+        self._history.append((configuration, self._objective(value)))
+
+    def _to_configuration(self, point):
+        return dict([(param.name, param.from_unit(u)) for param, u in zip(self.parameters, point)])
+
+    def _to_point(self, configuration):
+        return np.array([param.to_unit(configuration[param.name]) for param in self.parameters])
+
+
+class GPSearch(ModelBasedSearch):
+    """
+    Bayesian optimization with a Gaussian process surrogate.
+
+    The next configuration maximizes the expected improvement among random
+    candidates. Pending configurations are added to the surrogate with the mean
+    of the observed values (constant liar), so concurrent proposals spread out.
+    """
+
+    def __init__(self, parameters, metric, n_runs, n_candidates=1000, **kwargs):
+        """
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+        metric: str
+            Name of the metric to optimize
+        n_runs: int
+            Number of configurations
+        n_candidates: int, optional
+            Number of random candidates evaluated by the acquisition function
+        kwargs: dict
+            See `ModelBasedSearch`
+        """
+        super().__init__(parameters, metric, n_runs, **kwargs)
+        self.n_candidates = n_candidates
+
+    def propose(self, points, values, pending):
+        from scipy.stats import norm
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.exceptions import ConvergenceWarning
+        from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+        X, y = points, values
+        if len(pending):
+            X = np.vstack([points, pending])
+            y = np.concatenate([values, np.full(len(pending), values.mean())])
+
+        kernel = ConstantKernel() * Matern(length_scale=np.full(points.shape[1], 0.5), nu=2.5) \
+                 + WhiteKernel(noise_level=1e-3, noise_level_bounds=(1e-10, 1e-1))
+        gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=self.random_state)
+        with warnings.catch_warnings():
+            # Hyperparameters reaching their bounds are expected with few configurations
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            gp.fit(X, y)
+
+        candidates = self.random_state.random_sample((self.n_candidates, points.shape[1]))
+        mu, sigma = gp.predict(candidates, return_std=True)
+        improvement = values.min() - mu
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = improvement / sigma
+            ei = improvement * norm.cdf(z) + sigma * norm.pdf(z)
+        ei[sigma <= 0] = 0
+        return candidates[int(np.argmax(ei))]
+
+
+class TPESearch(ModelBasedSearch):
+    """
+    Tree-structured Parzen estimator.
+
+    Finished configurations are split in good (the `gamma` best) and bad ones,
+    and a density is estimated for each group. The next configuration maximizes
+    the ratio between both densities among candidates drawn from the good one.
+    Pending configurations are counted as bad, so concurrent proposals spread out.
+    """
+
+    def __init__(self, parameters, metric, n_runs, gamma=0.25, n_candidates=24, **kwargs):
+        """
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+        metric: str
+            Name of the metric to optimize
+        n_runs: int
+            Number of configurations
+        gamma: float, optional
+            Fraction of the finished configurations considered good
+        n_candidates: int, optional
+            Number of candidates drawn from the good configurations density
+        kwargs: dict
+            See `ModelBasedSearch`
+        """
+        super().__init__(parameters, metric, n_runs, **kwargs)
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+
+    def propose(self, points, values, pending):
+        n_good = max(1, int(np.ceil(self.gamma * len(values))))
+        order = np.argsort(values)
+        good, bad = points[order[:n_good]], points[order[n_good:]]
+        bad = np.vstack([bad, pending])
+
+        bw_good = _bandwidth(good)
+        centers = good[self.random_state.randint(len(good), size=self.n_candidates)]
+        candidates = centers + self.random_state.normal(size=centers.shape) * bw_good
+        candidates = np.clip(candidates, 0, np.nextafter(1, 0))
+
+        score = _log_parzen(candidates, good, bw_good) - _log_parzen(candidates, bad, _bandwidth(bad))
+        return candidates[int(np.argmax(score))]
+
+
+class Hyperband(AbstractSearch):
+    """
+    Hyperband: successive halving over several brackets.
+
+    Each bracket draws configurations from a search space and runs them with a
+    small budget. Only the best ``1 / eta`` of them are promoted to the next rung,
+    which runs them with an ``eta`` times larger budget, until the maximum budget
+    is reached. Brackets trade off the number of configurations against their
+    initial budget.
+
+    The budget is either the fraction of the training rows of the runs, or the
+    value of a `resource` parameter of the approach such as epochs or ``n_estimators``.
+    """
+
+    def __init__(self, search_space, metric, min_budget, max_budget=1.0, eta=3,
+                 resource=None, brackets=None, minimize=False, parallelism=1, seed=None):
+        """
+        Parameters
+        ----------
+        search_space: ParameterGrid or AbstractSampler
+            Configurations to choose from. It must not contain the resource parameter
+        metric: str
+            Name of the metric to optimize. It must be one of the approach metrics
+        min_budget: float
+            Budget of the first rung
+        max_budget: float, optional
+            Budget of the last rung. By default all the training rows
+        eta: int, optional
+            Inverse of the fraction of configurations promoted to the next rung
+        resource: str, optional
+            Name of the approach parameter receiving the budget, rounded to an
+            integer. If not set the budget is the fraction of the training rows
+        brackets: int, optional
+            Number of brackets, by default all of them. With 1 bracket the search
+            is a single successive halving
+        minimize: bool, optional
+            If True lower metric values are better (for example errors)
+        parallelism: int, optional
+            Number of configurations asked at the same time. Pool runners run
+            them in parallel, SingleRunner runs them one after another
+        seed: int, optional
+            Seed of the random generator
+        """
+        self.search_space = search_space
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.eta = eta
+        self.resource = resource
+
+        s_max = int(np.floor(np.log(max_budget / min_budget) / np.log(eta) + 1e-9))
+        n_brackets = min(brackets or s_max + 1, s_max + 1)
+        # Number of configurations of each rung, for each bracket
+        self._brackets = []
+        for s in range(s_max, s_max - n_brackets, -1):
+            n = int(np.ceil((s_max + 1) / (s + 1) * eta ** s))
+            rungs = [ (max(1, int(n * eta ** -i)), self._budget(max_budget * eta ** (i - s)))
+                      for i in range(s + 1) ]
+            self._brackets.append(rungs)
+
+        n_runs = sum(min(n, len(search_space)) for rungs in self._brackets for n, _ in rungs)
+        super().__init__(metric, n_runs, minimize, parallelism, seed)
+
+        self._bracket = -1
+        self._rung = 0
+        self._configurations = []
+        self._queue = []
+        self._pending = set()
+        # Objective of every finished (configuration, budget)
+        self._results = {}
+
+    def ask(self):
+        while True:
+            if self._queue:
+                configuration = self._queue.pop(0)
+                budget = self._brackets[self._bracket][self._rung][1]
+                key = (config_hash(configuration), budget)
+                # Configurations which have already run, for example when resuming, are not run again
+                if key not in self._results:
+                    self._pending.add(key)
+                    return self._trial(configuration, budget)
+            elif self._pending:
+                return None
+            elif not self._next_rung():
+                return None
+
+    def tell(self, configuration, value, budget=None):
+        if self.resource is not None:
+            configuration = dict(configuration)
+            budget = configuration.pop(self.resource)
+
+        key = (config_hash(configuration), budget)
+        self._pending.discard(key)
+        if value is None:
+            # Failed and timed out configurations lose the rung, they are neither run again nor promoted
+            self._results[key] = np.inf
+            return
+
+        self._results[key] = self._objective(value)
+        if budget == self._budget(self.max_budget):
+            self._history.append((configuration, self._results[key]))
+
+    def _next_rung(self):
+        if self._bracket >= 0 and self._rung + 1 < len(self._brackets[self._bracket]):
+            # Promote the best configurations of the finished rung
+            budget = self._brackets[self._bracket][self._rung][1]
+            finished = [ c for c in self._configurations
+                         if self._results.get((config_hash(c), budget), np.inf) < np.inf ]
+            finished.sort(key=lambda c: self._results[(config_hash(c), budget)])
+            self._rung += 1
+            self._configurations = finished[:self._brackets[self._bracket][self._rung][0]]
+        elif self._bracket + 1 < len(self._brackets):
+            self._bracket += 1
+            self._rung = 0
+            self._configurations = self._sample(self._brackets[self._bracket][0][0])
+        else:
+            return False
+
+        self._queue = list(self._configurations)
+        return True
+
+    def _sample(self, n):
+        # Distinct configurations drawn from the search space
+        n_space = len(self.search_space)
+        if n >= n_space:
+            return list(self.search_space)
+        indices = []
+        seen = set()
+        while len(indices) < n:
+            i = min(int(self.random_state.random_sample() * n_space), n_space - 1)
+            if i not in seen:
+                seen.add(i)
+                indices.append(i)
+        return [ self.search_space[i] for i in indices ]
+
+    def _budget(self, budget):
+        if self.resource is not None:
+            return int(round(budget))
+        return float(budget)
+
+    def _trial(self, configuration, budget):
+        if self.resource is not None:
+            configuration = dict(configuration)
+            configuration[self.resource] = budget
+            return Trial(configuration)
+        return Trial(configuration, budget)
+
+
+class SuccessiveHalving(Hyperband):
+    """
+    Successive halving: Hyperband with a single bracket, which starts with the
+    largest number of configurations and the smallest budget
+    """
+
+    def __init__(self, search_space, metric, min_budget, max_budget=1.0, eta=3, resource=None, **kwargs):
+        """
+        Parameters
+        ----------
+        search_space: ParameterGrid or AbstractSampler
+            Configurations to choose from
+        metric: str
+            Name of the metric to optimize
+        min_budget: float
+            Budget of the first rung
+        max_budget: float, optional
+            Budget of the last rung
+        eta: int, optional
+            Inverse of the fraction of configurations promoted to the next rung
+        resource: str, optional
+            Name of the approach parameter receiving the budget
+        kwargs: dict
+            See `Hyperband`
+        """
+        super().__init__(search_space, metric, min_budget, max_budget, eta, resource, brackets=1, **kwargs)
+
+
+class FoldRacing(AbstractSearch):
+    """
+    Races configurations over the subdataset sets (folds).
+
+    Folds are scheduled breadth-first: the first fold of every configuration
+    runs, then the second one, and so on. After each fold, configurations
+    which are significantly worse than the current best one, according to a
+    paired t-test over the folds run so far, are eliminated and their remaining
+    folds are not run. Configurations which survive are evaluated on all the folds.
+    """
+
+    def __init__(self, search_space, metric, confidence=0.95, min_folds=2,
+                 minimize=False, parallelism=1, seed=None):
+        """
+        Parameters
+        ----------
+        search_space: ParameterGrid or AbstractSampler
+            Configurations to race
+        metric: str
+            Name of the metric to optimize. It must be one of the approach metrics
+        confidence: float, optional
+            Confidence level required to eliminate a configuration
+        min_folds: int, optional
+            Number of folds run by every configuration before eliminating any
+        minimize: bool, optional
+            If True lower metric values are better (for example errors)
+        parallelism: int, optional
+            Number of configurations asked at the same time. Pool runners run
+            them in parallel, SingleRunner runs them one after another
+        seed: int, optional
+            Seed of the random generator
+        """
+        super().__init__(metric, len(search_space), minimize, parallelism, seed)
+        self.search_space = search_space
+        self.confidence = confidence
+        self.min_folds = max(2, min_folds)
+        self._sets = []
+        self._fold = -1
+        self._alive = []
+        self._queue = []
+        self._pending = set()
+        # Objective of every (configuration, fold) which has finished
+        self._results = {}
+        self._complete = set()
+
+    def start(self, sets):
+        self._sets = list(sets)
+
+    def ask(self):
+        while True:
+            if self._queue:
+                configuration = self._queue.pop(0)
+                key = config_hash(configuration)
+                if key in self._complete or (key, self._fold) in self._results:
+                    continue
+                self._pending.add(key)
+                return Trial(configuration, sets=[self._sets[self._fold]])
+            elif self._pending:
+                return None
+            elif not self._next_fold():
+                return None
+
+    def tell(self, configuration, value, budget=None):
+        key = config_hash(configuration)
+        if key not in self._pending:
+            # Result of all the folds, for example of a resumed search
+            if value is not None:
+                self._complete.add(key)
+                self._history.append((configuration, self._objective(value)))
+            return
+
+        self._pending.discard(key)
+        if value is None:
+            return
+        self._results[(key, self._fold)] = self._objective(value)
+        if self._fold == len(self._sets) - 1:
+            self._history.append((configuration, np.mean(self._values(key))))
+
+    def _next_fold(self):
+        if self._fold < 0:
+            self._alive = list(self.search_space)
+        else:
+            self._alive = [ c for c in self._alive
+                            if (config_hash(c), self._fold) in self._results ]
+            if self._fold + 1 >= self.min_folds:
+                self._eliminate()
+
+        self._fold += 1
+        if self._fold >= len(self._sets):
+            return False
+        self._queue = list(self._alive)
+        return True
+
+    def _eliminate(self):
+        from scipy.stats import t
+
+        values = dict((config_hash(c), np.array(self._values(config_hash(c)))) for c in self._alive)
+        if not values:
+            return
+        best = min(values, key=lambda k: values[k].mean())
+        n_folds = self._fold + 1
+        bound = t.ppf(self.confidence, n_folds - 1) / np.sqrt(n_folds)
+
+        survivors = []
+        for c in self._alive:
+            diff = values[config_hash(c)] - values[best]
+            # Lower confidence bound of how much worse the configuration is
+            if diff.mean() - bound * diff.std(ddof=1) <= 0:
+                survivors.append(c)
+        self._alive = survivors
+
+    def _values(self, key):
+        return [ self._results[(key, f)] for f in range(self._fold + 1) if (key, f) in self._results ]
+
+
+class GridRefinement(AbstractSearch):
+    """
+    Coarse-to-fine grid search.
+
+    The first round runs the grid of the parameters. Every following round runs
+    a denser grid around the best configuration found so far: each numeric
+    parameter takes as many values as in the first round, evenly spaced between
+    the neighbours of its best value in the previous round, and the rest of the
+    parameters are fixed to their best values. The resolution is multiplied by
+    about half the number of values of each parameter on every round.
+    """
+
+    def __init__(self, parameters, metric, rounds=3, minimize=False, parallelism=1, seed=None):
+        """
+        Parameters
+        ----------
+        parameters: list(AbstractParameter)
+            Parameters of the coarse grid
+        metric: str
+            Name of the metric to optimize. It must be one of the approach metrics
+        rounds: int, optional
+            Number of grids to run, including the coarse one
+        minimize: bool, optional
+            If True lower metric values are better (for example errors)
+        parallelism: int, optional
+            Number of configurations asked at the same time. Pool runners run
+            them in parallel, SingleRunner runs them one after another
+        seed: int, optional
+            Seed of the random generator
+        """
+        self.parameters = parameters
+        self.rounds = rounds
+        self._vectors = [ p.generate_vector() for p in parameters ]
+        n_runs = len(ParameterGrid(parameters))
+        n_refined = 1
+        for v in self._vectors:
+            # Refined vectors may have the best value besides their evenly spaced ones
+            n_refined *= len(v) + 1 if _is_numeric(v) else 1
+        super().__init__(metric, n_runs + (rounds - 1) * n_refined, minimize, parallelism, seed)
+        self._round = -1
+        self._queue = []
+        self._pending = set()
+        self._seen = set()
+
+    def ask(self):
+        while True:
+            if self._queue:
+                configuration = self._queue.pop(0)
+                key = config_hash(configuration)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self._pending.add(key)
+                return Trial(configuration)
+            elif self._pending:
+                return None
+            elif not self._next_round():
+                return None
+
+    def tell(self, configuration, value, budget=None):
+        key = config_hash(configuration)
+        self._pending.discard(key)
+        self._seen.add(key)
+        if value is not None:
+            self._history.append((configuration, self._objective(value)))
+
+    def _next_round(self):
+        if self._round + 1 >= self.rounds:
+            return False
+        if self._round >= 0:
+            best = self.best()
+            if best is None:
+                return False
+            self._vectors = [ self._refine(p, v, best[0][p.name])
+                              for p, v in zip(self.parameters, self._vectors) ]
+
+        self._round += 1
+        self._queue = list(ParameterGrid([ CategoricalParameter(p.name, v)
+                                           for p, v in zip(self.parameters, self._vectors) ]))
+        return True
+
+    def _refine(self, parameter, vector, best):
+        if not _is_numeric(vector):
+            return [best]
+
+        values = sorted(set(vector))
+        if best not in values or len(values) < 2:
+            return [best]
+        i = values.index(best)
+        low, high = values[max(i - 1, 0)], values[min(i + 1, len(values) - 1)]
+        n_values = len(parameter.generate_vector())
+        if isinstance(parameter, LogUniformParameter):
+            refined = np.geomspace(low, high, n_values)
+        else:
+            refined = np.linspace(low, high, n_values)
+
+        # The best value is kept, an even number of values does not include the middle one
+        if all(isinstance(v, int) for v in values):
+            return sorted(set(np.round(refined).astype(int).tolist()) | {best})
+        refined = refined.astype(float).tolist()
+        if not np.isclose(refined, best).any():
+            refined = sorted(refined + [best])
+        return refined
+
+
+def _is_numeric(vector):
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in vector)
+
+
+def _bandwidth(points):
+    # Scott's rule, bounded to keep exploring with few points
+    if len(points) < 2:
+        return np.full(points.shape[1], 0.5)
+    factor = len(points) ** (-1.0 / (points.shape[1] + 4))
+    return np.clip(points.std(axis=0) * factor, 0.05, 0.5)
+
+
+def _log_parzen(x, centers, bandwidth, prior_weight=1.0):
+    # Log density of a gaussian mixture centered at the points, mixed with a uniform prior
+    if len(centers) == 0:
+        return np.zeros(len(x))
+    diff = (x[:, None, :] - centers[None, :, :]) / bandwidth
+    log_kernel = (-0.5 * diff ** 2 - np.log(bandwidth * np.sqrt(2 * np.pi))).sum(axis=2)
+    max_kernel = log_kernel.max(axis=1)
+    log_sum = max_kernel + np.log(np.exp(log_kernel - max_kernel[:, None]).sum(axis=1))
+    return np.logaddexp(log_sum, np.log(prior_weight)) - np.log(len(centers) + prior_weight)
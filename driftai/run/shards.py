@@ -0,0 +1,312 @@
+import os
+import json
+import hashlib
+import warnings
+from pathlib import Path
+
+from driftai.db import Collections, DatabaseInjector
+from driftai.parameters.samplers import AbstractSampler
+from driftai.utils import print_progress_bar
+from driftai.exceptions import OptAppRunTimeoutException
+from .runner import AbstractRunner, _format_error
+from .run_manage import RunGenerator
+from .runs import Run
+
+
+class ShardRunner(AbstractRunner):
+    """
+    Runs a slice of the runs of an approach without writing to driftai db.
+
+    The runs are split in `n_shards` disjoint shards: shard ``i`` executes the
+    runs ``i - 1``, ``i - 1 + n_shards``, ``i - 1 + 2 * n_shards``... of the search
+    space. Finished runs are appended to a results file of the shard, so shards
+    can run at the same time in machines sharing the project directory.
+    Fold the shard results into driftai db with `merge_shards` (``driftai merge``).
+
+    The first line of a results file identifies the runs it has been split
+    from, see `run_space_hash`, and the number of shards.
+    """
+
+    def __init__(self, shard, n_shards, timeout=None, cpu_timeout=None, retry=None):
+        """
+        Parameters
+        ----------
+        shard: int
+            Shard to execute, from 1 to `n_shards`
+        n_shards: int
+            Number of shards
+        timeout: float, optional
+            Wall clock time limit of each run in seconds
+        cpu_timeout: float, optional
+            CPU time limit of each run in seconds
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors
+        """
+        if not 1 <= shard <= n_shards:
+            raise ValueError("Shard must be between 1 and {}".format(n_shards))
+        self.shard = shard
+        self.n_shards = n_shards
+        self.timeout = timeout
+        self.cpu_timeout = cpu_timeout
+        self.retry = retry
+
+    def run(self, runnable_approach, resume=False):
+        """
+        Executes the runs of the shard
+
+        Parameters
+        ----------
+        runnable_approach: RunnableApproach
+        resume: bool
+            If True only the runs missing from the shard results are executed,
+            so a failed shard can be executed again alone
+        """
+        # Limits which can not be enforced fail before executing any run
+        self.limits(runnable_approach)
+
+        search_space = runnable_approach.search_space
+        if isinstance(search_space, AbstractSampler) and search_space.seed is None:
+            raise ValueError("Shards must draw the same configurations, set the seed of the sampler")
+
+        # Every shard generates the same runs, in the same order
+        runs = RunGenerator.lazy_runs(runnable_approach)
+        indices = range(self.shard - 1, len(runs), self.n_shards)
+
+        header = {"run_space": run_space_hash(runs), "n_runs": len(runs), "n_shards": self.n_shards}
+        path = shard_path(runnable_approach.approach.id, self.shard, self.n_shards)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            _drop_partial_line(path)
+        if resume and read_shard_header(path) != header:
+            print("The runs of the approach have changed, executing the whole shard...")
+            resume = False
+        if resume:
+            done = set(info["id"] for info in read_shard(path))
+        else:
+            print("Removing previous shard results...")
+            with open(str(path), "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+            done = set()
+
+        print("Running shard {}/{}...".format(self.shard, self.n_shards))
+        n_done = len(done)
+        print_progress_bar(n_done, len(indices))
+        with open(str(path), "a", encoding="utf-8") as f:
+            for index in indices:
+                run = runs[index]
+                if run.id in done:
+                    continue
+                try:
+                    run.results = self.evaluate(runnable_approach, run)
+                except OptAppRunTimeoutException:
+                    run.status = "timeout"
+                except Exception as e:
+                    run.status = "failed"
+                    run.error = _format_error(e)
+
+                # One line per run, written at once so a killed shard leaves whole lines
+                f.write(json.dumps(run.get_info()) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                n_done += 1
+                print_progress_bar(n_done, len(indices))
+
+
+def shard_path(approach_id, shard, n_shards):
+    """
+    Location of the results file of a shard
+
+    Parameters
+    ----------
+    approach_id: str
+        Approach unique identifier
+    shard: int
+        Shard number, from 1 to `n_shards`
+    n_shards: int
+        Number of shards
+
+    Returns
+    -------
+    pathlib.Path
+    """
+    return Path(DatabaseInjector.project_path(), "project_files", "shards", approach_id,
+                "shard-{}-of-{}.jsonl".format(shard, n_shards))
+
+
+def run_space_hash(runs):
+    """
+    Hash identifying the runs of an approach split in shards. It depends on the
+    number of runs and the ids of up to 64 runs evenly spaced among them, so
+    it is computed without creating every run
+
+    Parameters
+    ----------
+    runs: LazyRuns
+
+    Returns
+    -------
+    str
+    """
+    h = hashlib.md5(str(len(runs)).encode("utf-8"))
+    for index in sorted(set(i * len(runs) // 64 for i in range(64))):
+        if index < len(runs):
+            h.update(runs[index].id.encode("utf-8"))
+    return h.hexdigest()
+
+
+def read_shard_header(path):
+    """
+    Read the first line of a shard results file
+
+    Parameters
+    ----------
+    path: str
+        Shard results file location
+
+    Returns
+    -------
+    dict or None
+        ``{"run_space": <run space hash>, "n_runs": <number of runs>, "n_shards": <number of shards>}``.
+        None if the file does not exist or has no header
+    """
+    if not Path(path).exists():
+        return None
+    with open(str(path), encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+    return header if "run_space" in header else None
+
+
+def read_shard(path):
+    """
+    Read the runs stored in a shard results file
+
+    Parameters
+    ----------
+    path: str
+        Shard results file location
+
+    Returns
+    -------
+    list of dict
+        Runs summaries as returned by `Run.get_info`
+    """
+    if not Path(path).exists():
+        return []
+
+    infos = []
+    with open(str(path), encoding="utf-8") as f:
+        for line in f:
+            try:
+                info = json.loads(line)
+            except ValueError:
+                # Line of a shard killed while writing it
+                continue
+            if "run_space" not in info:
+                infos.append(info)
+    return infos
+
+
+def _drop_partial_line(path):
+    # A shard killed while writing a run leaves an incomplete last line
+    if not path.exists():
+        return
+    with open(str(path), "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+def parse_shard(shard):
+    """
+    Parse a shard specification
+
+    Parameters
+    ----------
+    shard: str
+        Shard and number of shards. For example: ``"2/8"``
+
+    Returns
+    -------
+    tuple of int
+        ``(shard, n_shards)``
+    """
+    try:
+        shard, n_shards = (int(s) for s in shard.split("/"))
+    except ValueError:
+        raise ValueError("Shard must be specified as i/N, for example 2/8")
+    if not 1 <= shard <= n_shards:
+        raise ValueError("Shard must be between 1 and {}".format(n_shards))
+    return shard, n_shards
+
+
+def merge_shards(runnable_approach, n_shards=None, batch_size=10000):
+    """
+    Store the runs of an approach in driftai db with the results of its shards.
+    Every run is stored, as ``waiting`` if no shard has executed it, so
+    the runs missing from the shards can be resumed. Merging the same results
+    again has no effect
+
+    Shard results files of other runs, for example of a previous search space,
+    or split in another number of shards are skipped
+
+    Parameters
+    ----------
+    runnable_approach: RunnableApproach
+    n_shards: int, optional
+        Number of shards. By default the number of shards of the last shard executed
+    batch_size: int, optional
+        Number of runs stored at once
+
+    Returns
+    -------
+    int
+        Number of merged shard results
+    """
+    approach = runnable_approach.approach
+    runs = RunGenerator.lazy_runs(runnable_approach)
+    run_space = run_space_hash(runs)
+
+    paths = []
+    shards_dir = shard_path(approach.id, 1, 1).parent
+    # Later shard files win, so results of a re-executed shard replace the old ones
+    for path in sorted(shards_dir.glob("shard-*.jsonl"), key=lambda p: p.stat().st_mtime):
+        header = read_shard_header(path)
+        if header is None or header["run_space"] != run_space or header["n_runs"] != len(runs):
+            warnings.warn("Skipping {}, its runs are not the runs of the approach".format(path.name))
+            continue
+        paths.append((path, header["n_shards"]))
+    if n_shards is None and paths:
+        n_shards = paths[-1][1]
+
+    infos = {}
+    for path, path_n_shards in paths:
+        if path_n_shards != n_shards:
+            warnings.warn("Skipping {}, the runs are split in {} shards".format(path.name, n_shards))
+            continue
+        for info in read_shard(path):
+            infos[info["id"]] = info
+
+    runs_collection = Collections.runs(approach.id)
+    stored = dict((r["id"], r) for r in runs_collection.all())
+    for start in range(0, len(runs), batch_size):
+        new_runs = []
+        for run in runs[start:start + batch_size]:
+            info = infos.get(run.id)
+            if info is not None:
+                if stored.get(run.id) == info:
+                    continue
+                run = Run.load_from_data(dict(info), subdataset=approach.subdataset)
+            if run.id in stored:
+                if info is not None:
+                    run.persisted_status = stored[run.id]["status"]
+                    runs_collection.update(run)
+            else:
+                new_runs.append(run)
+        runs_collection.save_many(new_runs)
+
+    # Fold the run changes into the database
+    Collections.approaches().compact()
+    return len(infos)
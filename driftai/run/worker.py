@@ -0,0 +1,113 @@
+import os
+import time
+import socket
+import threading
+
+from driftai.db import DatabaseInjector
+from driftai.exceptions import OptAppRunTimeoutException
+from .runner import SingleRunner, load_runnable_approach, check_limits, _format_error
+from .runs import Run
+
+
+class Worker(object):
+    """
+    Executes the runs queued by a `CloudRunner` coordinator.
+
+    The worker leases runs from the project's `RunQueue`, executes them and
+    reports their results. While a run executes its lease is renewed, so if
+    the worker dies the run is leased again by another worker once the lease expires.
+    """
+
+    def __init__(self, lease_time=60, poll_interval=1.0, max_idle=None, worker_id=None,
+                 timeout=None, cpu_timeout=None, retry=None):
+        """
+        Parameters
+        ----------
+        lease_time: float, optional
+            Seconds a run is reserved for the worker without renewing its lease
+        poll_interval: float, optional
+            Seconds between checks of the queue when it is empty
+        max_idle: float, optional
+            Seconds the worker waits for new runs before stopping. By default it never stops
+        worker_id: str, optional
+            Worker unique identifier. By default the host name and the process id
+        timeout: float, optional
+            Wall clock time limit of each run in seconds, unless the approach sets its own
+        cpu_timeout: float, optional
+            CPU time limit of each run in seconds, unless the approach sets its own
+        retry: RetryPolicy, optional
+            Policy executing again the runs failing with transient errors
+        """
+        self.lease_time = lease_time
+        self.poll_interval = poll_interval
+        self.max_idle = max_idle
+        self.worker_id = worker_id or "{}-{}".format(socket.gethostname(), os.getpid())
+        self._runner = SingleRunner(*check_limits(timeout, cpu_timeout), retry=retry)
+        # Runnable approaches already imported by the worker
+        self._approaches = {}
+
+    def work(self):
+        """
+        Execute runs until the worker has been idle for `max_idle` seconds
+
+        Returns
+        -------
+        int
+            Number of executed runs
+        """
+        run_queue = DatabaseInjector.run_queue()
+        n_runs = 0
+        idle_since = time.time()
+        while True:
+            task = run_queue.lease(self.worker_id, self.lease_time)
+            if task is None:
+                if self.max_idle is not None and time.time() - idle_since >= self.max_idle:
+                    return n_runs
+                time.sleep(self.poll_interval)
+                continue
+
+            self.execute(task)
+            n_runs += 1
+            idle_since = time.time()
+
+    def execute(self, task):
+        """
+        Execute a leased run and report its result
+
+        Parameters
+        ----------
+        task: dict
+            Run leased from the queue, see `RunQueue.lease`
+        """
+        run_queue = DatabaseInjector.run_queue()
+        approach_id, run_id = task["approach_id"], task["run_id"]
+
+        stop = threading.Event()
+        def renew():
+            while not stop.wait(self.lease_time / 3):
+                if not DatabaseInjector.run_queue().renew(approach_id, run_id, self.worker_id, self.lease_time):
+                    return
+        heartbeat = threading.Thread(target=renew, daemon=True)
+        heartbeat.start()
+
+        try:
+            runnable_approach = self._get_approach(task)
+            approach = runnable_approach.approach
+            run = Run(approach_id=approach.id, subdataset=approach.subdataset, subdataset_set=task["subdataset_set"],
+                      run_parameters=task["run_parameters"], check_exists=False, budget=task["budget"])
+            result = self._runner.evaluate(runnable_approach, run)
+        except OptAppRunTimeoutException as e:
+            run_queue.time_out(approach_id, run_id, str(e))
+        except Exception as e:
+            run_queue.fail(approach_id, run_id, _format_error(e))
+        else:
+            run_queue.complete(approach_id, run_id, result.get_info())
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def _get_approach(self, task):
+        key = (task["approach_id"], task["module"], task["name"])
+        if key not in self._approaches:
+            self._approaches[key] = load_runnable_approach(task["module"], task["name"])
+        return self._approaches[key]
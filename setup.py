@@ -19,6 +19,9 @@ setup(
         "tinydb",
         "pillow",
     ],
+    extras_require={
+        "dask": ["dask[distributed]"],
+    },
     include_package_data=True,
     keywords='machine-learning ml framework automatization optimization',
     packages=find_packages(exclude=['test', 'test.*']),
@@ -2,6 +2,8 @@ import unittest
 from pathlib import Path
 import shutil
 
+from tinydb import where
+
 from test import testenv
 
 from driftai import set_project_path
@@ -42,5 +44,84 @@ class ApproachTest(unittest.TestCase):
             self.assertIsInstance(run, Run)
         return runs
 
+    def test_load_status_without_loading_runs(self):
+        runs = self.test_get_subdataset_runs()
+        runs[0].status = "finished"
+        runs[0].update()
+
+        status = Approach.load_status(self.approach.id)
+        self.assertEqual(status, Approach.load(self.approach.id).status)
+        self.assertEqual(status["done_runs"], 1)
+        self.assertEqual(status["total_runs"], len(runs))
+
+    def test_runs_projection_queries(self):
+        runs = self.test_get_subdataset_runs()
+        runs_collection = Run.collection(self.approach.id)
+
+        self.assertEqual(runs_collection.count_by_status(), {"waiting": len(runs)})
+        self.assertEqual(sorted(runs_collection.list_ids()), sorted(r.id for r in runs))
+
+        projection = runs_collection.project("id", "run_parameters.C")
+        self.assertEqual(len(projection), len(runs))
+        for run_id, c in projection:
+            self.assertIsInstance(run_id, str)
+            self.assertIn(c, [1.0, 3.0])
+
+    def test_archive_finished_approach(self):
+        runs = self.test_get_subdataset_runs()
+
+        # Approaches with pending runs are not archived
+        self.assertFalse(Approach.collection().archive(self.approach.id))
+
+        for run in runs:
+            run.status = "finished"
+            run.update()
+        self.assertTrue(Approach.collection().archive(self.approach.id))
+
+        data = Approach.collection().collection.get(where("id") == self.approach.id)
+        self.assertEqual(data["runs"], [])
+        self.assertEqual(Approach.load_status(self.approach.id)["done_runs"], len(runs))
+
+        # Runs are read from the archive when accessed
+        approach = Approach.load(self.approach.id)
+        self.assertEqual(sorted(r.id for r in approach.runs), sorted(r.id for r in runs))
+
+        # Updating the approach moves the runs back to the database
+        approach.update()
+        data = Approach.collection().collection.get(where("id") == self.approach.id)
+        self.assertEqual(len(data["runs"]), len(runs))
+        self.assertIsNone(data["archive"])
+
+    def test_update_archived_runs(self):
+        runs = self.test_get_subdataset_runs()
+        for run in runs:
+            run.status = "finished"
+            run.update()
+        Approach.collection().archive(self.approach.id)
+
+        run = Run.load(self.approach.id, runs[0].id)
+        run.status = "waiting"
+        run.update()
+        # The change is folded into the archive, not dropped
+        Approach.collection().compact()
+        data = Approach.collection().collection.get(where("id") == self.approach.id)
+        self.assertEqual(data["runs"], [])
+        self.assertEqual(Run.load(self.approach.id, run.id).status, "waiting")
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(runs_collection.count_by_status(), {"finished": len(runs) - 1, "waiting": 1})
+        self.assertEqual([r.id for r in runs_collection.get_pending()], [run.id])
+
+    def test_unarchive_approach(self):
+        runs = self.test_get_subdataset_runs()
+        for run in runs:
+            run.status = "finished"
+            run.update()
+        Approach.collection().archive(self.approach.id)
+        Approach.collection().unarchive(self.approach.id)
+
+        data = Approach.collection().collection.get(where("id") == self.approach.id)
+        self.assertEqual(len(data["runs"]), len(runs))
+        self.assertEqual(len(Approach.load(self.approach.id).runs), len(runs))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,164 @@
+import os
+import unittest
+import shutil
+import threading
+import multiprocessing
+
+from driftai.run import Run
+from driftai.data import Dataset, SubDataset
+from driftai.db import Collections, DatabaseInjector
+from driftai import Approach, Project, set_project_path
+
+from test import testenv
+
+def _finish_runs(approach_id, run_ids):
+    for run_id in run_ids:
+        run = Run.load(approach_id, run_id)
+        run.status = "finished"
+        run.update()
+    DatabaseInjector.event_log().flush()
+
+def _insert_doc(project_path, i):
+    set_project_path(project_path)
+    DatabaseInjector.db().table("test_table").insert({"i": i})
+
+class DatabaseTest(unittest.TestCase):
+    def setUp(self):
+        set_project_path(testenv.MOCK_PROJECT_PATH)
+
+        self.p = Project(path=testenv.TEST_PATH, name=testenv.MOCK_PROJECT_NAME)
+        self.ds = Dataset.read_file(path=testenv.MOCK_DATASET)
+        self.ds.save()
+
+        self.sbds = SubDataset(self.ds, method="k_fold", by=5)
+        self.sbds.save()
+
+        self.approach = Approach(self.p, "test_approach", self.sbds)
+        shutil.copyfile(testenv.APPROACH_EXAMPLE, str(self.approach.script_path))
+        self.approach.save()
+
+    def tearDown(self):
+        testenv.delete_mock_projects()
+
+    def test_concurrent_threads_writes(self):
+        table = DatabaseInjector.db().table("test_table")
+
+        def insert_docs(thread_id):
+            for i in range(20):
+                table.insert({"thread": thread_id, "i": i})
+
+        threads = [threading.Thread(target=insert_docs, args=(t,)) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(table), 80)
+
+    def test_inserts_through_several_handles(self):
+        db = DatabaseInjector.db()
+        table = db.table("test_table")
+        table.insert({"i": 0})
+        with db.reading():
+            # The handle of the first insert is busy, the next one uses another handle
+            table.insert({"i": 1})
+        table.insert({"i": 2})
+
+        # Another process sharing the database
+        p = multiprocessing.Process(target=_insert_doc, args=(testenv.MOCK_PROJECT_PATH, 3))
+        p.start()
+        p.join()
+        self.assertEqual(p.exitcode, 0)
+        table.insert({"i": 4})
+
+        docs = table.all()
+        self.assertEqual(sorted(d["i"] for d in docs), list(range(5)))
+        self.assertEqual(len(set(d.doc_id for d in docs)), 5)
+
+    def test_reads_do_not_wait_for_writers(self):
+        table = DatabaseInjector.db().table("test_table")
+        table.insert({"i": 0})
+
+        locked = threading.Event()
+        release = threading.Event()
+        def hold_write_lock():
+            with DatabaseInjector.db().exclusive():
+                locked.set()
+                release.wait(10)
+
+        writer = threading.Thread(target=hold_write_lock)
+        writer.start()
+        locked.wait(10)
+        try:
+            # Readers see the last snapshot while the writer holds the lock
+            self.assertEqual(len(table), 1)
+            self.assertFalse(release.is_set())
+        finally:
+            release.set()
+            writer.join()
+
+    def test_readers_always_see_complete_snapshots(self):
+        table = DatabaseInjector.db().table("test_table")
+        table.insert({"values": []})
+        errors = []
+
+        def write_docs():
+            for i in range(50):
+                table.update({"values": list(range(i * 10))})
+
+        def read_docs():
+            try:
+                for _ in range(200):
+                    doc = table.all()[0]
+                    self.assertEqual(len(doc["values"]) % 10, 0)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write_docs)] + [threading.Thread(target=read_docs) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(table.all()[0]["values"]), 490)
+        # Temporary files of the writes are never left behind
+        self.assertEqual(list(DatabaseInjector.db().path.parent.glob("*.tmp")), [])
+
+    @unittest.skipIf(os.name == "nt", "requires POSIX permissions")
+    def test_writes_keep_file_mode(self):
+        table = DatabaseInjector.db().table("test_table")
+        db_path = str(DatabaseInjector.db().path)
+        os.chmod(db_path, 0o664)
+        table.insert({"i": 0})
+        self.assertEqual(os.stat(db_path).st_mode & 0o777, 0o664)
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(),
+                         "requires fork start method")
+    def test_concurrent_processes_run_updates(self):
+        runs = []
+        for i in range(8):
+            run = Run(approach_id=self.approach.id, subdataset=self.sbds,
+                      subdataset_set="A", run_parameters={"param": i})
+            run.save()
+            runs.append(run.id)
+
+        # Handles are opened before forking to check they are re-opened in the workers
+        Approach.load(self.approach.id)
+
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_finish_runs, args=(self.approach.id, runs[w::4]))
+                   for w in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+            self.assertEqual(w.exitcode, 0)
+
+        Collections.approaches().compact()
+        runs = Approach.load(self.approach.id).runs
+        self.assertEqual(len(runs), 8)
+        self.assertTrue(all(r.status == "finished" for r in runs))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import json
+import threading
+from unittest import mock
+import shutil
+from pathlib import Path
+
+from tinydb import where
+
+from driftai.run import Run
+from driftai.data import Dataset, SubDataset
+from driftai.db import Collections, DatabaseInjector
+from driftai import Approach, Project, set_project_path
+
+from test import testenv
+
+class RunEventLogTest(unittest.TestCase):
+    def setUp(self):
+        set_project_path(testenv.MOCK_PROJECT_PATH)
+
+        self.p = Project(path=testenv.TEST_PATH, name=testenv.MOCK_PROJECT_NAME)
+        self.ds = Dataset.read_file(path=testenv.MOCK_DATASET)
+        self.ds.save()
+
+        self.sbds = SubDataset(self.ds, method="k_fold", by=5)
+        self.sbds.save()
+
+        self.approach = Approach(self.p, "test_approach", self.sbds)
+        shutil.copyfile(testenv.APPROACH_EXAMPLE, str(self.approach.script_path))
+        self.approach.save()
+
+        self.run = Run(
+            approach_id = self.approach.id,
+            subdataset = self.sbds,
+            subdataset_set = "A",
+            run_parameters = {"param1": 1, "param2": 2},
+        )
+        self.run.save()
+
+    def tearDown(self):
+        testenv.delete_mock_projects()
+
+    def _stored_runs(self):
+        return Collections.approaches().collection.get(where("id") == self.approach.id)["runs"]
+
+    def test_update_is_appended_to_log(self):
+        self.run.status = "running"
+        self.run.update()
+
+        # Database is not rewritten but readers see the change
+        self.assertEqual(self._stored_runs()[0]["status"], "waiting")
+        self.assertEqual(Run.load(self.approach.id, self.run.id).status, "running")
+        self.assertEqual(Approach.load(self.approach.id).runs[0].status, "running")
+
+    def test_concurrent_appends_are_not_lost(self):
+        log = DatabaseInjector.event_log()
+        info = self.run.get_info()
+        def append():
+            for i in range(200):
+                log.append(self.approach.id, "update", info)
+                if i % 7 == 0:
+                    log.flush()
+        threads = [ threading.Thread(target=append) for _ in range(8) ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        log.flush()
+        with log.segment_path.open() as f:
+            self.assertEqual(len(f.readlines()), 8 * 200)
+
+    def test_approach_update_holds_the_lock(self):
+        run_index = DatabaseInjector.run_index()
+        db = Collections.approaches().db
+        locked = []
+        reindex = run_index.reindex
+        def check_lock(*args):
+            # Compaction, rewrite and reindex happen without releasing the lock
+            locked.append(db._lock._writer == threading.get_ident())
+            reindex(*args)
+        self.run.status = "running"
+        self.run.update()
+        with mock.patch.object(run_index, "reindex", check_lock):
+            Approach.load(self.approach.id).update()
+        self.assertEqual(locked, [True])
+        self.assertEqual(self._stored_runs()[0]["status"], "running")
+
+    def test_events_are_written_in_batches(self):
+        log = DatabaseInjector.event_log()
+        self.run.update()
+        self.assertFalse(log.segment_path.exists())
+
+        log.flush()
+        self.assertTrue(log.segment_path.exists())
+        self.assertEqual(len(log.events(self.approach.id)), 1)
+
+    def test_compact_folds_log_into_database(self):
+        self.run.status = "running"
+        self.run.update()
+        self.run.status = "finished"
+        self.run.update()
+
+        Collections.approaches().compact()
+
+        log = DatabaseInjector.event_log()
+        self.assertEqual(log.events(), [])
+        self.assertEqual(self._stored_runs()[0]["status"], "finished")
+
+    def test_events_ordered_by_clock(self):
+        log = DatabaseInjector.event_log()
+        self.run.status = "running"
+        self.run.update()
+        log.flush()
+
+        # A host whose clock is one hour ahead recorded the first change
+        segment = log.segment_path
+        events = [ json.loads(l) for l in segment.read_text().splitlines() ]
+        events[0]["ts"] += 3600
+        segment.write_text("".join(json.dumps(e) + "\n" for e in events))
+
+        # This process reads the change before recording a later one
+        run = Run.load(self.approach.id, self.run.id)
+        run.status = "finished"
+        run.update()
+        self.assertEqual(Run.load(self.approach.id, self.run.id).status, "finished")
+
+        Collections.approaches().compact()
+        self.assertEqual(self._stored_runs()[0]["status"], "finished")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,10 @@
 import unittest
 import shutil
 import re
+import itertools
 from pathlib import Path
 
-from driftai.parameters import ParameterGrid, FloatParameter, BoolParameter
+from driftai.parameters import ParameterGrid, FloatParameter, BoolParameter, IntParameter
 from test import testenv
 
 class ParameterGridTest(unittest.TestCase):
@@ -33,5 +34,24 @@ class ParameterGridTest(unittest.TestCase):
 
         self.assertEqual(n_combs, len(par_combs[1]))
 
+    def test_index_parameter_grid(self):
+        pg = ParameterGrid(self.pars)
+        keys, combs = pg.generate_combs()
+
+        self.assertEqual(len(pg), len(combs))
+        self.assertEqual(list(pg), [dict(zip(keys, c)) for c in combs])
+        self.assertEqual(pg[-1], dict(zip(keys, combs[-1])))
+        self.assertEqual(pg[5:50:7], [dict(zip(keys, c)) for c in combs[5:50:7]])
+        with self.assertRaises(IndexError):
+            pg[len(pg)]
+
+    def test_huge_parameter_grid(self):
+        pg = ParameterGrid([IntParameter("p{}".format(i), 0, 100, 1) for i in range(8)])
+
+        self.assertEqual(len(pg), 100 ** 8)
+        self.assertEqual(pg[123456789], {"p0": 0, "p1": 0, "p2": 0, "p3": 1,
+                                          "p4": 23, "p5": 45, "p6": 67, "p7": 89})
+        self.assertEqual(pg[-1], {"p{}".format(i): 99 for i in range(8)})
+
 if __name__ == '__main__':
     unittest.main()
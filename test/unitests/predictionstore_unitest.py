@@ -0,0 +1,50 @@
+import unittest
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from driftai.db import PredictionStore
+from test import testenv
+
+class PredictionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.path = str(Path(testenv.TEST_PATH, "predictions"))
+        self.store = PredictionStore(self.path)
+
+    def tearDown(self):
+        if Path(self.path).is_dir():
+            shutil.rmtree(self.path)
+
+    def test_put_and_get_predictions(self):
+        predictions = np.array([0, 1, 2, 1, 0])
+        key = self.store.put(predictions)
+        self.assertTrue(self.store.exists(key))
+        self.assertTrue(np.array_equal(self.store.get(key), predictions))
+
+    def test_same_predictions_same_key(self):
+        key1 = self.store.put([0.5, 1.5, 2.5])
+        key2 = self.store.put(np.array([0.5, 1.5, 2.5]))
+        self.assertEqual(key1, key2)
+
+    def test_narrow_lossless_dtypes(self):
+        ints = self.store.get(self.store.put(np.array([0, 1, 2], dtype=np.int64)))
+        self.assertEqual(ints.dtype, np.uint8)
+
+        floats = self.store.get(self.store.put(np.array([0.5, 1.25, np.nan])))
+        self.assertEqual(floats.dtype, np.float16)
+
+        precise = np.array([0.1, 0.2])
+        self.assertTrue(np.array_equal(self.store.get(self.store.put(precise)), precise))
+
+    def test_string_predictions(self):
+        predictions = ["Iris-setosa", "Iris-virginica"]
+        key = self.store.put(predictions)
+        self.assertEqual(self.store.get(key).tolist(), predictions)
+
+    def test_object_predictions_raise(self):
+        with self.assertRaises(TypeError):
+            self.store.put(np.array([{"a": 1}, None], dtype=object))
+
+if __name__ == '__main__':
+    unittest.main()
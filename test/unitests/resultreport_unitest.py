@@ -1,11 +1,15 @@
 import unittest
 import shutil
 import re
+import tracemalloc
 from pathlib import Path
 
+import numpy as np
+
 from driftai.data import Dataset, SubDataset
 from driftai.run import Run, RunGenerator
 from driftai.result_report import ResultReport, recall, precision, f1
+from driftai.result_report.result_report import MEASURES
 from driftai import Approach, Project, set_project_path
 from driftai.utils import import_from
 
@@ -56,3 +60,35 @@ class ResultReportTest(unittest.TestCase):
                          metrics = [classification_report])
         df = r.as_dataframe()       
         self.assertIsNotNone(df.classification_report[0])
+
+    def test_run_measures(self):
+        df = ResultReport(approach=Approach.load(self.approach.id), metrics=[recall]).as_dataframe()
+        self.assertTrue(all(m in df.columns for m in MEASURES))
+        self.assertTrue((df.learn_time > 0).all() and (df.inference_time > 0).all())
+        self.assertTrue((df.time >= df.load_time + df.learn_time + df.inference_time).all())
+        self.assertTrue((df.cpu_time > 0).all())
+        # The process executing the runs is shared by all of them
+        self.assertTrue(df.peak_rss.isnull().all())
+        # Allocations are only measured when tracemalloc is tracing
+        self.assertTrue(df.peak_memory.isnull().all())
+        if not hasattr(tracemalloc, "reset_peak"):
+            return
+
+        tracemalloc.start()
+        try:
+            import_from("test.lr.logistic_regression", "LogisticRegressionApproach")().run()
+        finally:
+            tracemalloc.stop()
+        df = ResultReport(approach=Approach.load(self.approach.id), metrics=[recall]).as_dataframe()
+        self.assertTrue((df.peak_memory > 0).all())
+
+    def test_predictions_are_stored_outside_database(self):
+        for run in Approach.load(self.approach.id).runs:
+            info = run.results.get_info()
+            self.assertIsNone(info["result"])
+            self.assertIsNotNone(info["predictions"])
+            self.assertEqual(len(run.results.result), 
+                             len(self.sbds.get_test_labels(run.subdataset_set)))
+        # The report keeps the memory mapped predictions
+        df = ResultReport(approach=Approach.load(self.approach.id), metrics=[recall]).as_dataframe()
+        self.assertTrue(all(isinstance(p, np.memmap) for p in df.y_pred))
@@ -1,10 +1,14 @@
 import unittest
 import shutil
 import re
+import sqlite3
+import threading
 from pathlib import Path
 
-from driftai.run import Run, RunPool
+from driftai.run import Run, RunPool, estimate_eta
+from driftai.result_report import Result
 from driftai.data import Dataset, SubDataset
+from driftai.db import DatabaseInjector
 from driftai import Approach, Project, set_project_path
 
 from test import testenv
@@ -95,5 +99,141 @@ class RunTest(unittest.TestCase):
             no_iterations = False
         self.assertTrue(no_iterations)
 
+    def test_run_counters_follow_status_changes(self):
+        runs = []
+        for i in range(3):
+            run = Run(approach_id=self.approach.id, subdataset=self.sbds,
+                      subdataset_set="A", run_parameters={"param": i})
+            run.save()
+            runs.append(run)
+
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(runs_collection.count_by_status(), {"waiting": 3})
+        self.assertEqual(runs_collection.pending_ids(), [r.id for r in runs])
+
+        runs[0].status = "running"
+        runs[0].update()
+        runs[1].status = "finished"
+        runs[1].update()
+        expected = {"waiting": 1, "running": 1, "finished": 1}
+        self.assertEqual(runs_collection.count_by_status(), expected)
+        self.assertEqual(runs_collection.pending_ids(), [runs[0].id, runs[2].id])
+
+        # Counters are kept after folding the changes into the database
+        Approach.collection().compact()
+        self.assertEqual(runs_collection.count_by_status(), expected)
+        self.assertEqual([r.id for r in runs_collection.get_pending()], [runs[0].id, runs[2].id])
+
+    def test_run_counters_with_concurrent_updates(self):
+        run = Run(approach_id=self.approach.id, subdataset=self.sbds,
+                  subdataset_set="A", run_parameters={"param": 0})
+        run.save()
+        # Another process loaded the run before this one changed it
+        stale = Run.load(self.approach.id, run.id)
+        run.status = "running"
+        run.update()
+        stale.status = "finished"
+        stale.update()
+
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(runs_collection.count_by_status(), {"finished": 1})
+        self.assertEqual(runs_collection.get_pending(), [])
+        Approach.collection().compact()
+        self.assertEqual(runs_collection.count_by_status(), {"finished": 1})
+
+    def test_query_runs_by_parameters_and_metrics(self):
+        runs = []
+        for i, accs in enumerate([(0.5, 0.7), (0.9, 0.7), (0.7, 0.7)]):
+            for subdataset_set, acc in zip(["A", "B"], accs):
+                run = Run(approach_id=self.approach.id, subdataset=self.sbds, subdataset_set=subdataset_set,
+                          run_parameters={"max_depth": i % 2, "criterion": "gini", "seed": i})
+                run.save()
+                run.status = "finished"
+                run.results = Result(1, result=[1], metrics={"accuracy": acc})
+                run.update()
+                runs.append(run)
+        # Unfinished on set B, not ranked
+        run = Run(approach_id=self.approach.id, subdataset=self.sbds, subdataset_set="A",
+                  run_parameters={"max_depth": 1, "criterion": "gini", "seed": 3})
+        run.save()
+        run.status = "finished"
+        run.results = Result(1, result=[1], metrics={"accuracy": 1.0})
+        run.update()
+
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(sorted(runs_collection.where(max_depth=0)), sorted(r.id for r in runs[:2] + runs[4:]))
+        self.assertEqual(runs_collection.where(max_depth=1, criterion="entropy"), [])
+        best = runs_collection.top_k("accuracy", k=2)
+        self.assertEqual([(p["seed"], b) for p, b, _ in best], [(1, None), (2, None)])
+        self.assertAlmostEqual(best[0][2], 0.8)
+        self.assertAlmostEqual(best[1][2], 0.7)
+        worst = runs_collection.top_k("accuracy", ascending=True)
+        self.assertEqual([p["seed"] for p, _, _ in worst], [0])
+        self.assertAlmostEqual(worst[0][2], 0.6)
+        self.assertTrue(runs_collection.has_configuration({"criterion": "gini", "max_depth": 1, "seed": 1}))
+        self.assertFalse(runs_collection.has_configuration({"criterion": "gini", "max_depth": 1, "seed": 0}))
+
+    def test_query_runs_by_typed_parameters(self):
+        ids = {}
+        for value in [True, 1, "1", None]:
+            run = Run(approach_id=self.approach.id, subdataset=self.sbds,
+                      subdataset_set="A", run_parameters={"bootstrap": value})
+            run.save()
+            ids[repr(value)] = run.id
+
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(runs_collection.where(bootstrap=True), [ids["True"]])
+        self.assertEqual(runs_collection.where(bootstrap=1), [ids["1"]])
+        self.assertEqual(runs_collection.where(bootstrap="1"), [ids["'1'"]])
+        self.assertEqual(runs_collection.where(bootstrap=None), [ids["None"]])
+
+    def test_run_index_closes_every_thread_connection(self):
+        run_index = DatabaseInjector.run_index()
+        conns = []
+        def connect():
+            conns.append(run_index._conn())
+        threads = [ threading.Thread(target=connect) for _ in range(3) ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        run_index.close()
+        for conn in conns:
+            with self.assertRaisesRegex(sqlite3.ProgrammingError, "closed"):
+                conn.execute("SELECT 1")
+        # New connections are opened after closing
+        self.assertEqual(run_index.where(self.approach.id), [])
+
+    def test_run_times_from_index(self):
+        import time
+        for i in range(6):
+            run = Run(approach_id=self.approach.id, subdataset=self.sbds, subdataset_set="A",
+                      run_parameters={"max_depth": i})
+            run.save()
+            if i < 4:
+                run.results = Result(0.1 * (i + 1), result=[1])
+                run.update()
+                time.sleep(0.01)
+
+        runs_collection = Run.collection(self.approach.id)
+        run_times = runs_collection.run_times()
+        self.assertEqual(sorted(r["status"] for r in run_times), ["finished"] * 4 + ["waiting"] * 2)
+        eta = estimate_eta(runs_collection.all())
+        self.assertIsNotNone(eta)
+        self.assertAlmostEqual(estimate_eta(run_times), eta)
+
+    def test_run_index_is_rebuilt(self):
+        run = Run(approach_id=self.approach.id, subdataset=self.sbds,
+                  subdataset_set="A", run_parameters={"max_depth": 3})
+        run.save()
+
+        # The index is derived data, a missing index file is rebuilt from driftai db
+        run_index = DatabaseInjector.run_index()
+        run_index.close()
+        run_index.path.unlink()
+        runs_collection = Run.collection(self.approach.id)
+        self.assertEqual(runs_collection.where(max_depth=3), [run.id])
+        self.assertTrue(runs_collection.has_configuration({"max_depth": 3}, status="waiting"))
+
 if __name__ == '__main__':
     unittest.main()
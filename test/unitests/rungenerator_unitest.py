@@ -4,7 +4,9 @@ import re
 from pathlib import Path
 
 from test import testenv
-from driftai.run import ParameterGrid, RunGenerator
+from driftai.run import ParameterGrid, RunGenerator, Run, SingleRunner
+from driftai.parameters import SobolSampler
+from driftai.exceptions import OptAppInstanceExistsException
 from driftai import Approach, Project, set_project_path
 from driftai.data import Dataset, SubDataset
 from driftai.utils import import_from
@@ -45,5 +47,56 @@ class RunGeneratorTest(unittest.TestCase):
         approach = Approach.load(ra.approach.id)
         self.assertEqual(len(approach.runs), len(run_gens))
 
+    def test_generate_existing_runs(self):
+        LogisticRegressionApproach = import_from("test.lr.logistic_regression", "LogisticRegressionApproach")
+        ra = LogisticRegressionApproach()
+
+        runs = RunGenerator.from_runnable_approach(ra)
+        Run.collection(ra.approach.id).save_many(runs[:3])
+        self.assertTrue(Run.collection(ra.approach.id).exists(runs[0].id))
+        self.assertFalse(Run.collection(ra.approach.id).exists(runs[3].id))
+
+        with self.assertRaises(OptAppInstanceExistsException):
+            RunGenerator.from_runnable_approach(ra)
+
+    def test_save_many_runs(self):
+        LogisticRegressionApproach = import_from("test.lr.logistic_regression", "LogisticRegressionApproach")
+        ra = LogisticRegressionApproach()
+        runs = RunGenerator.from_runnable_approach(ra)
+        runs_collection = Run.collection(ra.approach.id)
+
+        self.assertEqual(runs_collection.save_many(runs[:5]), runs[:5])
+        # Already stored runs are skipped
+        self.assertEqual(runs_collection.save_many(runs), runs[5:])
+        self.assertEqual(runs_collection.list_ids(), [r.id for r in runs])
+        self.assertEqual(runs_collection.count_by_status(), {"waiting": len(runs)})
+        self.assertEqual(len(Approach.load(ra.approach.id).runs), len(runs))
+
+    def test_lazy_runs(self):
+        LogisticRegressionApproach = import_from("test.lr.logistic_regression", "LogisticRegressionApproach")
+        ra = LogisticRegressionApproach()
+        runs = RunGenerator.from_runnable_approach(ra)
+        lazy_runs = RunGenerator.lazy_runs(ra)
+
+        self.assertEqual(len(lazy_runs), len(runs))
+        self.assertEqual([r.id for r in lazy_runs], [r.id for r in runs])
+        self.assertEqual(lazy_runs[-1].id, runs[-1].id)
+        self.assertEqual([r.id for r in lazy_runs[1::4]], [r.id for r in runs[1::4]])
+        self.assertEqual(lazy_runs[7].run_parameters, runs[7].run_parameters)
+
+    def test_generate_runs_from_sampler(self):
+        LogisticRegressionApproach = import_from("test.lr.logistic_regression", "LogisticRegressionApproach")
+        # Same approach, sampling its parameters
+        SampledApproach = type("LogisticRegressionApproach", (LogisticRegressionApproach.__wrapped__,), {
+            "search_space": property(lambda self: SobolSampler(self.parameters, n_samples=8, seed=0))
+        })
+        ra = SampledApproach(runner=SingleRunner())
+
+        runs = RunGenerator.from_runnable_approach(ra)
+        sets = self.sbds.indices["sets"]
+        # The sampled parameters only have 8 different configurations
+        self.assertEqual(len(runs), 8 * len(sets))
+        self.assertEqual(len(set(r.id for r in runs)), len(runs))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,421 @@
+import unittest
+import threading
+from unittest import mock
+import importlib.util
+import multiprocessing
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from driftai.data import Dataset, SubDataset
+from driftai.run import Run, SingleRunner, ProcessPoolRunner, ThreadPoolRunner, process_pool_run, thread_pool_run, dask_run, DaskRunner, \
+                        CloudRunner, Worker, ShardRunner, RetryPolicy, parse_shard, merge_shards
+from driftai.run.runner import evaluate_run
+from driftai.exceptions import OptAppRunTimeoutException, OptAppRunnerStalledException
+from driftai.db import DatabaseInjector
+from driftai import Approach, Project, set_project_path
+from driftai.utils import import_from
+
+from test import testenv
+
+def _work(project_path):
+    set_project_path(project_path)
+    Worker(poll_interval=0.05, max_idle=2).work()
+
+class RunnerTest(unittest.TestCase):
+    def setUp(self):
+        set_project_path(testenv.MOCK_PROJECT_PATH)
+
+        self.p = Project(path=testenv.TEST_PATH, name=testenv.MOCK_PROJECT_NAME)
+        self.ds = Dataset.read_file(path=testenv.IRIS_DATASET)
+        self.ds.save()
+
+        self.sbds = SubDataset(self.ds, method="k_fold", by=3)
+        self.sbds.save()
+
+        self.approach = Approach(self.p, "decision_tree", self.sbds, path=str(Path(testenv.TEST_PATH, "dt")))
+        shutil.copyfile(testenv.IRIS_APPROACH, str(self.approach.script_path))
+        self.approach.save()
+        self.approach_cls = import_from("test.dt.decision_tree", "DecisionTreeApproach").__wrapped__
+
+    def tearDown(self):
+        testenv.delete_mock_projects()
+
+    def assert_all_finished(self):
+        runs = Run.collection(self.approach.id).all()
+        # 4 depths x 2 criteria x 3 folds
+        self.assertEqual(len(runs), 24)
+        self.assertTrue(all(r["status"] == "finished" and r["results"]["time"] > 0 for r in runs))
+        self.assertTrue(all(r["results"]["learn_time"] > 0 and r["results"]["cpu_time"] > 0 for r in runs))
+        return runs
+
+    def test_single_runner_saves_runs_in_batches(self):
+        runner = SingleRunner()
+        runner.save_batch_size = 5
+        self.approach_cls(runner=runner).run()
+        self.assert_all_finished()
+
+    def test_process_pool_runner(self):
+        self.approach_cls(runner=ProcessPoolRunner(n_jobs=2, max_tasks_per_worker=5)).run()
+        self.assert_all_finished()
+
+    def test_process_pool_resume(self):
+        runner = ProcessPoolRunner(n_jobs=2)
+        self.approach_cls(runner=runner).run()
+        self.assertIsNone(runner._pool)
+
+        runs = Run.collection(self.approach.id)
+        for r in runs.all()[:5]:
+            run = Run.load(self.approach.id, r["id"])
+            run.status = "waiting"
+            run.update()
+        self.approach_cls(runner=runner).run(resume=True)
+        self.assert_all_finished()
+
+    def test_process_pool_run_decorator(self):
+        DecisionTreeApproach = process_pool_run(n_jobs=3)(self.approach_cls)
+        runnable_approach = DecisionTreeApproach()
+        self.assertIsInstance(runnable_approach.runner, ProcessPoolRunner)
+        self.assertEqual(runnable_approach.runner.n_jobs, 3)
+
+    def test_thread_pool_runner(self):
+        self.approach_cls(runner=ThreadPoolRunner(n_jobs=4)).run()
+        self.assert_all_finished()
+
+    def test_thread_pool_search(self):
+        from driftai.parameters import ParameterGrid
+        from driftai.result_report import accuracy
+        from driftai.run import SuccessiveHalving
+        SearchedApproach = type("DecisionTreeApproach", (self.approach_cls,), {
+            "metrics": property(lambda self: [accuracy]),
+            "search_space": property(lambda self: SuccessiveHalving(
+                ParameterGrid(self.parameters), "accuracy", min_budget=0.5, eta=2, parallelism=4))
+        })
+        SearchedApproach(runner=ThreadPoolRunner(n_jobs=4)).run()
+        runs = Run.collection(self.approach.id).all()
+        # Rungs of 2 and 1 configurations, run on 3 subdataset sets
+        self.assertEqual(len(runs), 9)
+        self.assertTrue(all(r["results"]["metrics"]["accuracy"] > 0.5 for r in runs))
+
+    def test_thread_pool_run_decorator(self):
+        runnable_approach = thread_pool_run(n_jobs=2)(self.approach_cls)()
+        self.assertIsInstance(runnable_approach.runner, ThreadPoolRunner)
+
+    def test_dask_run_decorator(self):
+        retry = RetryPolicy()
+        runnable_approach = dask_run(n_workers=2, retry=retry, processes=False)(self.approach_cls)()
+        self.assertIsInstance(runnable_approach.runner, DaskRunner)
+        self.assertIs(runnable_approach.runner.retry, retry)
+        self.assertEqual(runnable_approach.runner.cluster_kwargs, {"processes": False})
+
+    @unittest.skipIf(importlib.util.find_spec("distributed") is None, "dask.distributed is not installed")
+    def test_dask_runner(self):
+        self.approach_cls(runner=DaskRunner(n_workers=2, processes=False)).run()
+        self.assert_all_finished()
+
+    def test_results_store_inline_predictions(self):
+        # Remote workers return the predictions inline, the runner stores them
+        runnable_approach = self.approach_cls(runner=SingleRunner())
+        run = Run(approach_id=self.approach.id, subdataset=self.sbds, subdataset_set=list(self.sbds.indices["sets"])[0],
+                  run_parameters={"max_depth": 2, "criterion": "gini"}, check_exists=False)
+        result = evaluate_run(runnable_approach, run, store_predictions=False)
+        self.assertIsNone(result.predictions)
+        predictions = np.array(result.result)
+
+        result.store_predictions()
+        self.assertIsNotNone(result.predictions)
+        self.assertIsNone(result.get_info()["result"])
+        self.assertTrue(np.array_equal(result.result, predictions))
+
+    def test_cloud_runner(self):
+        workers = [ multiprocessing.Process(target=_work, args=(testenv.MOCK_PROJECT_PATH,)) for _ in range(2) ]
+        for w in workers:
+            w.start()
+        try:
+            self.approach_cls(runner=CloudRunner(poll_interval=0.05)).run()
+        finally:
+            for w in workers:
+                w.join()
+        self.assert_all_finished()
+
+    def test_cloud_runner_stalls_without_workers(self):
+        runner = CloudRunner(poll_interval=0.05, stall_timeout=0.5)
+        self.assertIsNone(runner.retry)
+        with self.assertRaises(OptAppRunnerStalledException):
+            self.approach_cls(runner=runner).run()
+        # The runs left stay queued until workers execute them
+        self.assertEqual(DatabaseInjector.run_queue().count_by_status(self.approach.id), {"queued": 24})
+
+        workers = [ multiprocessing.Process(target=_work, args=(testenv.MOCK_PROJECT_PATH,)) for _ in range(2) ]
+        for w in workers:
+            w.start()
+        try:
+            self.approach_cls(runner=CloudRunner(poll_interval=0.05)).run(resume=True)
+        finally:
+            for w in workers:
+                w.join()
+        self.assert_all_finished()
+
+    def test_shards(self):
+        n_shards = 3
+        for shard in range(1, n_shards + 1):
+            self.approach_cls(runner=ShardRunner(shard, n_shards)).run()
+        # Shards do not write to driftai db
+        self.assertEqual(Run.collection(self.approach.id).all(), [])
+
+        runnable_approach = self.approach_cls(runner=SingleRunner())
+        self.assertEqual(merge_shards(runnable_approach), 24)
+        self.assert_all_finished()
+        # Merging again has no effect
+        self.assertEqual(merge_shards(runnable_approach), 24)
+        self.assertEqual(Run.collection(self.approach.id).count_by_status(), {"finished": 24})
+
+    def test_merge_missing_shards(self):
+        from driftai.run.shards import shard_path
+        self.approach_cls(runner=ShardRunner(1, 3)).run()
+        # Results of a previous split in 4 shards are skipped
+        self.approach_cls(runner=ShardRunner(2, 4)).run()
+        shard_path(self.approach.id, 2, 4).touch()
+        self.approach_cls(runner=ShardRunner(3, 3)).run()
+
+        runnable_approach = self.approach_cls(runner=SingleRunner())
+        with self.assertWarns(UserWarning):
+            self.assertEqual(merge_shards(runnable_approach), 16)
+        # The runs of the missing shard are waiting, so they can be resumed
+        runs = Run.collection(self.approach.id)
+        self.assertEqual(runs.count_by_status(), {"finished": 16, "waiting": 8})
+        runnable_approach.run(resume=True)
+        self.assert_all_finished()
+
+    def test_shard_resume(self):
+        from driftai.run.shards import shard_path, read_shard
+        self.approach_cls(runner=ShardRunner(2, 4)).run()
+        path = shard_path(self.approach.id, 2, 4)
+        header, *lines = path.read_text().splitlines()
+        self.assertEqual(json.loads(header)["n_shards"], 4)
+        self.assertEqual(len(lines), 6)
+
+        # Shard killed after 2 runs, while writing the third one
+        path.write_text("\n".join([header] + lines[:2]) + "\n" + lines[2][:10])
+        self.approach_cls(runner=ShardRunner(2, 4)).run(resume=True)
+        self.assertEqual(sorted(r["id"] for r in read_shard(path)), sorted(json.loads(l)["id"] for l in lines))
+
+    def limited_approach(self, timeout=None, cpu_timeout=None):
+        import time
+        def learn(self, data, parameters):
+            # The deepest trees never finish
+            if parameters["max_depth"] == 40:
+                if cpu_timeout is not None:
+                    while True:
+                        pass
+                time.sleep(60)
+            return self.approach_cls.learn(self, data, parameters)
+        return type("DecisionTreeApproach", (self.approach_cls,), {
+            "approach_cls": self.approach_cls,
+            "learn": learn,
+            "timeout": property(lambda self: timeout),
+            "cpu_timeout": property(lambda self: cpu_timeout)
+        })
+
+    def assert_timed_out(self):
+        runs = Run.collection(self.approach.id).all()
+        self.assertEqual(len(runs), 24)
+        for r in runs:
+            expected = "timeout" if r["run_parameters"]["max_depth"] == 40 else "finished"
+            self.assertEqual(r["status"], expected)
+
+    def test_single_runner_timeout(self):
+        self.limited_approach(timeout=1)(runner=SingleRunner()).run()
+        self.assert_timed_out()
+        # Runs executed alone in a child process measure their peak resident memory
+        finished = [ r for r in Run.collection(self.approach.id).all() if r["status"] == "finished" ]
+        self.assertTrue(all(r["results"]["peak_rss"] > 0 for r in finished))
+
+    def test_thread_pool_cpu_timeout(self):
+        self.limited_approach(cpu_timeout=1)(runner=ThreadPoolRunner(n_jobs=6)).run()
+        self.assert_timed_out()
+
+    def test_process_pool_runner_timeout(self):
+        # The runner limit applies when the approach does not set its own
+        self.limited_approach()(runner=ProcessPoolRunner(n_jobs=6, timeout=2)).run()
+        self.assert_timed_out()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork start method")
+    def test_limited_runs_forked_from_main_thread(self):
+        from driftai.run.runner import _limited_context
+        self.assertEqual(_limited_context().get_start_method(), "fork")
+        # Other threads would fork a child holding the locks of the threads running meanwhile
+        methods = []
+        thread = threading.Thread(target=lambda: methods.append(_limited_context().get_start_method()))
+        thread.start()
+        thread.join()
+        self.assertIn(methods[0], ["forkserver", "spawn"])
+
+    def test_cpu_timeout_without_resource(self):
+        from driftai.run import runner
+        with mock.patch.object(runner, "resource", None):
+            with self.assertRaises(ValueError):
+                self.limited_approach(cpu_timeout=1)(runner=SingleRunner()).run()
+            self.assertEqual(Run.collection(self.approach.id).all(), [])
+            self.approach_cls(runner=SingleRunner(timeout=60)).run()
+        self.assert_all_finished()
+
+    def failing_approach(self, fails):
+        attempts = {}
+        def learn(self, data, parameters):
+            key = (str(parameters), str(list(data["y"])))
+            attempts[key] = attempts.get(key, 0) + 1
+            if fails(parameters, attempts[key]):
+                raise ConnectionError("Data source unavailable")
+            return self.approach_cls.learn(self, data, parameters)
+        return type("DecisionTreeApproach", (self.approach_cls,), {
+            "approach_cls": self.approach_cls,
+            "learn": learn
+        })
+
+    def assert_failed(self):
+        runs = Run.collection(self.approach.id).all()
+        self.assertEqual(len(runs), 24)
+        for r in runs:
+            if r["run_parameters"]["max_depth"] == 40:
+                self.assertEqual(r["status"], "failed")
+                self.assertIn("ConnectionError: Data source unavailable", r["error"])
+                self.assertIn("in learn", r["error"])
+            else:
+                self.assertEqual(r["status"], "finished")
+                self.assertIsNone(r["error"])
+
+    def test_failed_runs(self):
+        DecisionTreeApproach = self.failing_approach(lambda parameters, attempt: parameters["max_depth"] == 40)
+        DecisionTreeApproach(runner=SingleRunner()).run()
+        self.assert_failed()
+        DecisionTreeApproach(runner=ThreadPoolRunner(n_jobs=4)).run()
+        self.assert_failed()
+        # Errors of runs executed in child processes keep their traceback
+        DecisionTreeApproach(runner=ProcessPoolRunner(n_jobs=4, timeout=30)).run()
+        self.assert_failed()
+
+    def test_retry_failed_runs(self):
+        # Every run fails twice
+        DecisionTreeApproach = self.failing_approach(lambda parameters, attempt: attempt <= 2)
+        DecisionTreeApproach(runner=ThreadPoolRunner(n_jobs=4, retry=RetryPolicy(max_retries=2, backoff=0.01))).run()
+        self.assert_all_finished()
+
+        DecisionTreeApproach = self.failing_approach(lambda parameters, attempt: attempt <= 2)
+        DecisionTreeApproach(runner=SingleRunner(retry=RetryPolicy(max_retries=1, backoff=0.01))).run()
+        self.assertEqual(Run.collection(self.approach.id).count_by_status(), {"failed": 24})
+
+    def test_retry_policy(self):
+        retry = RetryPolicy(max_retries=3, backoff=0.5, factor=2, max_backoff=1.5, errors=(ConnectionError,))
+        self.assertEqual([retry.delay(i) for i in range(3)], [0.5, 1.0, 1.5])
+        self.assertTrue(retry.should_retry(ConnectionError(), 2))
+        self.assertFalse(retry.should_retry(ConnectionError(), 3))
+        self.assertFalse(retry.should_retry(ValueError(), 0))
+        self.assertFalse(RetryPolicy().should_retry(OptAppRunTimeoutException("CPU", 1), 0))
+        self.assertTrue(RetryPolicy().should_retry(OSError(), 0))
+        self.assertFalse(RetryPolicy().should_retry(ValueError(), 0))
+
+        calls = []
+        def flaky(error):
+            calls.append(error)
+            raise error()
+        with self.assertRaises(ValueError):
+            RetryPolicy(backoff=0, errors=(ConnectionError,)).call(flaky, ValueError)
+        self.assertEqual(len(calls), 1)
+        with self.assertRaises(ConnectionError):
+            RetryPolicy(max_retries=2, backoff=0).call(flaky, ConnectionError)
+        self.assertEqual(len(calls), 4)
+
+    def test_resume_leased_runs(self):
+        import time
+        self.approach_cls(runner=SingleRunner()).run()
+        runs = [ Run.load(self.approach.id, r["id"]) for r in Run.collection(self.approach.id).all() ]
+        now = time.time()
+        leases = [ {"owner": "other", "heartbeat": now, "expires": now + 60},   # Alive
+                   {"owner": "dead", "heartbeat": now - 60, "expires": now - 1}, # Expired
+                   None,                                                          # Legacy
+                   None ]
+        for i, run in enumerate(runs[:12]):
+            run.status = "waiting" if i % 4 == 3 else "running"
+            run.lease = leases[i % 4]
+            run.update()
+
+        runner = SingleRunner()
+        self.approach_cls(runner=runner).run(resume=True)
+        stored = dict((r["id"], r) for r in Run.collection(self.approach.id).all())
+        for i, run in enumerate(runs):
+            info = stored[run.id]
+            if i < 12 and i % 4 == 0:
+                # Runs of a live runner are not executed again
+                self.assertEqual(info["status"], "running")
+                self.assertEqual(info["lease"]["owner"], "other")
+            else:
+                self.assertEqual(info["status"], "finished")
+                if i < 12:
+                    self.assertEqual(info["lease"]["owner"], runner.owner)
+
+    def test_claim_runs_atomically(self):
+        import time
+        self.approach_cls(runner=SingleRunner()).run()
+        runs = [ Run.load(self.approach.id, r["id"]) for r in Run.collection(self.approach.id).all() ]
+        now = time.time()
+        for run in runs:
+            run.status = "waiting"
+            run.update()
+        # Another runner claims a run after it has been loaded
+        alive = Run.load(self.approach.id, runs[0].id)
+        alive.status = "running"
+        alive.lease = {"owner": "other", "heartbeat": now, "expires": now + 60}
+        alive.update()
+
+        claimed = []
+        runners = [ SingleRunner() for _ in range(4) ]
+        threads = [ threading.Thread(target=lambda r=r: claimed.extend(r.claim(list(runs)))) for r in runners ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Every run but the alive one is claimed by exactly one runner
+        self.assertEqual(sorted(r.id for r in claimed), sorted(r.id for r in runs[1:]))
+        stored = dict((r["id"], r) for r in Run.collection(self.approach.id).all())
+        self.assertEqual(stored[runs[0].id]["lease"]["owner"], "other")
+        owners = set(r.owner for r in runners)
+        self.assertTrue(all(stored[r.id]["lease"]["owner"] in owners for r in runs[1:]))
+
+    def test_lease_heartbeat(self):
+        import time
+        def learn(self, data, parameters):
+            if parameters["max_depth"] == 40:
+                time.sleep(0.4)
+            return self.approach_cls.learn(self, data, parameters)
+        DecisionTreeApproach = type("DecisionTreeApproach", (self.approach_cls,), {
+            "approach_cls": self.approach_cls, "learn": learn
+        })
+
+        for runner_cls in [SingleRunner, ThreadPoolRunner]:
+            renewals = []
+            class HeartbeatRunner(runner_cls):
+                lease_time = 0.3
+                def lease(self, runs):
+                    runs = list(runs)
+                    renewals.extend(r.id for r in runs if r.lease is not None)
+                    super().lease(runs)
+            DecisionTreeApproach(runner=HeartbeatRunner()).run()
+            self.assert_all_finished()
+            self.assertTrue(renewals)
+            if runner_cls is SingleRunner:
+                # Executing runs one by one, only the slow runs last long enough to renew their lease
+                slow = set(r["id"] for r in Run.collection(self.approach.id).all()
+                           if r["run_parameters"]["max_depth"] == 40)
+                self.assertTrue(set(renewals) <= slow)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/8"), (2, 8))
+        for shard in ["0/8", "9/8", "2", "a/b"]:
+            with self.assertRaises(ValueError):
+                parse_shard(shard)
+
+if __name__ == '__main__':
+    unittest.main()
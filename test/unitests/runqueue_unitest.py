@@ -0,0 +1,82 @@
+import unittest
+import time
+import sqlite3
+from pathlib import Path
+
+from driftai.db import RunQueue
+
+from test import testenv
+
+class _Run(object):
+    def __init__(self, id, subdataset_set="0", run_parameters=None, budget=None):
+        self.id = id
+        self.subdataset_set = subdataset_set
+        self.run_parameters = run_parameters or {"x": 1}
+        self.budget = budget
+
+class RunQueueTest(unittest.TestCase):
+    def setUp(self):
+        testenv.delete_mock_projects()
+        self.queue = RunQueue(Path(testenv.MOCK_PROJECT_PATH, "project_files", "run_queue.sqlite"))
+        self.queue.put("approach", "approaches.approach", "ApproachApproach", [_Run("r1"), _Run("r2", budget=0.5)])
+
+    def tearDown(self):
+        self.queue.close()
+        testenv.delete_mock_projects()
+
+    def test_lease_in_order(self):
+        first = self.queue.lease("w1", 60)
+        second = self.queue.lease("w2", 60)
+        self.assertEqual((first["run_id"], second["run_id"]), ("r1", "r2"))
+        self.assertEqual(first["run_parameters"], {"x": 1})
+        self.assertEqual(second["budget"], 0.5)
+        self.assertIsNone(self.queue.lease("w3", 60))
+        self.assertEqual(self.queue.count_by_status("approach"), {"leased": 2})
+
+    def test_expired_lease(self):
+        self.queue.lease("w1", 0.05)
+        self.assertEqual(self.queue.count_leased("approach"), 1)
+        self.assertFalse(self.queue.renew("approach", "r1", "w2", 60))
+        time.sleep(0.1)
+        self.assertEqual(self.queue.count_leased("approach"), 0)
+        # The run leased by the stopped worker is leased again
+        self.assertEqual(self.queue.lease("w2", 60)["run_id"], "r1")
+        self.assertFalse(self.queue.renew("approach", "r1", "w1", 60))
+        self.assertTrue(self.queue.renew("approach", "r1", "w2", 60))
+
+    def test_collect(self):
+        self.queue.lease("w1", 60)
+        self.queue.lease("w1", 60)
+        self.queue.complete("approach", "r1", {"time": 1, "metrics": {"accuracy": 0.9}})
+        self.queue.fail("approach", "r2", "Traceback")
+        # A late report of a finished run is ignored
+        self.queue.complete("approach", "r2", {"time": 2})
+
+        reported = self.queue.collect("approach")
+        self.assertEqual([(t["run_id"], t["status"]) for t in reported], [("r1", "done"), ("r2", "failed")])
+        self.assertEqual(reported[0]["result"]["metrics"], {"accuracy": 0.9})
+        self.assertEqual(reported[1]["error"], "Traceback")
+        self.assertEqual(self.queue.collect("approach"), [])
+
+        # Collected runs can be queued again
+        self.queue.put("approach", "approaches.approach", "ApproachApproach", [_Run("r1")])
+        self.assertEqual(self.queue.count_by_status(), {"queued": 1})
+
+    def test_clear(self):
+        self.queue.clear("approach")
+        self.assertIsNone(self.queue.lease("w1", 60))
+
+    def test_rollback_journal(self):
+        # WAL mode does not work on network filesystems
+        path = self.queue.path
+        self.queue.close()
+        conn = sqlite3.connect(str(path))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+
+        self.queue = RunQueue(path)
+        self.assertEqual(self.queue.count_by_status(), {"queued": 2})
+        self.assertEqual(self.queue._conn().execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+if __name__ == '__main__':
+    unittest.main()
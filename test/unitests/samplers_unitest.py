@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from driftai.parameters import RandomSampler, LatinHypercubeSampler, SobolSampler, \
+                               UniformParameter, LogUniformParameter, CategoricalParameter, \
+                               IntParameter, ParameterGrid
+
+class SamplersTest(unittest.TestCase):
+    def setUp(self):
+        self.pars = [
+            LogUniformParameter("C", 1e-3, 1e3),
+            UniformParameter("tol", 0.1, 0.5),
+            UniformParameter("n_estimators", 10, 100, integer=True),
+            CategoricalParameter("criterion", ["gini", "entropy"])
+        ]
+
+    def check_samples(self, sampler):
+        samples = list(sampler)
+        self.assertEqual(len(samples), len(sampler))
+        for s in samples:
+            self.assertTrue(1e-3 <= s["C"] <= 1e3)
+            self.assertTrue(0.1 <= s["tol"] <= 0.5)
+            self.assertIsInstance(s["n_estimators"], int)
+            self.assertIn(s["criterion"], ["gini", "entropy"])
+        self.assertEqual(sampler[-1], samples[-1])
+        self.assertEqual(sampler[2:5], samples[2:5])
+        return samples
+
+    def test_random_sampler(self):
+        samples = self.check_samples(RandomSampler(self.pars, n_samples=20, seed=1))
+        # Samples are reproducible given a seed
+        self.assertEqual(samples, list(RandomSampler(self.pars, n_samples=20, seed=1)))
+
+    def test_latin_hypercube_sampler(self):
+        sampler = LatinHypercubeSampler(self.pars, n_samples=16, seed=1)
+        self.check_samples(sampler)
+        # Each stratum of each parameter is sampled once
+        strata = np.floor(sampler.points * 16).astype(int)
+        for j in range(len(self.pars)):
+            self.assertEqual(sorted(strata[:, j].tolist()), list(range(16)))
+
+    def test_sobol_sampler(self):
+        sampler = SobolSampler(self.pars, n_samples=64, seed=1)
+        self.check_samples(sampler)
+
+        points = sampler.points
+        self.assertTrue(((points >= 0) & (points < 1)).all())
+        # The first two dimensions of a power of 2 number of points form a (0, 6, 2)-net
+        cells = np.floor(points[:, :2] * 8).astype(int)
+        self.assertEqual(len(set(map(tuple, cells.tolist()))), 64)
+        for j in range(len(self.pars)):
+            self.assertEqual(sorted(np.floor(points[:, j] * 64).astype(int).tolist()), list(range(64)))
+
+        self.assertFalse(np.allclose(points, SobolSampler(self.pars, n_samples=64, seed=2).points))
+
+    def test_sobol_sampler_dimensions(self):
+        pars = [UniformParameter("p{}".format(i), 0, 1) for i in range(21)]
+        points = SobolSampler(pars, n_samples=32, seed=0).points
+        for j in range(21):
+            self.assertEqual(sorted(np.floor(points[:, j] * 32).astype(int).tolist()), list(range(32)))
+
+        with self.assertRaises(ValueError):
+            SobolSampler(pars + [UniformParameter("p21", 0, 1)], n_samples=32).points
+
+    def test_distribution_parameters_in_grid(self):
+        pg = ParameterGrid([LogUniformParameter("C", 1e-2, 1e2, partitions=5), IntParameter("depth", 1, 3, 1)])
+        self.assertEqual(len(pg), 10)
+        np.testing.assert_allclose(pg.parameter_vector["C"], [1e-2, 1e-1, 1, 1e1, 1e2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta
+
+from driftai.run import CostModel, estimate_eta
+
+def _run_info(parameters, time=None, finish_date=None, budget=None):
+    finished = time is not None
+    return {
+        "run_parameters": parameters,
+        "budget": budget,
+        "status": "finished" if finished else "waiting",
+        "results": {"time": time} if finished else None,
+        "finish_date": str(finish_date)
+    }
+
+class _Run(object):
+    def __init__(self, run_parameters, budget=None):
+        self.run_parameters = run_parameters
+        self.budget = budget
+
+def _time(parameters):
+    return 0.01 * parameters["n_estimators"] * (3 if parameters["criterion"] == "entropy" else 1)
+
+class CostModelTest(unittest.TestCase):
+    def setUp(self):
+        self.configurations = [ {"n_estimators": n, "criterion": c}
+                                for n in [10, 50, 100, 500] for c in ["gini", "entropy"] ]
+
+    def test_fit(self):
+        model = CostModel().fit([ _run_info(c, _time(c)) for c in self.configurations[:6] ])
+        self.assertTrue(model.fitted)
+        # Longer configurations are predicted longer, including unseen ones
+        predictions = [ model.predict(c) for c in self.configurations ]
+        self.assertEqual(sorted(range(8), key=lambda i: predictions[i]),
+                         sorted(range(8), key=lambda i: _time(self.configurations[i])))
+
+    def test_longest_first(self):
+        model = CostModel().fit([ _run_info(c, _time(c)) for c in self.configurations ])
+        runs = model.longest_first([ _Run(c) for c in self.configurations ])
+        self.assertEqual(runs[0].run_parameters, {"n_estimators": 500, "criterion": "entropy"})
+        self.assertEqual(runs[-1].run_parameters, {"n_estimators": 10, "criterion": "gini"})
+
+    def test_cost_hint(self):
+        # Not enough finished runs to fit the model
+        model = CostModel(cost_hint=lambda p: p["n_estimators"]).fit([ _run_info(self.configurations[0], 0.1) ])
+        self.assertFalse(model.fitted)
+        self.assertEqual(model.predict(self.configurations[2]), 50)
+
+        runs = [ _Run(c) for c in self.configurations ]
+        self.assertEqual(CostModel().longest_first(runs), runs)
+        self.assertEqual(model.longest_first(runs)[0].run_parameters["n_estimators"], 500)
+
+    def test_estimate_eta(self):
+        now = datetime.now()
+        # Two runs of 10 seconds at the same time
+        runs = [ _run_info({"x": 1}, 10.0, now), _run_info({"x": 1}, 10.0, now),
+                 _run_info({"x": 1}, 10.0, now + timedelta(seconds=10)),
+                 _run_info({"x": 1}, 10.0, now + timedelta(seconds=10)),
+                 _run_info({"x": 1}), _run_info({"x": 1}) ]
+        self.assertAlmostEqual(estimate_eta(runs), 10.0)
+        self.assertIsNone(estimate_eta(runs[4:]))
+        self.assertEqual(estimate_eta(runs[:4]), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
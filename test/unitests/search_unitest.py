@@ -0,0 +1,293 @@
+import unittest
+import shutil
+from pathlib import Path
+
+from driftai.data import Dataset, SubDataset
+from driftai.run import Run, TPESearch, GPSearch, Hyperband, SuccessiveHalving, FoldRacing, GridRefinement, SingleRunner
+from driftai.parameters import UniformParameter, IntParameter, FloatParameter, CategoricalParameter, ParameterGrid
+from driftai.result_report import accuracy
+from driftai import Approach, Project, set_project_path
+from driftai.utils import import_from
+
+from test import testenv
+
+def _objective(configuration):
+    return (configuration["x"] - 0.3) ** 2 + (configuration["y"] - 0.7) ** 2
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.pars = [UniformParameter("x", 0, 1), UniformParameter("y", 0, 1)]
+
+    def optimize(self, search):
+        while True:
+            trial = search.ask()
+            if trial is None:
+                break
+            search.tell(trial[0], _objective(trial[0]))
+        return search.best()
+
+    def test_tpe_search(self):
+        best = self.optimize(TPESearch(self.pars, "error", n_runs=40, minimize=True, seed=0))
+        self.assertLess(best[1], 0.01)
+
+    def test_gp_search(self):
+        best = self.optimize(GPSearch(self.pars, "error", n_runs=20, minimize=True, n_initial=5, seed=0))
+        self.assertLess(best[1], 0.01)
+
+    def test_pending_configurations(self):
+        search = TPESearch(self.pars, "error", n_runs=6, n_initial=2, seed=0)
+        for _ in range(2):
+            search.tell(search.ask()[0], 0.5)
+
+        # Configurations proposed while others are running are different
+        pending = [search.ask()[0] for _ in range(4)]
+        self.assertEqual(len(set(str(c) for c in pending)), 4)
+        self.assertEqual(search.n_configurations, 6)
+        # The run budget is exhausted
+        self.assertIsNone(search.ask())
+
+    def test_discrete_search_space_exhausted(self):
+        search = TPESearch([CategoricalParameter("c", ["a", "b"])], "error", n_runs=10, seed=0)
+        configurations = []
+        with self.assertWarns(UserWarning):
+            while True:
+                trial = search.ask()
+                if trial is None:
+                    break
+                configurations.append(trial[0])
+                search.tell(trial[0], 1)
+        self.assertEqual(sorted(c["c"] for c in configurations), ["a", "b"])
+
+class HyperbandTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = ParameterGrid([IntParameter("x", 0, 27, 1)])
+
+    def ask_all(self, search):
+        trials = []
+        while True:
+            trial = search.ask()
+            if trial is None:
+                return trials
+            trials.append(trial)
+
+    def test_successive_halving(self):
+        search = SuccessiveHalving(self.grid, "error", min_budget=1 / 9, minimize=True, seed=0)
+        rungs = []
+        while True:
+            trials = self.ask_all(search)
+            if not trials:
+                break
+            rungs.append(trials)
+            for configuration, budget, _ in trials:
+                search.tell(configuration, abs(configuration["x"] - 13) + 1 / budget, budget)
+
+        self.assertEqual([len(r) for r in rungs], [9, 3, 1])
+        self.assertEqual([r[0][1] for r in rungs], [1 / 9, 1 / 3, 1.0])
+        # Promoted configurations are the best of the previous rung
+        first_rung = sorted(rungs[0], key=lambda t: abs(t[0]["x"] - 13))
+        self.assertEqual(sorted(c["x"] for c, _, _ in rungs[1]), sorted(c["x"] for c, _, _ in first_rung[:3]))
+        self.assertEqual(search.best()[0], first_rung[0][0])
+
+    def test_failed_configurations_lose_the_rung(self):
+        search = SuccessiveHalving(self.grid, "error", min_budget=1 / 9, minimize=True, seed=0)
+        first_rung = self.ask_all(search)
+        failed = min(first_rung, key=lambda t: t[0]["x"])
+        for configuration, budget, _ in first_rung:
+            search.tell(configuration, None if configuration is failed[0] else configuration["x"], budget)
+        second_rung = self.ask_all(search)
+        self.assertEqual(len(second_rung), 3)
+        self.assertNotIn(failed[0], [c for c, _, _ in second_rung])
+
+        # A resumed search does not run the failed configuration again
+        resumed = SuccessiveHalving(self.grid, "error", min_budget=1 / 9, minimize=True, seed=0)
+        resumed.tell(failed[0], None, failed[1])
+        self.assertEqual(len(self.ask_all(resumed)), 8)
+
+    def test_hyperband_resource(self):
+        search = Hyperband(self.grid, "error", min_budget=1, max_budget=9, resource="epochs", seed=0)
+        budgets = []
+        while True:
+            trials = self.ask_all(search)
+            if not trials:
+                break
+            for configuration, budget, _ in trials:
+                self.assertIsNone(budget)
+                budgets.append(configuration["epochs"])
+                search.tell(configuration, configuration["x"])
+
+        # Brackets of (configurations, epochs): [(9, 1), (3, 3), (1, 9)], [(5, 3), (1, 9)], [(3, 9)]
+        self.assertEqual(search.n_runs, 22)
+        self.assertEqual(budgets.count(1), 9)
+        # Configurations drawn again by a later bracket do not run twice
+        self.assertLessEqual(budgets.count(3), 8)
+        self.assertLessEqual(budgets.count(9), 5)
+        self.assertEqual(search.best()[1], max(c["x"] for c, _ in search._history))
+
+class FoldRacingTest(unittest.TestCase):
+    def test_worse_configurations_eliminated(self):
+        search = FoldRacing(ParameterGrid([IntParameter("x", 0, 10, 1)]), "error", minimize=True)
+        sets = ["fold_{}".format(i) for i in range(5)]
+        search.start(sets)
+        runs = []
+        while True:
+            trial = search.ask()
+            if trial is None:
+                break
+            self.assertEqual(len(trial.sets), 1)
+            fold = sets.index(trial.sets[0])
+            runs.append((trial.configuration["x"], fold))
+            # Errors grow with x, folds add the same noise to every configuration
+            search.tell(trial.configuration, trial.configuration["x"] + 0.1 * ((fold * 7) % 3))
+
+        # Folds are run breadth-first
+        folds = [f for _, f in runs]
+        self.assertEqual(folds, sorted(folds))
+        self.assertEqual(folds.count(0), 10)
+        self.assertEqual(folds.count(1), 10)
+        # Only the best configuration survives the first two folds
+        self.assertEqual(folds.count(4), 1)
+        self.assertEqual(search.best(), ({"x": 0}, 0.1 * sum((f * 7) % 3 for f in range(5)) / 5))
+
+    def test_noisy_configurations_kept(self):
+        search = FoldRacing(ParameterGrid([IntParameter("x", 0, 2, 1)]), "accuracy", min_folds=3)
+        sets = ["fold_{}".format(i) for i in range(3)]
+        search.start(sets)
+        n_trials = 0
+        while True:
+            trial = search.ask()
+            if trial is None:
+                break
+            n_trials += 1
+            fold = sets.index(trial.sets[0])
+            # Differences change sign across the folds
+            search.tell(trial.configuration, 0.5 + (0.1 if (trial.configuration["x"] + fold) % 2 else -0.1))
+
+        self.assertEqual(n_trials, 6)
+        self.assertEqual(len(search._history), 2)
+
+class GridRefinementTest(unittest.TestCase):
+    def run_rounds(self, search, objective):
+        rounds = []
+        while True:
+            trials = []
+            while True:
+                trial = search.ask()
+                if trial is None:
+                    break
+                trials.append(trial.configuration)
+            if not trials:
+                return rounds
+            rounds.append(trials)
+            for configuration in trials:
+                search.tell(configuration, objective(configuration))
+
+    def test_refines_around_best(self):
+        pars = [FloatParameter("x", 0, 1, 5), IntParameter("n", 0, 100, 10), CategoricalParameter("c", ["a", "b"])]
+        search = GridRefinement(pars, "error", rounds=4, minimize=True)
+        rounds = self.run_rounds(search, lambda c: (c["x"] - 0.3137) ** 2 + (c["n"] - 37) ** 2 / 1e4 + (c["c"] == "b"))
+
+        self.assertEqual(len(rounds), 4)
+        self.assertEqual(len(rounds[0]), 100)
+        # Later rounds fix the categorical parameter and zoom in the numeric ones
+        self.assertTrue(all(c["c"] == "a" for c in rounds[1]))
+        self.assertEqual(sorted(set(c["x"] for c in rounds[1])), [0.0, 0.125, 0.25, 0.375, 0.5])
+        self.assertLessEqual(sum(len(r) for r in rounds), search.n_runs)
+        best, error = search.best()
+        self.assertEqual(best, {"x": 0.3125, "n": 37, "c": "a"})
+        self.assertLess(error, (0.25 - 0.3137) ** 2)
+
+    def test_refined_vectors_keep_best(self):
+        search = GridRefinement([FloatParameter("x", 0, 1, 4)], "error", rounds=3, minimize=True)
+        rounds = self.run_rounds(search, lambda c: (c["x"] - 0.3) ** 2)
+
+        # The best value is not one of the evenly spaced values of an even length
+        # vector, the third round still refines around it
+        self.assertEqual(len(rounds), 3)
+        self.assertEqual([len(r) for r in rounds], [4, 2, 2])
+        best, error = search.best()
+        self.assertLess(error, (0.3 - 2 / 9) ** 2)
+        self.assertLessEqual(sum(len(r) for r in rounds), search.n_runs)
+
+    def test_configurations_not_repeated(self):
+        search = GridRefinement([IntParameter("n", 0, 5, 1)], "accuracy", rounds=3)
+        rounds = self.run_rounds(search, lambda c: -abs(c["n"] - 2))
+        # The integer grid cannot be refined further
+        self.assertEqual(rounds, [[{"n": n} for n in range(5)]])
+        self.assertEqual(search.best(), ({"n": 2}, 0))
+
+class SearchRunnerTest(unittest.TestCase):
+    def setUp(self):
+        set_project_path(testenv.MOCK_PROJECT_PATH)
+
+        self.p = Project(path=testenv.TEST_PATH, name=testenv.MOCK_PROJECT_NAME)
+        self.ds = Dataset.read_file(path=testenv.IRIS_DATASET)
+        self.ds.save()
+
+        self.sbds = SubDataset(self.ds, method="k_fold", by=3)
+        self.sbds.save()
+
+        self.approach = Approach(self.p, "decision_tree", self.sbds, path=str(Path(testenv.TEST_PATH, "dt")))
+        shutil.copyfile(testenv.IRIS_APPROACH, str(self.approach.script_path))
+        self.approach.save()
+
+    def tearDown(self):
+        testenv.delete_mock_projects()
+
+    def searched_approach(self, n_runs):
+        DecisionTreeApproach = import_from("test.dt.decision_tree", "DecisionTreeApproach")
+        SearchedApproach = type("DecisionTreeApproach", (DecisionTreeApproach.__wrapped__,), {
+            "metrics": property(lambda self: [accuracy]),
+            "search_space": property(lambda self: TPESearch(
+                [IntParameter("max_depth", 1, 10, 1), CategoricalParameter("criterion", ["gini", "entropy"])],
+                "accuracy", n_runs=n_runs, n_initial=2, parallelism=2, seed=0))
+        })
+        return SearchedApproach(runner=SingleRunner())
+
+    def test_run_search(self):
+        self.searched_approach(n_runs=4).run()
+
+        runs = Run.collection(self.approach.id)
+        self.assertEqual(runs.count_by_status(), {"finished": 12})
+        best_parameters, _, best_accuracy = runs.top_k("accuracy")[0]
+        self.assertGreater(best_accuracy, 0.5)
+
+        # Resuming tells the finished configurations to the search and continues it
+        self.searched_approach(n_runs=6).run(resume=True)
+        self.assertEqual(runs.count_by_status(), {"finished": 18})
+        self.assertEqual(len(set(str(r["run_parameters"]) for r in runs.all())), 6)
+
+    def test_run_successive_halving(self):
+        DecisionTreeApproach = import_from("test.dt.decision_tree", "DecisionTreeApproach")
+        SearchedApproach = type("DecisionTreeApproach", (DecisionTreeApproach.__wrapped__,), {
+            "metrics": property(lambda self: [accuracy]),
+            "search_space": property(lambda self: SuccessiveHalving(
+                ParameterGrid(self.parameters), "accuracy", min_budget=0.25, eta=2, seed=0))
+        })
+        SearchedApproach(runner=SingleRunner()).run()
+
+        runs = Run.collection(self.approach.id).all()
+        budgets = [r["budget"] for r in runs]
+        # Rungs of 4, 2 and 1 configurations, run on 3 subdataset sets
+        self.assertEqual(sorted(set(budgets)), [0.25, 0.5, 1.0])
+        self.assertEqual([budgets.count(b) for b in [0.25, 0.5, 1.0]], [12, 6, 3])
+        self.assertTrue(all(r["status"] == "finished" for r in runs))
+
+    def test_run_fold_racing(self):
+        DecisionTreeApproach = import_from("test.dt.decision_tree", "DecisionTreeApproach")
+        SearchedApproach = type("DecisionTreeApproach", (DecisionTreeApproach.__wrapped__,), {
+            "metrics": property(lambda self: [accuracy]),
+            "search_space": property(lambda self: FoldRacing(
+                ParameterGrid(self.parameters), "accuracy", confidence=0.9))
+        })
+        SearchedApproach(runner=SingleRunner()).run()
+
+        runs = Run.collection(self.approach.id).all()
+        n_configurations = len(ParameterGrid(SearchedApproach(runner=SingleRunner()).parameters))
+        by_set = dict((s, sum(1 for r in runs if r["subdataset_set"] == s)) for s in set(r["subdataset_set"] for r in runs))
+        # Every configuration runs on the first two folds, only the competitive ones on the third
+        self.assertEqual(sorted(by_set.values())[1:], [n_configurations] * 2)
+        self.assertLessEqual(sorted(by_set.values())[0], n_configurations)
+        self.assertTrue(all(r["status"] == "finished" for r in runs))
+
+if __name__ == '__main__':
+    unittest.main()